@@ -0,0 +1,22 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+
+
+def async_login_required(view_func):
+    """
+    ``login_required`` for ``async def`` views.
+
+    Loading ``request.user`` hits the session and user tables, so it is
+    resolved in a worker thread before the view runs; afterwards the view can
+    use ``request.user`` without touching the database again.
+    """
+    @wraps(view_func)
+    async def _wrapped_view(request, *args, **kwargs):
+        is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+        if not is_authenticated:
+            return redirect_to_login(request.get_full_path(), settings.LOGIN_URL)
+        return await view_func(request, *args, **kwargs)
+    return _wrapped_view
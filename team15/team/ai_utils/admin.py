@@ -1,3 +1,16 @@
 from django.contrib import admin
+from .models import BackgroundJob, LLMCall
 
-# Register your models here.
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'queue', 'status', 'attempts', 'owner', 'created_at', 'finished_at')
+    list_filter = ('status', 'queue', 'name')
+    search_fields = ('name', 'dedupe_key')
+
+
+@admin.register(LLMCall)
+class LLMCallAdmin(admin.ModelAdmin):
+    list_display = ('id', 'function', 'model', 'outcome', 'duration', 'time_to_first_token', 'prompt_tokens', 'response_tokens', 'retries', 'created_at')
+    list_filter = ('outcome', 'function', 'model')
+    date_hierarchy = 'created_at'
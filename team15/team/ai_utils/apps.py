@@ -1,6 +1,23 @@
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class AiUtilsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ai_utils'
+
+    def ready(self):
+        from django.utils.module_loading import autodiscover_modules
+
+        # Registers the setting_changed receiver that resets the pooled client.
+        from . import client  # noqa: F401
+        # Registers background job handlers declared in each app's tasks.py.
+        autodiscover_modules('tasks')
+        # Registers the system checks. gunicorn and uvicorn never run them, so
+        # production processes also print the shared cache warnings on startup.
+        from .checks import shared_cache_warnings
+        if not settings.DEBUG:
+            for warning in shared_cache_warnings():
+                print(f"WARNING: {warning}", file=sys.stderr)
@@ -0,0 +1,397 @@
+"""
+Database-backed background jobs for LLM work.
+
+Handlers are registered with ``@background_task`` in each app's ``tasks.py``
+and queued with ``enqueue()``. Jobs live in the ``BackgroundJob`` table, so
+no external broker is needed:
+
+* ``manage.py run_workers`` claims jobs with a conditional UPDATE and holds
+  them for ``AI_JOB_VISIBILITY_TIMEOUT`` seconds. While the handler runs, a
+  heartbeat thread renews the lock every third of that timeout, so only a
+  job whose worker died becomes visible again.
+* Failed jobs are retried with exponential backoff up to ``max_attempts``.
+* ``AI_JOB_QUEUES`` caps how many jobs of each queue run at once across
+  all workers. The cap is checked in the same UPDATE that claims the job.
+
+``AI_JOBS_MODE`` selects who runs the jobs: ``'worker'`` (only
+``run_workers``), ``'thread'`` (a bounded thread pool in the enqueuing
+process, the default for development; the queue limits apply there too) or
+``'sync'`` (inline, for scripts and tests).
+"""
+import contextvars
+import heapq
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import LessThan
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+DEFAULT_QUEUE_LIMITS = {
+    'interactive': 8,
+    'default': 4,
+    'batch': 2,
+}
+
+# Seconds before a 'thread' mode job whose queue is at its limit tries again.
+LOCAL_RETRY_DELAY = 1.0
+
+_registry = {}
+_current_job = contextvars.ContextVar('ai_current_job', default=None)
+
+
+class TaskSpec:
+    def __init__(self, func, name, queue, max_attempts, backoff):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, **payload):
+        return enqueue(self.name, **payload)
+
+
+def background_task(name=None, queue='default', max_attempts=3, backoff=5):
+    """
+    Registers a job handler. The handler is called with the job payload as
+    keyword arguments and may return a JSON-serializable result.
+    ``backoff`` is the base delay in seconds (doubled on every retry).
+    """
+    def decorator(func):
+        task_name = name or f"{func.__module__.rsplit('.', 1)[0]}.{func.__name__}"
+        spec = TaskSpec(func, task_name, queue, max_attempts, backoff)
+        _registry[task_name] = spec
+        return spec
+    return decorator
+
+
+def get_task(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f"No background task registered as '{name}'")
+
+
+def current_job():
+    """The BackgroundJob being executed, from inside a handler."""
+    return _current_job.get()
+
+
+def is_last_attempt():
+    job = current_job()
+    return job is None or job.attempts >= job.max_attempts
+
+
+def _mode():
+    return getattr(settings, 'AI_JOBS_MODE', 'thread')
+
+
+def queue_limits():
+    return {**DEFAULT_QUEUE_LIMITS, **getattr(settings, 'AI_JOB_QUEUES', {})}
+
+
+def _visibility_timeout():
+    return getattr(settings, 'AI_JOB_VISIBILITY_TIMEOUT', 300)
+
+
+def enqueue(name, owner=None, delay=0, dedupe_key=None, queue=None, dedupe_running=True, **payload):
+    """
+    Queues ``name`` with ``payload`` and returns the BackgroundJob.
+
+    When ``dedupe_key`` matches a job that is still queued or running, that
+    job is returned instead of creating a duplicate. With ``dedupe_running``
+    False only a queued job is reused, for handlers that may have already
+    read their input when the new work arrives.
+    """
+    spec = get_task(name)
+    if dedupe_key:
+        statuses = ['queued', 'running'] if dedupe_running else ['queued']
+        existing = BackgroundJob.objects.filter(
+            dedupe_key=dedupe_key, status__in=statuses
+        ).order_by('-id').first()
+        if existing:
+            return existing
+
+    job = BackgroundJob.objects.create(
+        name=spec.name,
+        queue=queue or spec.queue,
+        payload=payload,
+        max_attempts=spec.max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+        dedupe_key=dedupe_key,
+        owner=owner,
+    )
+
+    mode = _mode()
+    if mode == 'sync':
+        # Retries run back to back; there is no worker to honour the backoff.
+        while job.status == 'queued':
+            run_job_by_id(job.id, ignore_schedule=True)
+            job.refresh_from_db()
+    elif mode == 'thread':
+        transaction.on_commit(lambda: _schedule_local(job.id, delay))
+    return job
+
+
+async def aenqueue(name, **kwargs):
+    return await sync_to_async(enqueue)(name, **kwargs)
+
+
+def _claimable(now, ignore_schedule=False):
+    queued = Q(status='queued') if ignore_schedule else Q(status='queued', run_after__lte=now)
+    return queued | Q(status='running', locked_until__lte=now)
+
+
+def _below_limit(now, limit):
+    # Jobs of the claimed job's queue holding a live lock, compared in the UPDATE itself.
+    running = (
+        BackgroundJob.objects.filter(queue=OuterRef('queue'), status='running', locked_until__gt=now)
+        .order_by().values('queue').annotate(n=Count('id')).values('n')
+    )
+    return LessThan(Coalesce(Subquery(running), 0), limit)
+
+
+def _claim(job_id, worker_id, now, ignore_schedule=False, limit=None):
+    jobs = BackgroundJob.objects.filter(id=job_id).filter(_claimable(now, ignore_schedule))
+    if limit is not None:
+        jobs = jobs.filter(_below_limit(now, limit))
+    claimed = jobs.update(
+        status='running',
+        attempts=F('attempts') + 1,
+        locked_until=now + timedelta(seconds=_visibility_timeout()),
+        locked_by=worker_id,
+        started_at=now,
+    )
+    if not claimed:
+        return None
+    return BackgroundJob.objects.get(id=job_id)
+
+
+def claim_next(queues, worker_id):
+    """
+    Claims the oldest due job from ``queues`` whose queue is below its
+    concurrency limit, or returns None.
+    """
+    now = timezone.now()
+    limits = queue_limits()
+    for queue in queues:
+        limit = limits.get(queue)
+        candidates = BackgroundJob.objects.filter(queue=queue).filter(_claimable(now)).order_by('run_after', 'id').values_list('id', flat=True)[:10]
+        for job_id in candidates:
+            job = _claim(job_id, worker_id, now, limit=limit)
+            if job:
+                return job
+    return None
+
+
+def _finish(job, worker_id, **fields):
+    # Only the current lock holder may record the outcome.
+    return BackgroundJob.objects.filter(id=job.id, locked_by=worker_id, attempts=job.attempts).update(**fields)
+
+
+def _heartbeat(job, worker_id, stop):
+    """Renews the job's lock until ``stop`` is set or another worker takes it over."""
+    timeout = _visibility_timeout()
+    try:
+        while not stop.wait(timeout / 3):
+            renewed = BackgroundJob.objects.filter(
+                id=job.id, status='running', locked_by=worker_id, attempts=job.attempts
+            ).update(locked_until=timezone.now() + timedelta(seconds=timeout))
+            if not renewed:
+                break
+    except Exception as e:
+        print(f"Background job {job} failed to renew its lock: {e}")
+    finally:
+        connections.close_all()
+
+
+def _start_heartbeat(job, worker_id):
+    stop = threading.Event()
+    thread = threading.Thread(target=_heartbeat, args=(job, worker_id, stop), daemon=True)
+    thread.start()
+    return stop
+
+
+def run_job(job, worker_id):
+    """Executes a claimed job and records success, a scheduled retry or failure."""
+    now = timezone.now()
+    try:
+        spec = get_task(job.name)
+    except LookupError as e:
+        _finish(job, worker_id, status='failed', error=str(e), finished_at=now, locked_until=None)
+        return
+
+    if job.attempts > job.max_attempts:
+        # Re-claimed after its lock expired on the final attempt.
+        _finish(job, worker_id, status='failed', error=job.error or "Visibility timeout exceeded", finished_at=now, locked_until=None)
+        return
+
+    token = _current_job.set(job)
+    heartbeat = _start_heartbeat(job, worker_id)
+    try:
+        result = spec.func(**job.payload)
+    except Exception as e:
+        print(f"Background job {job} failed (attempt {job.attempts}/{job.max_attempts}): {e}")
+        error = "".join(traceback.format_exception_only(type(e), e)).strip()
+        if job.attempts < job.max_attempts:
+            delay = spec.backoff * (2 ** (job.attempts - 1))
+            if _finish(job, worker_id, status='queued', error=error, locked_until=None,
+                       run_after=timezone.now() + timedelta(seconds=delay)) and _mode() == 'thread':
+                _schedule_local(job.id, delay)
+        else:
+            _finish(job, worker_id, status='failed', error=error, finished_at=timezone.now(), locked_until=None)
+    else:
+        _finish(job, worker_id, status='succeeded', result=result, error=None, finished_at=timezone.now(), locked_until=None)
+    finally:
+        heartbeat.set()
+        _current_job.reset(token)
+
+
+def run_job_by_id(job_id, worker_id=None, ignore_schedule=False, limit=None):
+    """Claims and runs the job; False if it could not be claimed."""
+    worker_id = worker_id or _worker_id('inline')
+    job = _claim(job_id, worker_id, timezone.now(), ignore_schedule, limit)
+    if not job:
+        return False
+    run_job(job, worker_id)
+    return True
+
+
+def _run_local(job_id):
+    close_old_connections()
+    try:
+        queue = BackgroundJob.objects.filter(id=job_id).values_list('queue', flat=True).first()
+        if queue is None:
+            return
+        if not run_job_by_id(job_id, _worker_id('thread'), limit=queue_limits().get(queue)):
+            if BackgroundJob.objects.filter(id=job_id, status='queued', run_after__lte=timezone.now()).exists():
+                # Due but its queue is at its limit; try again shortly.
+                _schedule_local(job_id, LOCAL_RETRY_DELAY)
+    except Exception as e:
+        print(f"Background job #{job_id} crashed: {e}")
+    finally:
+        connections.close_all()
+
+
+class _LocalRunner:
+    """
+    Runs 'thread' mode jobs: one scheduler thread hands due jobs to a pool
+    of as many threads as the queue limits add up to.
+    """
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.executor = ThreadPoolExecutor(max_workers=sum(queue_limits().values()), thread_name_prefix='ai-job')
+        self._due = []
+        self._condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name='ai-job-scheduler', daemon=True)
+        self.thread.start()
+
+    def schedule(self, job_id, delay=0):
+        with self._condition:
+            heapq.heappush(self._due, (time.monotonic() + delay, job_id))
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._due or self._due[0][0] > time.monotonic():
+                    self._condition.wait(self._due[0][0] - time.monotonic() if self._due else None)
+                _, job_id = heapq.heappop(self._due)
+            self.executor.submit(_run_local, job_id)
+
+
+_local_runner = None
+_local_runner_lock = threading.Lock()
+
+
+def _schedule_local(job_id, delay=0):
+    global _local_runner
+    # A forked process needs its own threads.
+    if _local_runner is None or _local_runner.pid != os.getpid():
+        with _local_runner_lock:
+            if _local_runner is None or _local_runner.pid != os.getpid():
+                _local_runner = _LocalRunner()
+    _local_runner.schedule(job_id, delay)
+
+
+def _worker_id(kind='worker'):
+    return f"{socket.gethostname()}:{os.getpid()}:{kind}:{threading.get_ident()}"
+
+
+class Worker:
+    """
+    Polls ``queues`` and runs claimed jobs on a pool of ``threads`` threads.
+    Used by ``manage.py run_workers``; one instance runs per process.
+    """
+
+    def __init__(self, queues, threads=4, poll_interval=1.0):
+        self.queues = queues
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.worker_id = _worker_id()
+        self._stop = threading.Event()
+        self._slots = threading.Semaphore(threads)
+
+    def stop(self):
+        self._stop.set()
+
+    def _execute(self, job):
+        try:
+            run_job(job, self.worker_id)
+        except Exception as e:
+            print(f"Background job {job} crashed: {e}")
+        finally:
+            connections.close_all()
+            self._slots.release()
+
+    def run(self, burst=False):
+        """Runs until stopped; with ``burst`` it returns once no job is due."""
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            while not self._stop.is_set():
+                self._slots.acquire()
+                close_old_connections()
+                try:
+                    job = claim_next(self.queues, self.worker_id)
+                except Exception as e:
+                    print(f"Worker {self.worker_id} failed to claim a job: {e}")
+                    job = None
+                if job is None:
+                    self._slots.release()
+                    if burst:
+                        break
+                    self._stop.wait(self.poll_interval)
+                    continue
+                executor.submit(self._execute, job)
+
+
+def job_status(job):
+    """JSON-friendly summary used by the job status endpoint."""
+    retry_in = None
+    if job.status == 'queued' and job.attempts:
+        retry_in = max(0, int((job.run_after - timezone.now()).total_seconds()))
+    return {
+        'id': job.id,
+        'name': job.name,
+        'status': job.status,
+        'finished': job.is_finished,
+        'attempts': job.attempts,
+        'retry_in': retry_in,
+        'result': job.result,
+        'error': job.error if job.status == 'failed' else None,
+    }
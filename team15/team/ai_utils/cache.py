@@ -0,0 +1,260 @@
+"""
+Content-addressed cache for LLM responses.
+
+Responses are keyed by a SHA-256 of (function, model, normalized prompt,
+config). A size-bounded in-process LRU serves repeats in microseconds and
+can be backed by any Django cache alias (``AI_CACHE_BACKEND``) so entries
+are shared between worker processes.
+"""
+import contextlib
+import contextvars
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+KEY_PREFIX = 'ai_utils:llm:'
+
+# Seconds to keep a response per ai_utils function. 0 disables caching.
+DEFAULT_TTLS = {
+    'parse_resume': 7 * 24 * 3600,
+    'analyze_match': 24 * 3600,
+    'generate_interview_questions': 3600,
+    'evaluate_answer': 24 * 3600,
+    'evaluate_answers_batch': 24 * 3600,
+    'generate_quiz_questions': 3600,
+    'get_next_ai_question': 0,
+    'generate_detailed_feedback': 24 * 3600,
+}
+DEFAULT_TTL = 3600
+
+_bypass = contextvars.ContextVar('ai_cache_bypass', default=False)
+
+
+def normalize_prompt(prompt):
+    """Collapses whitespace so indentation changes don't split cache entries."""
+    if isinstance(prompt, str):
+        return " ".join(prompt.split())
+    return json.dumps(prompt, sort_keys=True, default=str)
+
+
+def _serialize_config(config):
+    if config is None:
+        return None
+    if hasattr(config, 'model_dump'):
+        schema = getattr(config, 'response_schema', None)
+        if isinstance(schema, type):
+            # A pydantic class: key on its JSON schema so edits to it miss the cache
+            config = config.model_copy(update={'response_schema': None})
+            return [config.model_dump(mode='json', exclude_none=True), schema.model_json_schema()]
+        return config.model_dump(mode='json', exclude_none=True)
+    return config
+
+
+def make_key(function, model, prompt, config=None):
+    payload = json.dumps(
+        [function, model, normalize_prompt(prompt), _serialize_config(config)],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_ttl(function):
+    ttls = {**DEFAULT_TTLS, **getattr(settings, 'AI_CACHE_TTLS', {})}
+    return ttls.get(function, DEFAULT_TTL)
+
+
+@contextlib.contextmanager
+def bypass_cache():
+    """
+    Skips cache lookups inside the block. Fresh responses are still stored,
+    so a bypassed call also refreshes the cached entry.
+    """
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def is_bypassed():
+    return _bypass.get()
+
+
+class LLMCache:
+    """
+    In-process LRU bounded by entry count and total bytes, optionally in
+    front of a shared Django cache backend.
+    """
+
+    def __init__(self, max_entries=1000, max_bytes=32 * 1024 * 1024, backend_alias=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.backend_alias = backend_alias
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'backend_hits': 0,
+            'sets': 0,
+            'evictions': 0,
+            'bytes_served': 0,
+            'bytes_stored': 0,
+        }
+        self._by_function = {}
+
+    @property
+    def backend(self):
+        if not self.backend_alias:
+            return None
+        return caches[self.backend_alias]
+
+    def _count(self, function, outcome):
+        counts = self._by_function.setdefault(function, {'hits': 0, 'misses': 0})
+        counts[outcome] += 1
+        self._stats[outcome] += 1
+
+    def _remove(self, key):
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value.encode('utf-8'))
+
+    def _store_local(self, key, value, expires_at):
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (expires_at, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats['evictions'] += 1
+
+    def get(self, key, function=''):
+        if is_bypassed():
+            return None
+
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._count(function, 'hits')
+                    self._stats['bytes_served'] += len(value.encode('utf-8'))
+                    return value
+                self._remove(key)
+
+        backend = self.backend
+        if backend is not None:
+            try:
+                stored = backend.get(KEY_PREFIX + key)
+            except Exception as e:
+                print(f"AI Cache Error (get): {e}")
+                stored = None
+            if stored is not None:
+                expires_at, value = stored
+                with self._lock:
+                    self._store_local(key, value, expires_at)
+                    self._count(function, 'hits')
+                    self._stats['backend_hits'] += 1
+                    self._stats['bytes_served'] += len(value.encode('utf-8'))
+                return value
+
+        with self._lock:
+            self._count(function, 'misses')
+        return None
+
+    def set(self, key, value, ttl):
+        if not ttl or value is None:
+            return
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._store_local(key, value, expires_at)
+            self._stats['sets'] += 1
+            self._stats['bytes_stored'] += len(value.encode('utf-8'))
+
+        backend = self.backend
+        if backend is not None:
+            try:
+                backend.set(KEY_PREFIX + key, (expires_at, value), ttl)
+            except Exception as e:
+                print(f"AI Cache Error (set): {e}")
+
+    async def aget(self, key, function=''):
+        # Shared backends (db, redis, ...) do blocking I/O; keep it off the loop.
+        if self.backend_alias:
+            return await sync_to_async(self.get)(key, function)
+        return self.get(key, function)
+
+    async def aset(self, key, value, ttl):
+        if self.backend_alias:
+            return await sync_to_async(self.set)(key, value, ttl)
+        return self.set(key, value, ttl)
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+        backend = self.backend
+        if backend is not None:
+            backend.delete(KEY_PREFIX + key)
+
+    def clear(self):
+        """Empties the local LRU. Shared backend entries expire on their own TTL."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hit_rate': round(self._stats['hits'] / lookups, 4) if lookups else 0.0,
+                'backend': self.backend_alias,
+                'by_function': {name: dict(counts) for name, counts in self._by_function.items()},
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache(
+                    max_entries=getattr(settings, 'AI_CACHE_MAX_ENTRIES', 1000),
+                    max_bytes=getattr(settings, 'AI_CACHE_MAX_BYTES', 32 * 1024 * 1024),
+                    backend_alias=getattr(settings, 'AI_CACHE_BACKEND', None),
+                )
+    return _cache
+
+
+def cache_stats():
+    return get_cache().stats()
+
+
+@receiver(setting_changed)
+def _reset_on_setting_changed(setting, **kwargs):
+    global _cache
+    if setting.startswith('AI_CACHE_'):
+        with _cache_lock:
+            _cache = None
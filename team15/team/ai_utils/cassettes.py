@@ -0,0 +1,215 @@
+"""
+Record/replay of LLM responses for reproducible benchmark runs.
+
+``AI_RECORD_MODE`` switches how ai_utils reaches a model:
+
+* ``record``: calls go to the model as usual and every prompt -> response
+  pair is saved with its measured latency (and chunk timings for streamed
+  replies).
+* ``replay``: calls are answered from the saved pairs without any network
+  I/O. A prompt that was never recorded raises ``CassetteMissing``, which
+  callers treat like an unavailable model. With ``AI_REPLAY_LATENCY`` the
+  recorded latency is slept, so timings are comparable to the recorded run.
+* unset: no recording.
+
+Pairs are keyed like the LLM cache (function, normalized prompt, config) but
+without the model, so a cassette replays whichever models are configured.
+The store is a single SQLite file (``AI_CASSETTE_PATH``) with zlib-compressed
+responses, safe to share between threads and worker processes.
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .cache import make_key
+from .providers import Completion
+from .router import NoModelAvailable
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cassette (
+    key TEXT PRIMARY KEY,
+    function TEXT NOT NULL,
+    model TEXT,
+    response BLOB NOT NULL,
+    latency REAL,
+    prompt_tokens INTEGER,
+    response_tokens INTEGER,
+    -- JSON list of [seconds since request, text] for streamed replies
+    chunks BLOB,
+    recorded_at REAL NOT NULL
+)
+"""
+
+
+class CassetteMissing(NoModelAvailable):
+    """Replay mode found no recorded response for the prompt."""
+
+
+@dataclass
+class Recording:
+    text: str
+    model: str = None
+    latency: float = None
+    prompt_tokens: int = None
+    response_tokens: int = None
+    chunks: list = None
+
+    def completion(self, text=None):
+        return Completion(
+            self.text if text is None else text,
+            None,
+            self.prompt_tokens,
+            self.response_tokens,
+            model=f"replay:{self.model or '-'}",
+        )
+
+
+def get_mode():
+    mode = (getattr(settings, 'AI_RECORD_MODE', '') or '').lower()
+    return mode if mode in ('record', 'replay') else None
+
+
+def is_recording():
+    return get_mode() == 'record'
+
+
+def is_replaying():
+    return get_mode() == 'replay'
+
+
+def cassette_key(function, contents, config=None):
+    return make_key(function, '', contents, config)
+
+
+def _pack(text):
+    return zlib.compress(text.encode('utf-8'))
+
+
+def _unpack(blob):
+    return zlib.decompress(blob).decode('utf-8') if blob is not None else None
+
+
+class CassetteStore:
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT response, model, latency, prompt_tokens, response_tokens, chunks FROM cassette WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        response, model, latency, prompt_tokens, response_tokens, chunks = row
+        chunks = _unpack(chunks)
+        return Recording(_unpack(response), model, latency, prompt_tokens, response_tokens,
+                         json.loads(chunks) if chunks else None)
+
+    def put(self, key, function, recording):
+        chunks = json.dumps(recording.chunks) if recording.chunks else None
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO cassette VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, function, recording.model, _pack(recording.text), recording.latency,
+                 recording.prompt_tokens, recording.response_tokens,
+                 _pack(chunks) if chunks else None, time.time()),
+            )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    path = getattr(settings, 'AI_CASSETTE_PATH', None) or settings.BASE_DIR / 'ai_cassettes.sqlite3'
+    if _store is None or _store.path != str(path):
+        with _store_lock:
+            if _store is None or _store.path != str(path):
+                _store = CassetteStore(path)
+    return _store
+
+
+def _replay_latency():
+    return getattr(settings, 'AI_REPLAY_LATENCY', False)
+
+
+def _lookup(function, contents, config):
+    recording = get_store().get(cassette_key(function, contents, config))
+    if recording is None:
+        raise CassetteMissing(f"No recorded response for {function} in {get_store().path}")
+    return recording
+
+
+def replay(function, contents, config=None):
+    """Returns the recorded Completion, after the recorded latency if enabled."""
+    recording = _lookup(function, contents, config)
+    if _replay_latency() and recording.latency:
+        time.sleep(recording.latency)
+    return recording.completion()
+
+
+async def areplay(function, contents, config=None):
+    recording = await sync_to_async(_lookup)(function, contents, config)
+    if _replay_latency() and recording.latency:
+        await asyncio.sleep(recording.latency)
+    return recording.completion()
+
+
+async def areplay_stream(function, contents, config=None):
+    """Yields the recorded chunks, spaced as they were recorded if enabled."""
+    recording = await sync_to_async(_lookup)(function, contents, config)
+    chunks = recording.chunks or [[recording.latency or 0, recording.text]]
+    started = time.monotonic()
+    for offset, text in chunks:
+        if _replay_latency():
+            delay = offset - (time.monotonic() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        yield recording.completion(text)
+
+
+def _recording(completion, latency, chunks=None, text=None):
+    return Recording(
+        completion.text if text is None else text,
+        completion.model,
+        latency,
+        completion.prompt_tokens,
+        completion.response_tokens,
+        chunks,
+    )
+
+
+def record(function, contents, config, completion, latency):
+    try:
+        get_store().put(cassette_key(function, contents, config), function, _recording(completion, latency))
+    except sqlite3.Error as e:
+        print(f"AI Cassette Error (record): {e}")
+
+
+async def arecord(function, contents, config, completion, latency, chunks=None, text=None):
+    try:
+        await sync_to_async(get_store().put)(
+            cassette_key(function, contents, config), function, _recording(completion, latency, chunks, text)
+        )
+    except sqlite3.Error as e:
+        print(f"AI Cassette Error (record): {e}")
+
@@ -0,0 +1,51 @@
+"""
+System checks for features that need a cache shared by every process.
+
+The rate limiter counts usage, and single-flight shares in-flight calls,
+through cache aliases. A local-memory or dummy cache is private to one
+process, so each server or ``run_workers`` process would enforce the whole
+budget on its own and repeat calls another process is already making. These are reported by
+``manage.py check`` and ``runserver``, and printed when the app loads with
+``DEBUG`` off, since gunicorn and uvicorn do not run system checks.
+"""
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# Cache backends whose data never leaves the process.
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def _is_process_local(alias):
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    return backend in PROCESS_LOCAL_CACHES
+
+
+def shared_cache_warnings():
+    messages = []
+    alias = getattr(settings, 'AI_RATE_LIMIT_BACKEND', 'default')
+    if getattr(settings, 'AI_RATE_LIMIT_ENABLED', True) and _is_process_local(alias):
+        messages.append(Warning(
+            f"AI_RATE_LIMIT_BACKEND '{alias}' is a per-process cache, so each "
+            "process gets the whole Gemini rate limit budget.",
+            hint="Set REDIS_URL or point AI_RATE_LIMIT_BACKEND at a Redis or "
+                 "Memcached entry in CACHES.",
+            id='ai_utils.W001',
+        ))
+    alias = getattr(settings, 'AI_SINGLEFLIGHT_BACKEND', 'default')
+    if getattr(settings, 'AI_SINGLEFLIGHT_ENABLED', True) and _is_process_local(alias):
+        messages.append(Warning(
+            f"AI_SINGLEFLIGHT_BACKEND '{alias}' is a per-process cache, so "
+            "identical LLM calls are only shared within one process.",
+            hint="Set REDIS_URL or point AI_SINGLEFLIGHT_BACKEND at a Redis, "
+                 "Memcached or database entry in CACHES.",
+            id='ai_utils.W002',
+        ))
+    return messages
+
+
+@register()
+def check_shared_caches(app_configs, **kwargs):
+    return shared_cache_warnings()
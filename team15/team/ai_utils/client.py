@@ -0,0 +1,245 @@
+"""
+Process-wide Gemini client.
+
+Building a ``genai.Client`` per call opens a new HTTP connection (and TLS
+handshake) for every LLM round-trip. This module keeps a single client per
+worker process on top of a shared ``httpx`` connection pool so keep-alive
+connections are reused across requests.
+
+The async client (``get_async_client``) gets its own pool per event loop,
+since asyncio connections cannot be shared between loops. When the clients
+are discarded, each async pool is closed on its own loop.
+"""
+import asyncio
+import os
+import threading
+import time
+import weakref
+
+import httpx
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from google import genai
+from google.genai import types
+
+# Settings that require the client to be rebuilt when they change.
+CLIENT_SETTINGS = {
+    'GEMINI_API_KEY',
+    'GEMINI_BASE_URL',
+    'GEMINI_HTTP_TIMEOUT',
+    'GEMINI_POOL_MAX_CONNECTIONS',
+    'GEMINI_POOL_MAX_KEEPALIVE',
+    'GEMINI_POOL_KEEPALIVE_EXPIRY',
+}
+
+_lock = threading.Lock()
+_state = {
+    'client': None,
+    'http': None,
+    'pid': None,
+    'api_key': None,
+}
+# event loop -> (genai.Client, httpx.AsyncClient)
+_async_clients = weakref.WeakKeyDictionary()
+# aclose() tasks of discarded async pools, kept referenced until they finish.
+_closing = set()
+_stats = {
+    'clients_created': 0,
+    'resets': 0,
+    'requests': 0,
+    'created_at': None,
+}
+
+
+def _api_key():
+    api_key = getattr(settings, 'GEMINI_API_KEY', None)
+    if not api_key or api_key == 'your_gemini_api_key_here':
+        return None
+    return api_key
+
+
+def _http_options(**kwargs):
+    # GEMINI_BASE_URL points the client at a stand-in server (see ai_utils/fake_gemini.py).
+    base_url = getattr(settings, 'GEMINI_BASE_URL', '') or None
+    return types.HttpOptions(base_url=base_url, **kwargs)
+
+
+def _count_request(request):
+    _stats['requests'] += 1
+
+
+async def _acount_request(request):
+    _stats['requests'] += 1
+
+
+def _pool_limits():
+    return httpx.Limits(
+        max_connections=getattr(settings, 'GEMINI_POOL_MAX_CONNECTIONS', 20),
+        max_keepalive_connections=getattr(settings, 'GEMINI_POOL_MAX_KEEPALIVE', 10),
+        keepalive_expiry=getattr(settings, 'GEMINI_POOL_KEEPALIVE_EXPIRY', 30.0),
+    )
+
+
+def _build_http_client():
+    return httpx.Client(
+        limits=_pool_limits(),
+        timeout=getattr(settings, 'GEMINI_HTTP_TIMEOUT', 60.0),
+        event_hooks={'request': [_count_request]},
+    )
+
+
+def _build_async_http_client():
+    return httpx.AsyncClient(
+        limits=_pool_limits(),
+        timeout=getattr(settings, 'GEMINI_HTTP_TIMEOUT', 60.0),
+        event_hooks={'request': [_acount_request]},
+    )
+
+
+async def _aclose(async_http):
+    try:
+        await async_http.aclose()
+    except Exception as e:
+        print(f"AI Client Error (async close): {e}")
+
+
+def _start_aclose(async_http):
+    # Runs on the pool's own loop; its connections belong to that loop.
+    task = asyncio.get_running_loop().create_task(_aclose(async_http))
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
+
+
+def _discard_async_clients(close=True):
+    entries = list(_async_clients.items())
+    _async_clients.clear()
+    if not close:
+        return
+    for loop, (_, async_http) in entries:
+        try:
+            # Runs as soon as the loop is (or is next) running, from any thread.
+            loop.call_soon_threadsafe(_start_aclose, async_http)
+        except RuntimeError:
+            # The loop is closed; its transports went with it.
+            pass
+
+
+def _discard(close=True):
+    """Drops the current client. Must be called with ``_lock`` held."""
+    http = _state['http']
+    if close and http is not None:
+        try:
+            http.close()
+        except Exception as e:
+            print(f"AI Client Error (close): {e}")
+    _state.update(client=None, http=None, pid=None, api_key=None)
+    _discard_async_clients(close)
+
+
+def get_client():
+    """
+    Returns the shared ``genai.Client`` for this process, or None when no API
+    key is configured. The client is rebuilt after a fork or a key change.
+    """
+    api_key = _api_key()
+    if not api_key:
+        return None
+
+    pid = os.getpid()
+    client = _state['client']
+    if client is not None and _state['pid'] == pid and _state['api_key'] == api_key:
+        return client
+
+    with _lock:
+        if _state['client'] is not None and _state['pid'] == pid and _state['api_key'] == api_key:
+            return _state['client']
+        # Sockets inherited from a parent process are not ours to close.
+        _discard(close=_state['pid'] == pid)
+        http = _build_http_client()
+        client = genai.Client(
+            api_key=api_key,
+            http_options=_http_options(httpx_client=http),
+        )
+        _state.update(client=client, http=http, pid=pid, api_key=api_key)
+        _stats['clients_created'] += 1
+        _stats['created_at'] = time.time()
+        return client
+
+
+def get_async_client():
+    """
+    Returns the ``client.aio`` interface bound to the running event loop, or
+    None when no API key is configured. Must be called from a coroutine.
+    """
+    sync_client = get_client()
+    if sync_client is None:
+        return None
+
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is not None:
+        return entry[0].aio
+
+    with _lock:
+        async_http = _build_async_http_client()
+        client = genai.Client(
+            api_key=_state['api_key'],
+            http_options=_http_options(
+                httpx_client=_state['http'],
+                httpx_async_client=async_http,
+            ),
+        )
+        _async_clients[loop] = (client, async_http)
+        _stats['clients_created'] += 1
+        return client.aio
+
+
+def reset_client():
+    """Closes the pooled connections; the next ``get_client()`` starts fresh."""
+    with _lock:
+        if _state['client'] is not None:
+            _stats['resets'] += 1
+        _discard(close=_state['pid'] == os.getpid())
+
+
+def pool_stats():
+    """Returns a snapshot of client and connection pool usage for this process."""
+    http = _state['http']
+    connections = []
+    if http is not None and _state['pid'] == os.getpid():
+        pool = getattr(getattr(http, '_transport', None), '_pool', None)
+        connections = list(getattr(pool, 'connections', []))
+
+    idle = sum(1 for conn in connections if conn.is_idle())
+    created_at = _stats['created_at']
+    return {
+        'pid': os.getpid(),
+        'active_client': _state['client'] is not None and _state['pid'] == os.getpid(),
+        'async_clients': len(_async_clients),
+        'clients_created': _stats['clients_created'],
+        'resets': _stats['resets'],
+        'requests': _stats['requests'],
+        'open_connections': len(connections),
+        'idle_connections': idle,
+        'in_use_connections': len(connections) - idle,
+        'client_age_seconds': round(time.time() - created_at, 1) if created_at else None,
+    }
+
+
+def _after_fork_in_child():
+    # The child inherits the parent's lock state and sockets; start clean.
+    global _lock
+    _lock = threading.Lock()
+    _discard(close=False)
+    _stats.update(clients_created=0, resets=0, requests=0, created_at=None)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+@receiver(setting_changed)
+def _reset_on_setting_changed(setting, **kwargs):
+    if setting in CLIENT_SETTINGS:
+        reset_client()
@@ -0,0 +1,139 @@
+"""
+Bounded prompt context for AI voice interviews.
+
+Sending the whole transcript on every turn makes each prompt longer than the
+last. ``build_context`` instead returns a rolling summary of older turns plus
+the most recent turns verbatim, trimmed to ``AI_CONTEXT_TOKEN_BUDGET``.
+
+The summary lives on the session (``context_summary`` covering the first
+``summarized_turns`` turns) and is refreshed by a background job once
+``AI_CONTEXT_SUMMARY_EVERY`` turns have fallen out of the recent window.
+Turns that have left the window but are not summarized yet are kept
+verbatim while the job is pending, as long as they fit the budget: when the
+unsummarized turns outgrow it, the oldest are left out until the summary
+catches up, and a single turn larger than the whole budget is clipped.
+"""
+import re
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from .tokens import CHARS_PER_TOKEN, estimate_tokens
+
+_TURN_START = re.compile(r'^(?:AI|Candidate):', re.MULTILINE)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def recent_turns_limit():
+    return _setting('AI_CONTEXT_RECENT_TURNS', 6)
+
+
+def summary_interval():
+    return _setting('AI_CONTEXT_SUMMARY_EVERY', 4)
+
+
+def token_budget():
+    return _setting('AI_CONTEXT_TOKEN_BUDGET', 1500)
+
+
+def summary_token_budget():
+    return token_budget() // 3
+
+
+def code_token_budget():
+    return _setting('AI_CONTEXT_CODE_TOKENS', 500)
+
+
+def split_turns(transcript):
+    """Splits a "Speaker: text" transcript into turns (a turn may span lines)."""
+    if not transcript:
+        return []
+    starts = [m.start() for m in _TURN_START.finditer(transcript)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    ends = starts[1:] + [len(transcript)]
+    return [transcript[s:e].strip() for s, e in zip(starts, ends) if transcript[s:e].strip()]
+
+
+def count_questions(transcript):
+    return len(re.findall(r'^AI:', transcript or '', re.MULTILINE))
+
+
+def _clip_head(text, max_tokens):
+    """Keeps the end of ``text`` so the latest part of a long turn survives."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return "..." + text[-max_chars:]
+
+
+def clip_code(code, max_tokens=None):
+    """Keeps the start and end of long editor contents."""
+    if not code:
+        return code
+    max_chars = (max_tokens or code_token_budget()) * CHARS_PER_TOKEN
+    if len(code) <= max_chars:
+        return code
+    half = max_chars // 2
+    omitted = code[half:-half].count("\n")
+    return f"{code[:half]}\n# ... ({omitted} lines omitted) ...\n{code[-half:]}"
+
+
+@dataclass
+class InterviewContext:
+    summary: str
+    recent: str
+    questions_asked: int
+    code: str
+
+    @property
+    def tokens(self):
+        return estimate_tokens(self.summary) + estimate_tokens(self.recent) + estimate_tokens(self.code)
+
+
+def build_context(session, current_code=None):
+    """
+    Returns the bounded context for the next interviewer prompt. Only reads
+    ``session`` attributes, so it is safe to call from async code.
+    """
+    turns = split_turns(session.transcript)
+    summarized = min(session.summarized_turns or 0, len(turns))
+    start = min(summarized, max(0, len(turns) - recent_turns_limit()))
+    recent = turns[start:]
+
+    # The summarizer is asked to stay short; this only guards the budget.
+    summary = _clip_head(session.context_summary or "", summary_token_budget())
+
+    budget = max(0, token_budget() - estimate_tokens(summary))
+    kept = []
+    used = 0
+    for turn in reversed(recent):
+        cost = estimate_tokens(turn)
+        if used + cost > budget:
+            if not kept:
+                kept.append(_clip_head(turn, budget))
+            break
+        kept.append(turn)
+        used += cost
+    kept.reverse()
+
+    return InterviewContext(
+        summary=summary,
+        recent="\n".join(kept),
+        questions_asked=count_questions(session.transcript),
+        code=clip_code(current_code),
+    )
+
+
+def pending_summary_turns(session):
+    """Turns outside the recent window that the summary does not cover yet."""
+    turns = split_turns(session.transcript)
+    cutoff = max(0, len(turns) - recent_turns_limit())
+    return turns[session.summarized_turns or 0:cutoff]
+
+
+def needs_summary(session):
+    return len(pending_summary_turns(session)) >= summary_interval()
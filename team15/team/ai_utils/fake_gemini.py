@@ -0,0 +1,385 @@
+"""
+Local stand-in for the Gemini generate-content API, for load tests.
+
+``GEMINI_MOCK_MODE`` returns canned data before any network I/O, so it says
+nothing about connection pooling, timeouts, retries or failover. This server
+answers ``models/<model>:generateContent`` and
+``models/<model>:streamGenerateContent?alt=sse`` with the same JSON shape as
+the real API, so the pooled client, rate limiter and router run unchanged
+against it. Point ai_utils at it with::
+
+    GEMINI_API_KEY=fake GEMINI_BASE_URL=http://127.0.0.1:8765 python manage.py runserver
+
+and start it with ``manage.py fake_gemini`` (see its ``--help``).
+
+Replies are placeholders: requests with a ``responseSchema`` get JSON that
+matches the schema, others get filler text. Latency, streaming speed,
+per-model RPM/TPM limits (answered with 429 RESOURCE_EXHAUSTED, like the
+real quota) and random 429/500 errors are configurable. ``cachedContents``
+can be created and deleted, and requests that use one report its tokens as
+``cachedContentTokenCount`` (see ai_utils/prompt_cache.py).
+"""
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+WORDS = (
+    "candidate experience python django design scalable service team "
+    "project data model testing deploy cloud api latency cache review"
+).split()
+
+ROUTE = re.compile(r'/models/(?P<model>[^/:]+):(?P<method>generateContent|streamGenerateContent)$')
+CACHE_ROUTE = re.compile(r'/(?P<name>cachedContents(?:/[^/:]+)?)$')
+
+
+class LatencyDistribution:
+    """
+    Parsed from ``fixed:S``, ``uniform:LOW,HIGH``, ``normal:MEAN,STDDEV`` or
+    ``lognormal:MEDIAN,SIGMA`` (all in seconds).
+    """
+
+    def __init__(self, spec):
+        kind, _, params = spec.partition(':')
+        try:
+            values = [float(v) for v in params.split(',') if v.strip()]
+        except ValueError:
+            raise ValueError(f"Invalid latency '{spec}'")
+        expected = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2}.get(kind)
+        if expected is None or len(values) != expected:
+            raise ValueError(f"Invalid latency '{spec}', expected one of: fixed:S, uniform:LOW,HIGH, normal:MEAN,STDDEV, lognormal:MEDIAN,SIGMA")
+        self.spec = spec
+        self.kind = kind
+        self.values = values
+
+    def sample(self, rng):
+        if self.kind == 'fixed':
+            value = self.values[0]
+        elif self.kind == 'uniform':
+            value = rng.uniform(*self.values)
+        elif self.kind == 'normal':
+            value = rng.gauss(*self.values)
+        else:
+            median, sigma = self.values
+            value = rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        return max(0.0, value)
+
+
+@dataclass
+class FakeGeminiConfig:
+    latency: LatencyDistribution = field(default_factory=lambda: LatencyDistribution('lognormal:0.8,0.4'))
+    # model -> LatencyDistribution, overriding ``latency``
+    model_latency: dict = field(default_factory=dict)
+    # Streaming output speed after the first chunk.
+    tokens_per_second: float = 80.0
+    tokens_per_chunk: int = 8
+    # Filler text length for schema-less requests.
+    response_tokens: int = 120
+    # Per model, over a sliding minute; 0 disables.
+    rpm: int = 0
+    tpm: int = 0
+    error_rate_429: float = 0.0
+    error_rate_500: float = 0.0
+    seed: int = None
+    # Smallest cachedContent accepted, like the real API's minimum.
+    cache_min_tokens: int = 1024
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def _contents_text(contents):
+    return "\n".join(part.get('text', '') for content in contents or [] for part in content.get('parts') or [])
+
+
+def _prompt_text(body):
+    parts = []
+    for content in body.get('contents') or []:
+        for part in content.get('parts') or []:
+            if 'text' in part:
+                parts.append(part['text'])
+    system = body.get('systemInstruction') or body.get('system_instruction') or {}
+    for part in system.get('parts') or []:
+        parts.append(part.get('text', ''))
+    return "\n".join(parts)
+
+
+def _filler(rng, tokens):
+    # ~4 characters per token, like ai_utils.tokens.estimate_tokens
+    words = []
+    length = 0
+    while length < tokens * 4:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words).capitalize() + "."
+
+
+def fake_value(schema, rng, index=0):
+    """Placeholder data matching a Gemini ``Schema`` (camelCase JSON)."""
+    if not schema:
+        return None
+    if schema.get('anyOf'):
+        return fake_value(schema['anyOf'][0], rng, index)
+    kind = (schema.get('type') or 'STRING').upper()
+    if schema.get('enum'):
+        return rng.choice(schema['enum'])
+    if kind == 'OBJECT':
+        value = {name: fake_value(prop, rng, i) for i, (name, prop) in enumerate((schema.get('properties') or {}).items())}
+        # Multiple choice: the answer must be one of the options.
+        if isinstance(value.get('options'), list) and value['options'] and 'correct_answer' in value:
+            value['correct_answer'] = rng.choice(value['options'])
+        return value
+    if kind == 'ARRAY':
+        count = max(int(schema.get('minItems') or 0), 3)
+        if schema.get('maxItems') is not None:
+            count = min(count, int(schema['maxItems']))
+        return [fake_value(schema.get('items'), rng, i) for i in range(count)]
+    if kind == 'INTEGER':
+        return index
+    if kind == 'NUMBER':
+        low = schema.get('minimum', 0)
+        high = schema.get('maximum', 10)
+        return round(rng.uniform(low, high), 1)
+    if kind == 'BOOLEAN':
+        return rng.random() < 0.5
+    return _filler(rng, 8)
+
+
+class FakeGemini:
+    """Request handling state shared by the server's threads."""
+
+    def __init__(self, config):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self._rng_lock = threading.Lock()
+        self._usage_lock = threading.Lock()
+        # model -> deque of (timestamp, tokens)
+        self._usage = {}
+        # cachedContents name -> {'model', 'tokens', 'expires'}
+        self._caches = {}
+        self.stats = {'requests': 0, 'streams': 0, 'rate_limited': 0, 'injected_429': 0, 'injected_500': 0, 'cached_contents': 0}
+
+    def count(self, name):
+        with self._usage_lock:
+            self.stats[name] += 1
+
+    def latency_for(self, model):
+        distribution = self.config.model_latency.get(model, self.config.latency)
+        with self._rng_lock:
+            return distribution.sample(self.rng)
+
+    def take_capacity(self, model, tokens):
+        """Counts the request against ``model``'s minute window; False when over quota."""
+        if not self.config.rpm and not self.config.tpm:
+            return True
+        now = time.monotonic()
+        with self._usage_lock:
+            window = self._usage.setdefault(model, deque())
+            while window and now - window[0][0] >= 60:
+                window.popleft()
+            used_tokens = sum(t for _, t in window)
+            if (self.config.rpm and len(window) >= self.config.rpm) or (self.config.tpm and used_tokens + tokens > self.config.tpm):
+                return False
+            window.append((now, tokens))
+            return True
+
+    def injected_error(self):
+        with self._rng_lock:
+            roll = self.rng.random()
+        if roll < self.config.error_rate_429:
+            self.count('injected_429')
+            return 429
+        if roll < self.config.error_rate_429 + self.config.error_rate_500:
+            self.count('injected_500')
+            return 500
+        return None
+
+    def create_cache(self, body):
+        """The cachedContent resource, or None when it is below the size minimum."""
+        tokens = estimate_tokens(_contents_text(body.get('contents')))
+        if tokens < self.config.cache_min_tokens:
+            return None
+        ttl = float(str(body.get('ttl') or '3600s').rstrip('s'))
+        name = f"cachedContents/{uuid.uuid4().hex[:12]}"
+        with self._usage_lock:
+            self._caches[name] = {'model': body.get('model', ''), 'tokens': tokens, 'expires': time.time() + ttl}
+            self.stats['cached_contents'] += 1
+        expires = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(time.time() + ttl))
+        return {'name': name, 'model': body.get('model', ''), 'displayName': body.get('displayName', ''),
+                'usageMetadata': {'totalTokenCount': tokens}, 'expireTime': expires}
+
+    def delete_cache(self, name):
+        with self._usage_lock:
+            return self._caches.pop(name, None) is not None
+
+    def cached_tokens(self, name):
+        """Tokens of a live cachedContent, or None if it does not exist."""
+        with self._usage_lock:
+            cache = self._caches.get(name)
+            if cache is None or cache['expires'] <= time.time():
+                self._caches.pop(name, None)
+                return None
+            return cache['tokens']
+
+    def response_text(self, body):
+        generation = body.get('generationConfig') or {}
+        schema = generation.get('responseSchema') or generation.get('responseJsonSchema')
+        with self._rng_lock:
+            if schema:
+                return json.dumps(fake_value(schema, self.rng))
+            if generation.get('responseMimeType') == 'application/json':
+                return json.dumps({'text': _filler(self.rng, 20)})
+            return _filler(self.rng, self.config.response_tokens)
+
+
+def _payload(model, text, prompt_tokens, response_tokens, finished=True, cached_tokens=0):
+    candidate = {'content': {'parts': [{'text': text}], 'role': 'model'}, 'index': 0}
+    if finished:
+        candidate['finishReason'] = 'STOP'
+    usage = {
+        'promptTokenCount': prompt_tokens,
+        'candidatesTokenCount': response_tokens,
+        'totalTokenCount': prompt_tokens + response_tokens,
+    }
+    if cached_tokens:
+        usage['cachedContentTokenCount'] = cached_tokens
+    return {'candidates': [candidate], 'usageMetadata': usage, 'modelVersion': model}
+
+
+ERRORS = {
+    429: ('RESOURCE_EXHAUSTED', "Resource has been exhausted (e.g. check quota)."),
+    500: ('INTERNAL', "An internal error has occurred. Please retry or report in https://developers.generativeai.google/guide/troubleshooting"),
+}
+
+
+def _error(status, code, message):
+    return {'error': {'code': status, 'message': message, 'status': code}}
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FakeGemini/1.0'
+
+    @property
+    def fake(self):
+        return self.server.fake
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status):
+        code, message = ERRORS[status]
+        self._send_json(status, _error(status, code, message))
+
+    def do_DELETE(self):
+        route = CACHE_ROUTE.search(urlparse(self.path).path)
+        if route and self.fake.delete_cache(route.group('name')):
+            self._send_json(200, {})
+        else:
+            self._send_json(404, _error(404, 'NOT_FOUND', f"Unknown path {self.path}"))
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        route = ROUTE.search(path)
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        cache_route = CACHE_ROUTE.search(path)
+        if not route and not (cache_route and cache_route.group('name') == 'cachedContents'):
+            self._send_json(404, _error(404, 'NOT_FOUND', f"Unknown path {self.path}"))
+            return
+        try:
+            body = json.loads(raw or b'{}')
+        except ValueError:
+            self._send_json(400, _error(400, 'INVALID_ARGUMENT', "Invalid JSON payload"))
+            return
+
+        if not route:
+            cache = self.fake.create_cache(body)
+            if cache is None:
+                self._send_json(400, _error(400, 'INVALID_ARGUMENT', f"Cached content is too small. min_total_token_count={self.fake.config.cache_min_tokens}"))
+            else:
+                self._send_json(200, cache)
+            return
+
+        fake = self.fake
+        model = route.group('model')
+        stream = route.group('method') == 'streamGenerateContent'
+        fake.count('requests')
+        prompt_tokens = estimate_tokens(_prompt_text(body))
+        cached_tokens = 0
+        if body.get('cachedContent'):
+            cached_tokens = fake.cached_tokens(body['cachedContent'])
+            if cached_tokens is None:
+                self._send_json(404, _error(404, 'NOT_FOUND', f"CachedContent not found (or permission denied): {body['cachedContent']}"))
+                return
+            prompt_tokens += cached_tokens
+
+        # Time to first byte, errors included: a quota error still costs a round-trip.
+        time.sleep(fake.latency_for(model))
+
+        status = fake.injected_error()
+        if status is None and not fake.take_capacity(model, prompt_tokens):
+            fake.count('rate_limited')
+            status = 429
+        if status is not None:
+            self._send_error(status)
+            return
+
+        text = fake.response_text(body)
+        if stream:
+            fake.count('streams')
+            self._stream(model, text, prompt_tokens, cached_tokens)
+        else:
+            self._send_json(200, _payload(model, text, prompt_tokens, estimate_tokens(text), cached_tokens=cached_tokens))
+
+    def _stream(self, model, text, prompt_tokens, cached_tokens=0):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        config = self.fake.config
+        step = max(1, config.tokens_per_chunk) * 4
+        chunks = [text[i:i + step] for i in range(0, len(text), step)] or [""]
+        delay = config.tokens_per_chunk / config.tokens_per_second if config.tokens_per_second > 0 else 0
+        sent = 0
+        try:
+            for i, chunk in enumerate(chunks):
+                if i:
+                    time.sleep(delay)
+                sent += len(chunk)
+                last = i == len(chunks) - 1
+                event = _payload(model, chunk, prompt_tokens, estimate_tokens(text[:sent]), finished=last, cached_tokens=cached_tokens)
+                data = f"data: {json.dumps(event)}\r\n\r\n".encode('utf-8')
+                self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up mid-stream (timeout or cancelled request).
+            pass
+
+
+def make_server(config, host='127.0.0.1', port=8765, verbose=False):
+    server = ThreadingHTTPServer((host, port), FakeGeminiHandler)
+    server.daemon_threads = True
+    server.fake = FakeGemini(config)
+    server.verbose = verbose
+    return server
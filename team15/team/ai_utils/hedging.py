@@ -0,0 +1,292 @@
+"""
+Hedged requests for latency-critical calls.
+
+A function listed in ``AI_HEDGING`` starts its call as usual. If no answer
+has arrived after an adaptive delay (a percentile of that function's recent
+latencies, clamped to ``min_delay``..``max_delay``), a backup request is sent
+to ``backup_models`` (or the same routes), the first successful answer is
+used and the other request is cancelled. For streamed replies the race is
+on the first chunk.
+
+Example policy::
+
+    AI_HEDGING = {
+        'get_next_ai_question': {
+            'percentile': 0.9,          # hedge calls slower than p90
+            'min_delay': 0.5,
+            'max_delay': 5.0,
+            'initial_delay': 2.0,       # until min_samples latencies are known
+            'min_samples': 20,
+            'backup_models': ['gemini-1.5-flash'],
+            'measure_fraction': 0.05,
+        },
+    }
+
+Only async calls are hedged. Latencies and hedge outcomes are kept per
+worker process; ``stats()`` compares served latency with what the primary
+alone would have taken, to show the tail improvement. A primary that loses
+the race is cancelled, except for ``measure_fraction`` of non-streamed
+races where it is left to finish in the background so its true latency can
+be sampled.
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+DEFAULT_POLICY = {
+    'percentile': 0.9,
+    'min_delay': 0.25,
+    'max_delay': 5.0,
+    'initial_delay': 2.0,
+    'min_samples': 20,
+    'backup_models': [],
+    'measure_fraction': 0.05,
+}
+WINDOW = 200
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _weighted_percentile(samples, fraction):
+    """``samples`` is a list of (value, weight)."""
+    if not samples:
+        return None
+    samples = sorted(samples)
+    target = fraction * sum(weight for _, weight in samples)
+    seen = 0.0
+    for value, weight in samples:
+        seen += weight
+        if seen >= target:
+            return value
+    return samples[-1][0]
+
+
+def get_policy(function):
+    """The hedging policy for ``function``, or None when it is not hedged."""
+    policy = getattr(settings, 'AI_HEDGING', {}).get(function)
+    if policy is None:
+        return None
+    return {**DEFAULT_POLICY, **policy}
+
+
+class HedgeStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedged = 0
+        self.backup_wins = 0
+        # Latency of one request, used for the hedge delay.
+        self.request_latencies = deque(maxlen=WINDOW)
+        # What callers waited with hedging.
+        self.served = deque(maxlen=WINDOW)
+        # (latency, weight) of the primary request alone. Sampled losers
+        # stand in for the unsampled ones through their weight.
+        self.primary = deque(maxlen=WINDOW)
+
+    def delay(self, policy):
+        with self._lock:
+            latencies = sorted(self.request_latencies)
+        if len(latencies) < policy['min_samples']:
+            delay = policy['initial_delay']
+        else:
+            delay = _percentile(latencies, policy['percentile'])
+        return min(max(delay, policy['min_delay']), policy['max_delay'])
+
+    def record(self, served, request_latency, primary_latency=None, hedged=False, backup_won=False):
+        with self._lock:
+            self.calls += 1
+            self.hedged += hedged
+            self.backup_wins += backup_won
+            self.served.append(served)
+            self.request_latencies.append(request_latency)
+            if primary_latency is not None:
+                self.primary.append((primary_latency, 1.0))
+
+    def record_primary(self, latency, weight):
+        with self._lock:
+            self.primary.append((latency, weight))
+            self.request_latencies.append(latency)
+
+    def snapshot(self, policy=None):
+        with self._lock:
+            served = sorted(self.served)
+            primary = list(self.primary)
+            snapshot = {
+                'calls': self.calls,
+                'hedged': self.hedged,
+                'backup_wins': self.backup_wins,
+                'hedge_rate': round(self.hedged / self.calls, 4) if self.calls else 0.0,
+            }
+        for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99)):
+            snapshot[f'served_{name}'] = _percentile(served, fraction)
+            snapshot[f'primary_{name}'] = _weighted_percentile(primary, fraction)
+        if policy is not None:
+            snapshot['delay'] = self.delay(policy)
+        return snapshot
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _stats_for(function):
+    with _stats_lock:
+        return _stats.setdefault(function, HedgeStats())
+
+
+def stats():
+    """{function: hedge counters and served vs primary-only percentiles} for this process."""
+    with _stats_lock:
+        functions = dict(_stats)
+    return {function: s.snapshot(get_policy(function)) for function, s in functions.items()}
+
+
+# Losing primaries left running to sample their latency.
+_measuring = set()
+
+
+def _measure_loser(record, task, started, policy):
+    """Lets ``task`` finish in the background to sample its latency, or cancels it."""
+    fraction = policy['measure_fraction']
+    if fraction <= 0 or random.random() >= fraction:
+        task.cancel()
+        return False
+
+    def done(task):
+        _measuring.discard(task)
+        if not task.cancelled() and task.exception() is None:
+            record.record_primary(time.monotonic() - started, 1.0 / fraction)
+
+    _measuring.add(task)
+    task.add_done_callback(done)
+    return True
+
+
+async def _cancel(*tasks):
+    for task in tasks:
+        if task is not None and not task.done():
+            task.cancel()
+    for task in tasks:
+        if task is not None:
+            try:
+                await task
+            except BaseException:
+                pass
+
+
+async def agenerate(router, function, contents, config=None):
+    """Hedged ``router.agenerate``; the Completion is marked ``hedged`` if a backup was sent."""
+    policy = get_policy(function)
+    record = _stats_for(function)
+    started = time.monotonic()
+    primary = asyncio.ensure_future(router.agenerate(function, contents, config))
+    backup = None
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=record.delay(policy))
+        if done:
+            completion = primary.result()
+            elapsed = time.monotonic() - started
+            record.record(elapsed, elapsed, primary_latency=elapsed)
+            return completion
+
+        hedge_started = time.monotonic()
+        backup = asyncio.ensure_future(router.agenerate(function, contents, config, models=policy['backup_models'] or None))
+        pending = {primary, backup}
+        errors = []
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = next((task for task in done if task.exception() is None), None)
+            errors.extend(task.exception() for task in done if task.exception() is not None)
+            if winner is None:
+                continue
+            elapsed = time.monotonic() - started
+            backup_won = winner is backup
+            if backup_won and primary in pending:
+                if _measure_loser(record, primary, started, policy):
+                    pending.discard(primary)
+                    primary = None
+            await _cancel(*pending)
+            record.record(
+                elapsed,
+                time.monotonic() - hedge_started if backup_won else elapsed,
+                primary_latency=None if backup_won else elapsed,
+                hedged=True,
+                backup_won=backup_won,
+            )
+            completion = winner.result()
+            completion.hedged = True
+            return completion
+        raise errors[0]
+    finally:
+        await _cancel(primary, backup)
+
+
+async def astream(router, function, contents, config=None):
+    """
+    Hedged ``router.astream``: races the first chunk of a primary and, after
+    the hedge delay, a backup stream, then continues with the winner.
+    """
+    policy = get_policy(function)
+    record = _stats_for(function)
+    started = time.monotonic()
+    streams = {'primary': router.astream(function, contents, config)}
+    firsts = {'primary': asyncio.ensure_future(streams['primary'].__anext__())}
+    hedge_started = None
+    winner = None
+    try:
+        done, _ = await asyncio.wait({firsts['primary']}, timeout=record.delay(policy))
+        if not done:
+            hedge_started = time.monotonic()
+            streams['backup'] = router.astream(function, contents, config, models=policy['backup_models'] or None)
+            firsts['backup'] = asyncio.ensure_future(streams['backup'].__anext__())
+
+        errors = []
+        pending = set(firsts.values())
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for name, task in firsts.items():
+                if task in done:
+                    if task.exception() is None:
+                        winner = winner or name
+                    else:
+                        errors.append(task.exception())
+        if winner is None:
+            if isinstance(errors[0], StopAsyncIteration):
+                return
+            raise errors[0]
+
+        await _cancel(*(task for name, task in firsts.items() if name != winner))
+        for name, stream in streams.items():
+            if name != winner:
+                await stream.aclose()
+
+        elapsed = time.monotonic() - started
+        hedged = hedge_started is not None
+        backup_won = winner == 'backup'
+        record.record(
+            elapsed,
+            time.monotonic() - hedge_started if backup_won else elapsed,
+            primary_latency=None if backup_won else elapsed,
+            hedged=hedged,
+            backup_won=backup_won,
+        )
+
+        first = firsts[winner].result()
+        first.hedged = hedged
+        yield first
+        async for chunk in streams[winner]:
+            chunk.hedged = hedged
+            yield chunk
+    finally:
+        await _cancel(*firsts.values())
+        for stream in streams.values():
+            await stream.aclose()
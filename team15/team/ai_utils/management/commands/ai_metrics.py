@@ -0,0 +1,62 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ai_utils.metrics import latency_report
+from ai_utils.models import LLMCall
+
+UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_duration(value):
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([smhd])', value.strip())
+    if not match:
+        raise CommandError(f"Invalid duration '{value}', expected e.g. 30m, 24h or 7d")
+    return float(match.group(1)) * UNITS[match.group(2)]
+
+
+def _seconds(value):
+    return "-" if value is None else f"{value:.2f}"
+
+
+class Command(BaseCommand):
+    help = "Prints LLM call latency percentiles (p50/p95/p99) per flow, function or model."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--by', choices=('flow', 'function', 'model'), default='function', help="How to group calls.")
+        parser.add_argument('--since', default='24h', help="Only calls newer than this, e.g. 30m, 24h, 7d (default 24h).")
+        parser.add_argument('--all', action='store_true', help="Include every recorded call.")
+        parser.add_argument('--prune', metavar='AGE', help="Delete calls older than AGE (e.g. 30d) instead of reporting.")
+
+    def handle(self, *args, **options):
+        if options['prune']:
+            cutoff = timezone.now() - timedelta(seconds=parse_duration(options['prune']))
+            deleted, _ = LLMCall.objects.filter(created_at__lt=cutoff).delete()
+            self.stdout.write(f"Deleted {deleted} LLM call record(s)")
+            return
+
+        since = None if options['all'] else parse_duration(options['since'])
+        group_by = options['by']
+        report = latency_report(since=since, group_by=group_by)
+        if not report:
+            self.stdout.write("No LLM calls recorded" + ("" if since is None else f" in the last {options['since']}"))
+            return
+
+        columns = (
+            (group_by, 28), ('calls', 7), ('errors', 7), ('cached', 7), ('shared', 7), ('mock', 6), ('retries', 8), ('hedged', 7),
+            ('p50', 7), ('p95', 7), ('p99', 7), ('ttft50', 7), ('ttft95', 7), ('total s', 9), ('tok in', 9), ('tok cached', 10), ('tok out', 9),
+        )
+        self.stdout.write("  ".join(name.ljust(width) if i == 0 else name.rjust(width) for i, (name, width) in enumerate(columns)))
+        for row in sorted(report, key=lambda r: r['total_seconds'], reverse=True):
+            values = (
+                row[group_by], row['calls'], row['error'], row['cache_hit'], row['shared'], row['fallback'], row['retries'], row['hedged'],
+                _seconds(row['p50']), _seconds(row['p95']), _seconds(row['p99']),
+                _seconds(row['ttft_p50']), _seconds(row['ttft_p95']),
+                f"{row['total_seconds']:.1f}", row['prompt_tokens'], row['cached_tokens'], row['response_tokens'],
+            )
+            self.stdout.write("  ".join(
+                str(value)[:width].ljust(width) if i == 0 else str(value).rjust(width)
+                for i, (value, (_, width)) in enumerate(zip(values, columns))
+            ))
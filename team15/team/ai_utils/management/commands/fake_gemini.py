@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ai_utils.fake_gemini import FakeGeminiConfig, LatencyDistribution, make_server
+
+
+def _latency(spec):
+    try:
+        return LatencyDistribution(spec)
+    except ValueError as e:
+        raise CommandError(str(e))
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs a local stand-in for the Gemini API for load tests. Start the site with "
+        "GEMINI_API_KEY=fake GEMINI_BASE_URL=http://HOST:PORT to send ai_utils calls to it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', default='lognormal:0.8,0.4',
+                            help="Time to first byte: fixed:S, uniform:LOW,HIGH, normal:MEAN,STDDEV or lognormal:MEDIAN,SIGMA (seconds).")
+        parser.add_argument('--model-latency', action='append', default=[], metavar='MODEL=SPEC',
+                            help="Per-model latency override, e.g. gemini-1.5-flash=fixed:2. Repeatable.")
+        parser.add_argument('--tokens-per-second', type=float, default=80.0, help="Streaming output speed.")
+        parser.add_argument('--tokens-per-chunk', type=int, default=8, help="Tokens per streamed chunk.")
+        parser.add_argument('--response-tokens', type=int, default=120, help="Length of plain-text replies.")
+        parser.add_argument('--rpm', type=int, default=0, help="Requests per minute per model before 429s (0: unlimited).")
+        parser.add_argument('--tpm', type=int, default=0, help="Prompt tokens per minute per model before 429s (0: unlimited).")
+        parser.add_argument('--error-rate-429', type=float, default=0.0, help="Share of requests answered with 429.")
+        parser.add_argument('--error-rate-500', type=float, default=0.0, help="Share of requests answered with 500.")
+        parser.add_argument('--cache-min-tokens', type=int, default=1024, help="Smallest cachedContent accepted.")
+        parser.add_argument('--seed', type=int, default=None, help="Seed for latencies, errors and reply text.")
+        parser.add_argument('--verbose', action='store_true', help="Log every request.")
+
+    def handle(self, *args, **options):
+        model_latency = {}
+        for override in options['model_latency']:
+            model, sep, spec = override.partition('=')
+            if not sep:
+                raise CommandError(f"Invalid --model-latency '{override}', expected MODEL=SPEC")
+            model_latency[model.strip()] = _latency(spec.strip())
+
+        config = FakeGeminiConfig(
+            latency=_latency(options['latency']),
+            model_latency=model_latency,
+            tokens_per_second=options['tokens_per_second'],
+            tokens_per_chunk=options['tokens_per_chunk'],
+            response_tokens=options['response_tokens'],
+            rpm=options['rpm'],
+            tpm=options['tpm'],
+            error_rate_429=options['error_rate_429'],
+            error_rate_500=options['error_rate_500'],
+            seed=options['seed'],
+            cache_min_tokens=options['cache_min_tokens'],
+        )
+        server = make_server(config, options['host'], options['port'], verbose=options['verbose'])
+        self.stdout.write(f"Fake Gemini API listening on http://{options['host']}:{options['port']} (latency {config.latency.spec})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Stopped. {server.fake.stats}")
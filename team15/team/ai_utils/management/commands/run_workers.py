@@ -0,0 +1,58 @@
+import os
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from ai_utils.background import Worker, queue_limits
+
+
+class Command(BaseCommand):
+    help = "Runs background job workers for queued LLM work (set AI_JOBS_MODE='worker')."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help="Jobs run concurrently per process.")
+        parser.add_argument('--processes', type=int, default=1, help="Worker processes to fork.")
+        parser.add_argument('--queues', default='', help="Comma separated queues in priority order (default: all configured).")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to wait when no job is due.")
+        parser.add_argument('--burst', action='store_true', help="Exit once no job is due.")
+
+    def handle(self, *args, **options):
+        queues = [q.strip() for q in options['queues'].split(',') if q.strip()] or list(queue_limits())
+        processes = max(1, options['processes'])
+        self.stdout.write(f"Starting {processes} worker process(es) x {options['threads']} thread(s) on queues: {', '.join(queues)}")
+
+        if processes == 1:
+            self._run(queues, options)
+            return
+
+        # Children must not share the parent's database connections.
+        connections.close_all()
+        children = []
+        for _ in range(processes):
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    self._run(queues, options)
+                finally:
+                    os._exit(0)
+            children.append(pid)
+
+        def forward(signum, frame):
+            for child in children:
+                try:
+                    os.kill(child, signum)
+                except ProcessLookupError:
+                    pass
+
+        signal.signal(signal.SIGTERM, forward)
+        signal.signal(signal.SIGINT, forward)
+        for child in children:
+            os.waitpid(child, 0)
+
+    def _run(self, queues, options):
+        worker = Worker(queues, threads=options['threads'], poll_interval=options['poll_interval'])
+        signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+        signal.signal(signal.SIGINT, lambda signum, frame: worker.stop())
+        worker.run(burst=options['burst'])
+        self.stdout.write(f"Worker {worker.worker_id} stopped")
@@ -0,0 +1,422 @@
+"""
+Telemetry for ai_utils LLM calls.
+
+Every call made through ai_utils.utils is recorded as an ``LLMCall`` row
+labelled by function and model: wall time (including rate limit waits and
+failovers), time to first token for streamed replies, prompt and response
+tokens, retries across models, cache hits and fallbacks to mock data. Rows
+are queued in memory and written in batches by a background thread, so
+recording never puts a database round-trip on the call path.
+
+The same thread adds each batch to ``LLMCallTotal``, running totals per
+label set, and deletes rows older than ``AI_METRICS_RETENTION_DAYS``. The
+data is read two ways:
+
+* ``render_prometheus()``, served at ``/metrics``: histograms and counters
+  from ``LLMCallTotal``, which stay cumulative however many rows are
+  pruned, plus this process's cache, router and schema validation counters.
+* ``latency_report()``, printed by ``manage.py ai_metrics``: p50/p95/p99
+  per flow, function or model, from the rows still retained.
+"""
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+# User-facing flow each ai_utils function belongs to.
+FLOWS = {
+    'parse_resume': 'screening',
+    'analyze_match': 'screening',
+    'generate_quiz_questions': 'quiz',
+    'generate_interview_questions': 'interview',
+    'evaluate_answer': 'interview',
+    'evaluate_answers_batch': 'interview',
+    'get_next_ai_question': 'interview',
+    'summarize_transcript': 'interview',
+    'generate_detailed_feedback': 'interview',
+}
+
+# Upper bounds in seconds for the latency histograms.
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60)
+
+# Latency fields kept as histograms in LLMCallTotal.
+HISTOGRAMS = ('duration', 'time_to_first_token')
+
+# Seconds between deletions of rows older than AI_METRICS_RETENTION_DAYS.
+PRUNE_INTERVAL = 3600
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def flow_for(function):
+    return FLOWS.get(function, 'other')
+
+
+def is_enabled():
+    return _setting('AI_METRICS_ENABLED', True)
+
+
+class _Writer:
+    """Background thread that bulk-inserts queued LLMCall rows."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.queue = queue.Queue(maxsize=_setting('AI_METRICS_QUEUE_SIZE', 10000))
+        self.pruned_at = 0
+        self.thread = threading.Thread(target=self._run, name='ai-metrics-writer', daemon=True)
+        self.thread.start()
+
+    def put(self, row):
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            # Telemetry must never slow down or break the call it measures.
+            pass
+
+    def _run(self):
+        batch_size = _setting('AI_METRICS_BATCH_SIZE', 50)
+        interval = _setting('AI_METRICS_FLUSH_INTERVAL', 2.0)
+        while True:
+            rows = [self.queue.get()]
+            deadline = time.monotonic() + interval
+            while len(rows) < batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    rows.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(rows)
+
+    def _write(self, rows):
+        from .models import LLMCall
+        try:
+            with transaction.atomic():
+                LLMCall.objects.bulk_create(rows)
+                add_totals(rollup(rows))
+            if time.monotonic() - self.pruned_at >= PRUNE_INTERVAL:
+                self.pruned_at = time.monotonic()
+                prune()
+        except Exception as e:
+            print(f"AI Metrics Error (write): {e}")
+        finally:
+            close_old_connections()
+            for _ in rows:
+                self.queue.task_done()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer():
+    global _writer
+    # A forked worker process needs its own thread.
+    if _writer is None or _writer.pid != os.getpid():
+        with _writer_lock:
+            if _writer is None or _writer.pid != os.getpid():
+                _writer = _Writer()
+    return _writer
+
+
+def flush():
+    """Blocks until every queued row has been written."""
+    if _writer is not None and _writer.pid == os.getpid():
+        _writer.queue.join()
+
+
+def _bucket(seconds):
+    for bound in BUCKETS:
+        if seconds <= bound:
+            return str(bound)
+    return '+Inf'
+
+
+def rollup(calls):
+    """{(function, model, outcome, name): increment} adding ``calls`` to LLMCallTotal."""
+    totals = defaultdict(float)
+    for call in calls:
+        labels = (call.function, call.model or '', call.outcome)
+        totals[labels + ('calls',)] += 1
+        totals[labels + ('retries',)] += call.retries
+        totals[labels + ('hedged',)] += call.hedged
+        for field in ('prompt_tokens', 'response_tokens', 'cached_tokens'):
+            totals[labels + (field,)] += getattr(call, field) or 0
+        for field in HISTOGRAMS:
+            seconds = getattr(call, field)
+            if seconds is not None:
+                totals[labels + (f'{field}_sum',)] += seconds
+                totals[labels + (f'{field}_bucket:{_bucket(seconds)}',)] += 1
+    return {key: value for key, value in totals.items() if value}
+
+
+def add_totals(totals):
+    """Adds a ``rollup`` to LLMCallTotal; increments are atomic, so several processes may write."""
+    from .models import LLMCallTotal
+    for (function, model, outcome, name), value in totals.items():
+        row = LLMCallTotal.objects.filter(function=function, model=model, outcome=outcome, name=name)
+        if row.update(value=F('value') + value):
+            continue
+        try:
+            with transaction.atomic():
+                LLMCallTotal.objects.create(function=function, model=model, outcome=outcome, name=name, value=value)
+        except IntegrityError:
+            # Another process created it first.
+            row.update(value=F('value') + value)
+
+
+def retention_days():
+    return _setting('AI_METRICS_RETENTION_DAYS', 30)
+
+
+def prune(days=None):
+    """Deletes LLMCall rows older than ``days`` (AI_METRICS_RETENTION_DAYS); returns how many."""
+    from .models import LLMCall
+    days = retention_days() if days is None else days
+    if not days:
+        return 0
+    deleted, _ = LLMCall.objects.filter(created_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
+
+
+def record(function, outcome='ok', model='', duration=None, time_to_first_token=None,
+           prompt_tokens=None, response_tokens=None, cached_tokens=None, retries=0, hedged=False):
+    if not is_enabled():
+        return
+    from .models import LLMCall
+    _get_writer().put(LLMCall(
+        function=function,
+        model=model or '',
+        outcome=outcome,
+        duration=duration,
+        time_to_first_token=time_to_first_token,
+        prompt_tokens=prompt_tokens,
+        response_tokens=response_tokens,
+        cached_tokens=cached_tokens,
+        retries=retries,
+        hedged=hedged,
+        created_at=timezone.now(),
+    ))
+
+
+def record_completion(function, completion, duration, time_to_first_token=None):
+    record(
+        function,
+        model=completion.model,
+        duration=duration,
+        time_to_first_token=time_to_first_token,
+        prompt_tokens=completion.prompt_tokens,
+        response_tokens=completion.response_tokens,
+        cached_tokens=completion.cached_tokens,
+        retries=max(0, completion.attempts - 1),
+        hedged=completion.hedged,
+    )
+
+
+def record_fallback(function):
+    """The caller is returning mock data because the LLM call failed."""
+    record(function, outcome='fallback')
+
+
+# --- Reports ---
+
+def percentile(sorted_values, fraction):
+    """Linear interpolation between closest ranks, as numpy's default."""
+    if not sorted_values:
+        return None
+    position = fraction * (len(sorted_values) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def latency_report(since=None, group_by='function'):
+    """
+    One dict per flow, function or model: call counts by outcome, retries,
+    tokens and p50/p95/p99 of wall time and time to first token for calls
+    that reached a model.
+    """
+    from .models import LLMCall
+    calls = LLMCall.objects.all()
+    if since is not None:
+        calls = calls.filter(created_at__gte=timezone.now() - timedelta(seconds=since))
+
+    groups = {}
+    fields = ('function', 'model', 'outcome', 'duration', 'time_to_first_token', 'prompt_tokens', 'response_tokens', 'cached_tokens', 'retries', 'hedged')
+    for function, model, outcome, duration, ttft, prompt_tokens, response_tokens, cached_tokens, retries, hedged in calls.values_list(*fields).iterator():
+        key = {'flow': flow_for(function), 'function': function, 'model': model or '-'}[group_by]
+        group = groups.setdefault(key, {
+            'calls': 0, 'ok': 0, 'error': 0, 'cache_hit': 0, 'shared': 0, 'fallback': 0,
+            'retries': 0, 'hedged': 0, 'prompt_tokens': 0, 'response_tokens': 0, 'cached_tokens': 0, 'durations': [], 'ttfts': [],
+        })
+        group['calls'] += 1
+        group[outcome] = group.get(outcome, 0) + 1
+        group['retries'] += retries
+        group['hedged'] += hedged
+        group['prompt_tokens'] += prompt_tokens or 0
+        group['response_tokens'] += response_tokens or 0
+        group['cached_tokens'] += cached_tokens or 0
+        if outcome == 'ok' and duration is not None:
+            group['durations'].append(duration)
+        if ttft is not None:
+            group['ttfts'].append(ttft)
+
+    report = []
+    for key, group in sorted(groups.items()):
+        durations = sorted(group.pop('durations'))
+        ttfts = sorted(group.pop('ttfts'))
+        report.append({
+            group_by: key,
+            **group,
+            'total_seconds': sum(durations),
+            'p50': percentile(durations, 0.50),
+            'p95': percentile(durations, 0.95),
+            'p99': percentile(durations, 0.99),
+            'ttft_p50': percentile(ttfts, 0.50),
+            'ttft_p95': percentile(ttfts, 0.95),
+        })
+    return report
+
+
+# --- Prometheus exposition ---
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _value(value):
+    return int(value) if float(value).is_integer() else value
+
+
+def _sum_by(totals, label_fields, prefix):
+    """Totals whose name starts with ``prefix``, summed per ``label_fields``: {labels: {name: value}}."""
+    series = defaultdict(lambda: defaultdict(float))
+    for (function, model, outcome), values in totals.items():
+        labels = {'function': function, 'model': model, 'outcome': outcome}
+        key = tuple(labels[name] for name in label_fields)
+        for name, value in values.items():
+            if name.startswith(prefix):
+                series[key][name] += value
+    return series
+
+
+def _histogram(lines, name, help_text, totals, field, label_fields):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, values in sorted(_sum_by(totals, label_fields, field + '_').items()):
+        labels = dict(zip(label_fields, key))
+        if 'function' in labels:
+            labels['flow'] = flow_for(labels['function'])
+        count = 0
+        for bound in BUCKETS:
+            count += values.get(f'{field}_bucket:{bound}', 0)
+            lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {_value(count)}")
+        count += values.get(f'{field}_bucket:+Inf', 0)
+        lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {_value(count)}")
+        lines.append(f"{name}_sum{_labels(**labels)} {values.get(f'{field}_sum', 0)}")
+        lines.append(f"{name}_count{_labels(**labels)} {_value(count)}")
+
+
+def _counter(lines, name, help_text, samples, kind='counter'):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in samples:
+        if value is not None:
+            lines.append(f"{name}{_labels(**labels)} {value}")
+
+
+def _load_totals():
+    """{(function, model, outcome): {name: value}} from LLMCallTotal."""
+    from .models import LLMCallTotal
+    totals = defaultdict(dict)
+    for function, model, outcome, name, value in LLMCallTotal.objects.values_list('function', 'model', 'outcome', 'name', 'value'):
+        totals[(function, model, outcome)][name] = value
+    return totals
+
+
+def render_prometheus():
+    """Metrics in the Prometheus text exposition format (version 0.0.4)."""
+    from .cache import get_cache
+    from .hedging import stats as hedge_stats
+    from .router import get_router
+    from .schemas import validation_stats
+
+    totals = _load_totals()
+    lines = []
+
+    _histogram(lines, 'ai_llm_call_duration_seconds',
+               "Wall time of LLM calls, including rate limit waits and failovers.",
+               totals, 'duration', ('function', 'model', 'outcome'))
+    _histogram(lines, 'ai_llm_time_to_first_token_seconds',
+               "Time until the first streamed chunk.",
+               totals, 'time_to_first_token', ('function', 'model'))
+
+    _counter(lines, 'ai_llm_calls_total', "LLM calls by outcome (ok, error, cache_hit, shared, fallback).", [
+        ({'function': function, 'flow': flow_for(function), 'model': model, 'outcome': outcome}, _value(values['calls']))
+        for (function, model, outcome), values in sorted(totals.items()) if values.get('calls')
+    ])
+    by_model = sorted(_sum_by(totals, ('function', 'model'), '').items())
+    _counter(lines, 'ai_llm_retries_total', "Models tried beyond the first for a call.", [
+        ({'function': function, 'model': model}, _value(values['retries']))
+        for (function, model), values in by_model if values.get('retries')
+    ])
+    _counter(lines, 'ai_llm_hedged_total', "Calls that sent a backup request (see ai_utils.hedging).", [
+        ({'function': function, 'model': model}, _value(values['hedged']))
+        for (function, model), values in by_model if values.get('hedged')
+    ])
+    _counter(lines, 'ai_llm_tokens_total', "Tokens reported by the model; cached tokens are part of the prompt.", [
+        ({'function': function, 'model': model, 'type': kind}, _value(values[f'{kind}_tokens']))
+        for (function, model), values in by_model for kind in ('prompt', 'response', 'cached') if values.get(f'{kind}_tokens')
+    ])
+
+    # The rest is kept in memory by the process serving this request.
+    cache_stats = get_cache().stats()
+    _counter(lines, 'ai_llm_cache_lookups_total', "LLM cache lookups in this process.", [
+        ({'function': function, 'result': result}, counts[key])
+        for function, counts in sorted(cache_stats['by_function'].items())
+        for result, key in (('hit', 'hits'), ('miss', 'misses'))
+    ])
+    _counter(lines, 'ai_llm_cache_entries', "Entries in this process's LLM cache.", [({}, cache_stats['entries'])], 'gauge')
+    _counter(lines, 'ai_llm_cache_evictions_total', "LLM cache evictions in this process.", [({}, cache_stats['evictions'])])
+
+    route_stats = get_router().stats()
+    _counter(lines, 'ai_llm_route_error_rate', "Recent error rate per model in this process.", [
+        ({'model': f"{s['provider']}:{s['model']}"}, s['error_rate']) for s in route_stats
+    ], 'gauge')
+    _counter(lines, 'ai_llm_circuit_open', "1 while a model's circuit breaker is not closed.", [
+        ({'model': f"{s['provider']}:{s['model']}", 'state': s['state']}, int(s['state'] != 'closed')) for s in route_stats
+    ], 'gauge')
+
+    _counter(lines, 'ai_llm_validation_total', "Structured response validation outcomes in this process.", [
+        ({'function': function, 'outcome': outcome}, count)
+        for function, outcomes in sorted(validation_stats().items()) for outcome, count in sorted(outcomes.items())
+    ])
+
+    hedging = sorted(hedge_stats().items())
+    _counter(lines, 'ai_llm_hedge_rate', "Share of recent hedged-function calls that sent a backup, in this process.", [
+        ({'function': function}, s['hedge_rate']) for function, s in hedging
+    ], 'gauge')
+    _counter(lines, 'ai_llm_hedge_backup_wins_total', "Hedged calls answered by the backup request, in this process.", [
+        ({'function': function}, s['backup_wins']) for function, s in hedging
+    ])
+    _counter(lines, 'ai_llm_hedge_delay_seconds', "Current hedge delay, in this process.", [
+        ({'function': function}, s.get('delay')) for function, s in hedging
+    ], 'gauge')
+    _counter(lines, 'ai_llm_hedge_latency_seconds',
+             "Recent latency percentiles as served and for the primary request alone, in this process.", [
+        ({'function': function, 'latency': latency, 'quantile': q}, s[f'{latency}_p{q}'])
+        for function, s in hedging for latency in ('served', 'primary') for q in ('50', '95', '99')
+    ], 'gauge')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.28 on 2026-10-17 00:47
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_utils', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMCall',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('function', models.CharField(max_length=100)),
+                ('model', models.CharField(blank=True, max_length=150)),
+                ('outcome', models.CharField(choices=[('ok', 'OK'), ('error', 'Error'), ('cache_hit', 'Cache hit'), ('fallback', 'Fallback to mock data')], default='ok', max_length=20)),
+                ('duration', models.FloatField(blank=True, null=True)),
+                ('time_to_first_token', models.FloatField(blank=True, null=True)),
+                ('prompt_tokens', models.IntegerField(blank=True, null=True)),
+                ('response_tokens', models.IntegerField(blank=True, null=True)),
+                ('retries', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['function', 'created_at'], name='ai_utils_ll_functio_190aca_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.28 on 2026-10-17 00:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_utils', '0002_llmcall'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='llmcall',
+            name='hedged',
+            field=models.BooleanField(default=False),
+        ),
+    ]
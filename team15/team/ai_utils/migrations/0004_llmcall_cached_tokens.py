@@ -0,0 +1,18 @@
+# Generated by Django 4.2.28 on 2026-10-17 00:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_utils', '0003_llmcall_hedged'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='llmcall',
+            name='cached_tokens',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
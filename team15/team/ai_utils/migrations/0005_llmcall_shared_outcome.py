@@ -0,0 +1,18 @@
+# Generated by Django 4.2.28 on 2026-10-17 01:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_utils', '0004_llmcall_cached_tokens'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='llmcall',
+            name='outcome',
+            field=models.CharField(choices=[('ok', 'OK'), ('error', 'Error'), ('cache_hit', 'Cache hit'), ('shared', 'Shared an identical in-flight call'), ('fallback', 'Fallback to mock data')], default='ok', max_length=20),
+        ),
+    ]
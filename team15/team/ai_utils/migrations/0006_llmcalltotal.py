@@ -0,0 +1,40 @@
+# Generated by Django 4.2.28 on 2026-10-17 01:27
+
+from django.db import migrations, models
+
+from ai_utils.metrics import rollup
+
+
+def add_existing_calls(apps, schema_editor):
+    LLMCall = apps.get_model('ai_utils', 'LLMCall')
+    LLMCallTotal = apps.get_model('ai_utils', 'LLMCallTotal')
+    LLMCallTotal.objects.bulk_create(
+        LLMCallTotal(function=function, model=model, outcome=outcome, name=name, value=value)
+        for (function, model, outcome, name), value in rollup(LLMCall.objects.iterator()).items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_utils', '0005_llmcall_shared_outcome'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMCallTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('function', models.CharField(max_length=100)),
+                ('model', models.CharField(blank=True, max_length=150)),
+                ('outcome', models.CharField(max_length=20)),
+                ('name', models.CharField(max_length=60)),
+                ('value', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='llmcalltotal',
+            constraint=models.UniqueConstraint(fields=('function', 'model', 'outcome', 'name'), name='unique_llm_call_total'),
+        ),
+        migrations.RunPython(add_existing_calls, migrations.RunPython.noop),
+    ]
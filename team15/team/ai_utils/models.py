@@ -1,3 +1,106 @@
 from django.db import models
+from django.conf import settings
+from django.utils import timezone
 
-# Create your models here.
+class BackgroundJob(models.Model):
+    """
+    A unit of LLM work processed outside the request cycle (see ai_utils/background.py).
+    """
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    )
+    name = models.CharField(max_length=100)
+    queue = models.CharField(max_length=50, default='default')
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, null=True)
+
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    # A running job whose lock expired is visible to other workers again.
+    locked_until = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True, null=True)
+    # Active jobs sharing a dedupe key are collapsed into one.
+    dedupe_key = models.CharField(max_length=255, blank=True, null=True, db_index=True)
+
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='background_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['queue', 'status', 'run_after']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
+
+
+class LLMCall(models.Model):
+    """
+    One ai_utils LLM call, cache hit or fallback to mock data (see ai_utils/metrics.py).
+    """
+    OUTCOME_CHOICES = (
+        ('ok', 'OK'),
+        ('error', 'Error'),
+        ('cache_hit', 'Cache hit'),
+        ('shared', 'Shared an identical in-flight call'),
+        ('fallback', 'Fallback to mock data'),
+    )
+    function = models.CharField(max_length=100)
+    # "provider:model" that served the call, blank for cache hits and errors.
+    model = models.CharField(max_length=150, blank=True)
+    outcome = models.CharField(max_length=20, choices=OUTCOME_CHOICES, default='ok')
+    # Seconds, including rate limit waits and failovers.
+    duration = models.FloatField(null=True, blank=True)
+    time_to_first_token = models.FloatField(null=True, blank=True)
+    prompt_tokens = models.IntegerField(null=True, blank=True)
+    response_tokens = models.IntegerField(null=True, blank=True)
+    # Prompt tokens served from a context cache (see ai_utils/prompt_cache.py).
+    cached_tokens = models.IntegerField(null=True, blank=True)
+    # Routes tried beyond the first.
+    retries = models.IntegerField(default=0)
+    # A backup request was sent (see ai_utils/hedging.py).
+    hedged = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['function', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.function} via {self.model or '-'} ({self.outcome})"
+
+
+class LLMCallTotal(models.Model):
+    """
+    A running total over every LLMCall with these labels, kept by the metrics
+    writer so /metrics never scans the LLMCall table. ``name`` is a counter
+    (``calls``, ``retries``, ``prompt_tokens``, ...), a histogram sum
+    (``duration_sum``) or a histogram bucket count (``duration_bucket:0.5``,
+    calls above the previous bound and at most 0.5 seconds).
+    """
+    function = models.CharField(max_length=100)
+    model = models.CharField(max_length=150, blank=True)
+    outcome = models.CharField(max_length=20)
+    name = models.CharField(max_length=60)
+    value = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['function', 'model', 'outcome', 'name'], name='unique_llm_call_total'),
+        ]
+
+    def __str__(self):
+        return f"{self.name}{{{self.function}, {self.model or '-'}, {self.outcome}}} = {self.value}"
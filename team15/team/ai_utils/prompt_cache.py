@@ -0,0 +1,218 @@
+"""
+Gemini context caching for the stable start of a prompt.
+
+Prompts about a candidate (match analysis, quiz and interview questions)
+are built as a ``PrefixedPrompt``: a stable prefix with the shared
+instructions and the resume, followed by a short task-specific suffix. The
+value of a ``PrefixedPrompt`` is the whole prompt, so the LLM cache,
+cassettes, rate limiter and non-Gemini providers treat it like any other
+string.
+
+The Gemini provider uploads the prefix once per model with the explicit
+context caching API (``client.caches``) and sends only the suffix, pointing
+``cached_content`` at the upload. Uploads are keyed by resume id; when a
+resume's text changes, the next call deletes the old upload and creates a
+new one. Uploads expire after ``AI_PROMPT_CACHE_TTL`` seconds. Prefixes
+shorter than ``AI_PROMPT_CACHE_MIN_TOKENS`` are sent inline, since the API
+rejects small caches; the prefix-first layout still lets Gemini's implicit
+caching reuse them.
+
+Upload names are kept in the ``AI_CACHE_BACKEND`` cache when one is set, so
+worker processes share them, and in this process otherwise.
+"""
+import hashlib
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from google.genai import errors, types
+
+from .tokens import estimate_tokens
+
+KEY_PREFIX = 'ai_utils:prompt_cache:'
+
+
+class PrefixedPrompt(str):
+    """
+    A prompt whose ``prefix`` may be served from a context cache. ``key``
+    names the prefix (e.g. ``resume:42``) so it can be replaced when its
+    text changes.
+    """
+
+    def __new__(cls, prefix, suffix, key):
+        prompt = super().__new__(cls, prefix + suffix)
+        prompt.prefix = prefix
+        prompt.suffix = suffix
+        prompt.key = key
+        prompt.fingerprint = hashlib.sha256(prefix.encode('utf-8')).hexdigest()
+        return prompt
+
+
+def is_enabled():
+    return getattr(settings, 'AI_PROMPT_CACHE_ENABLED', True)
+
+
+def _ttl():
+    return getattr(settings, 'AI_PROMPT_CACHE_TTL', 600)
+
+
+def _is_cacheable(contents):
+    return (
+        is_enabled()
+        and isinstance(contents, PrefixedPrompt)
+        and estimate_tokens(contents.prefix) >= getattr(settings, 'AI_PROMPT_CACHE_MIN_TOKENS', 1024)
+    )
+
+
+class _LocalRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.time():
+                del self._entries[key]
+                return None
+            return entry[0] if entry else None
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (value, time.time() + timeout)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+_local_registry = _LocalRegistry()
+
+
+def _registry_alias():
+    return getattr(settings, 'AI_CACHE_BACKEND', None)
+
+
+def _registry():
+    alias = _registry_alias()
+    return caches[alias] if alias else _local_registry
+
+
+async def _off_loop(func, *args):
+    # Shared registries (db, redis, ...) do blocking I/O; keep it off the loop.
+    if _registry_alias():
+        return await sync_to_async(func)(*args)
+    return func(*args)
+
+
+def _registry_key(model, contents):
+    return f"{KEY_PREFIX}{model}:{contents.key}"
+
+
+def _upload_config(contents):
+    return types.CreateCachedContentConfig(
+        contents=[contents.prefix],
+        ttl=f"{_ttl()}s",
+        display_name=f"{contents.key}"[:128],
+    )
+
+
+def _with_cache(contents, config, name):
+    if config is None:
+        config = types.GenerateContentConfig(cached_content=name)
+    else:
+        config = config.model_copy(update={'cached_content': name})
+    return contents.suffix, config
+
+
+def _lookup(model, contents):
+    """(entry, stale entry) for the prefix's upload."""
+    entry = _registry().get(_registry_key(model, contents))
+    if entry is None:
+        return None, None
+    if entry['fingerprint'] != contents.fingerprint:
+        return None, entry
+    return entry, None
+
+
+def _remember(model, contents, name):
+    # Forget the name a little before the upload expires.
+    timeout = max(1, _ttl() - 30)
+    _registry().set(_registry_key(model, contents), {'name': name, 'fingerprint': contents.fingerprint}, timeout)
+
+
+def _remember_failure(model, contents):
+    # The prefix cannot be cached (e.g. too small for this model); don't retry for a while.
+    _registry().set(_registry_key(model, contents), {'name': None, 'fingerprint': contents.fingerprint}, _ttl())
+
+
+def prepare(client, model, contents, config=None):
+    """
+    (contents, config) to send: the suffix and a config pointing at the
+    cached prefix when ``contents`` is a cacheable PrefixedPrompt, else
+    both unchanged.
+    """
+    if not _is_cacheable(contents):
+        return contents, config
+    entry, stale = _lookup(model, contents)
+    if entry is not None:
+        return _with_cache(contents, config, entry['name']) if entry['name'] else (contents, config)
+    if stale is not None and stale['name']:
+        _delete(client, stale['name'])
+    try:
+        upload = client.caches.create(model=model, config=_upload_config(contents))
+    except errors.APIError as e:
+        print(f"AI Prompt Cache Error (create): {e}")
+        _remember_failure(model, contents)
+        return contents, config
+    _remember(model, contents, upload.name)
+    return _with_cache(contents, config, upload.name)
+
+
+async def aprepare(client, model, contents, config=None):
+    """Async counterpart of prepare; ``client`` is a genai async client (``client.aio``)."""
+    if not _is_cacheable(contents):
+        return contents, config
+    entry, stale = await _off_loop(_lookup, model, contents)
+    if entry is not None:
+        return _with_cache(contents, config, entry['name']) if entry['name'] else (contents, config)
+    if stale is not None and stale['name']:
+        await _adelete(client, stale['name'])
+    try:
+        upload = await client.caches.create(model=model, config=_upload_config(contents))
+    except errors.APIError as e:
+        print(f"AI Prompt Cache Error (create): {e}")
+        await _off_loop(_remember_failure, model, contents)
+        return contents, config
+    await _off_loop(_remember, model, contents, upload.name)
+    return _with_cache(contents, config, upload.name)
+
+
+def is_stale_cache_error(error):
+    """The upload a request pointed at expired or was deleted."""
+    return isinstance(error, errors.ClientError) and error.code in (403, 404)
+
+
+def forget(model, contents):
+    if isinstance(contents, PrefixedPrompt):
+        _registry().delete(_registry_key(model, contents))
+
+
+async def aforget(model, contents):
+    await _off_loop(forget, model, contents)
+
+
+def _delete(client, name):
+    try:
+        client.caches.delete(name=name)
+    except errors.APIError as e:
+        print(f"AI Prompt Cache Error (delete): {e}")
+
+
+async def _adelete(client, name):
+    try:
+        await client.caches.delete(name=name)
+    except errors.APIError as e:
+        print(f"AI Prompt Cache Error (delete): {e}")
@@ -0,0 +1,227 @@
+"""
+LLM provider backends used by the router (see ai_utils/router.py).
+
+Each provider turns (model, contents, config) into a ``Completion``. Prompts
+and configs are written against the Gemini SDK (``types.GenerateContentConfig``),
+so the other providers translate the few options ai_utils uses (JSON output,
+temperature, max tokens).
+
+* ``gemini``: the pooled google-genai client from ai_utils/client.py.
+* ``openai``: the ``openai`` SDK with ``OPENAI_API_KEY``.
+* ``local``: any OpenAI-compatible server (Ollama, llama.cpp, vLLM) at
+  ``LOCAL_LLM_BASE_URL``, used as a stand-in when hosted models are down.
+"""
+import asyncio
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from . import prompt_cache
+from .client import get_async_client, get_client
+
+try:
+    import openai
+except ImportError:  # pragma: no cover - optional dependency
+    openai = None
+
+
+@dataclass
+class Completion:
+    text: str
+    total_tokens: int = None
+    prompt_tokens: int = None
+    response_tokens: int = None
+    # Prompt tokens served from a context cache (see ai_utils.prompt_cache).
+    cached_tokens: int = None
+    # Set by the router: "provider:model" that served the call and how many
+    # routes were tried.
+    model: str = None
+    attempts: int = 1
+    # Set by ai_utils.hedging when a backup request was sent.
+    hedged: bool = False
+
+
+class Provider:
+    name = None
+
+    def is_configured(self):
+        raise NotImplementedError
+
+    def generate(self, model, contents, config=None):
+        raise NotImplementedError
+
+    async def agenerate(self, model, contents, config=None):
+        raise NotImplementedError
+
+    async def astream(self, model, contents, config=None):
+        """Yields Completion chunks; only the last carries ``total_tokens``."""
+        completion = await self.agenerate(model, contents, config)
+        yield completion
+
+
+class GeminiProvider(Provider):
+    name = 'gemini'
+
+    def is_configured(self):
+        return not getattr(settings, 'GEMINI_MOCK_MODE', False) and get_client() is not None
+
+    @staticmethod
+    def _completion(text, response):
+        usage = getattr(response, 'usage_metadata', None)
+        if not usage:
+            return Completion(text)
+        return Completion(text, usage.total_token_count, usage.prompt_token_count, usage.candidates_token_count,
+                          usage.cached_content_token_count)
+
+    # A PrefixedPrompt sends its prefix through a context cache (see
+    # ai_utils.prompt_cache). If the cache expired under us, the call is
+    # repeated once with the whole prompt.
+
+    def generate(self, model, contents, config=None):
+        client = get_client()
+        request_contents, request_config = prompt_cache.prepare(client, model, contents, config)
+        try:
+            response = client.models.generate_content(model=model, contents=request_contents, config=request_config)
+        except Exception as e:
+            if request_contents is contents or not prompt_cache.is_stale_cache_error(e):
+                raise
+            prompt_cache.forget(model, contents)
+            response = client.models.generate_content(model=model, contents=contents, config=config)
+        return self._completion(response.text, response)
+
+    async def agenerate(self, model, contents, config=None):
+        client = get_async_client()
+        request_contents, request_config = await prompt_cache.aprepare(client, model, contents, config)
+        try:
+            response = await client.models.generate_content(model=model, contents=request_contents, config=request_config)
+        except Exception as e:
+            if request_contents is contents or not prompt_cache.is_stale_cache_error(e):
+                raise
+            await prompt_cache.aforget(model, contents)
+            response = await client.models.generate_content(model=model, contents=contents, config=config)
+        return self._completion(response.text, response)
+
+    async def astream(self, model, contents, config=None):
+        client = get_async_client()
+        request_contents, request_config = await prompt_cache.aprepare(client, model, contents, config)
+        try:
+            stream = await client.models.generate_content_stream(model=model, contents=request_contents, config=request_config)
+        except Exception as e:
+            if request_contents is contents or not prompt_cache.is_stale_cache_error(e):
+                raise
+            await prompt_cache.aforget(model, contents)
+            stream = await client.models.generate_content_stream(model=model, contents=contents, config=config)
+        async for chunk in stream:
+            yield self._completion(chunk.text or "", chunk)
+
+
+class OpenAICompatibleProvider(Provider):
+    """Chat Completions API via the ``openai`` SDK."""
+
+    name = 'openai'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = {}
+        # event loop -> AsyncOpenAI
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def _credentials(self):
+        return getattr(settings, 'OPENAI_API_KEY', ''), getattr(settings, 'OPENAI_BASE_URL', None) or None
+
+    def is_configured(self):
+        api_key, _ = self._credentials()
+        return openai is not None and bool(api_key)
+
+    def _client(self):
+        key = (os.getpid(), *self._credentials())
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    api_key, base_url = self._credentials()
+                    client = openai.OpenAI(api_key=api_key, base_url=base_url,
+                                           timeout=getattr(settings, 'GEMINI_HTTP_TIMEOUT', 60.0), max_retries=0)
+                    self._clients = {key: client}
+        return client
+
+    def _async_client(self):
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            api_key, base_url = self._credentials()
+            client = openai.AsyncOpenAI(api_key=api_key, base_url=base_url,
+                                        timeout=getattr(settings, 'GEMINI_HTTP_TIMEOUT', 60.0), max_retries=0)
+            self._async_clients[loop] = client
+        return client
+
+    @staticmethod
+    def _request(model, contents, config):
+        if isinstance(contents, str):
+            messages = [{'role': 'user', 'content': contents}]
+        else:
+            messages = [{'role': 'user', 'content': str(contents)}]
+        kwargs = {'model': model, 'messages': messages}
+        if config is not None:
+            if getattr(config, 'response_mime_type', None) == 'application/json':
+                kwargs['response_format'] = {'type': 'json_object'}
+            if getattr(config, 'temperature', None) is not None:
+                kwargs['temperature'] = config.temperature
+            if getattr(config, 'max_output_tokens', None):
+                kwargs['max_tokens'] = config.max_output_tokens
+            if getattr(config, 'system_instruction', None):
+                messages.insert(0, {'role': 'system', 'content': str(config.system_instruction)})
+        return kwargs
+
+    @staticmethod
+    def _usage(text, usage):
+        if not usage:
+            return Completion(text)
+        return Completion(text, usage.total_tokens, usage.prompt_tokens, usage.completion_tokens)
+
+    def _completion(self, response):
+        return self._usage(response.choices[0].message.content or "", getattr(response, 'usage', None))
+
+    def generate(self, model, contents, config=None):
+        return self._completion(self._client().chat.completions.create(**self._request(model, contents, config)))
+
+    async def agenerate(self, model, contents, config=None):
+        response = await self._async_client().chat.completions.create(**self._request(model, contents, config))
+        return self._completion(response)
+
+    async def astream(self, model, contents, config=None):
+        stream = await self._async_client().chat.completions.create(
+            stream=True, stream_options={'include_usage': True}, **self._request(model, contents, config)
+        )
+        async for chunk in stream:
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            yield self._usage(text or "", getattr(chunk, 'usage', None))
+
+
+class LocalProvider(OpenAICompatibleProvider):
+    """A self-hosted OpenAI-compatible endpoint."""
+
+    name = 'local'
+
+    def _credentials(self):
+        return getattr(settings, 'LOCAL_LLM_API_KEY', '') or 'local', getattr(settings, 'LOCAL_LLM_BASE_URL', '')
+
+    def is_configured(self):
+        return openai is not None and bool(getattr(settings, 'LOCAL_LLM_BASE_URL', ''))
+
+
+PROVIDERS = {
+    provider.name: provider
+    for provider in (GeminiProvider(), OpenAICompatibleProvider(), LocalProvider())
+}
+
+
+def get_provider(name):
+    try:
+        return PROVIDERS[name]
+    except KeyError:
+        raise LookupError(f"Unknown LLM provider '{name}'")
@@ -0,0 +1,249 @@
+"""
+Client-side rate limiting for Gemini calls.
+
+Every call first reserves one request and its estimated tokens against the
+model's per-minute budget (``AI_RATE_LIMITS``). Usage is counted in the cache
+alias ``AI_RATE_LIMIT_BACKEND``; point it at Redis or Memcached (setting
+``REDIS_URL`` does) so all gunicorn workers draw from one budget. Their ``incr`` is atomic; the
+database and file caches implement it as a read followed by a write, so
+concurrent workers lose counts there and can overrun the budget.
+
+Counters are kept per minute window and combined as a sliding window (the
+previous minute weighted by how much of it still overlaps), which refills
+capacity gradually like a token bucket while needing only ``incr``/``decr``.
+
+Calls are either ``interactive`` (someone is waiting on the page) or
+``batch``. Batch calls may only use ``1 - AI_RATE_INTERACTIVE_RESERVE`` of
+each budget and poll less often, so interactive calls go first when the
+budget is tight. A caller that cannot get capacity waits until its deadline
+(``AI_RATE_DEADLINES``) and then gets ``RateLimitExceeded``.
+"""
+import asyncio
+import json
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .tokens import estimate_tokens
+
+KEY_PREFIX = 'ai_utils:rate:'
+WINDOW = 60
+
+DEFAULT_LIMITS = {
+    'default': {'rpm': 15, 'tpm': 1_000_000},
+}
+
+# Functions that run while a user waits on the page.
+DEFAULT_PRIORITIES = {
+    'parse_resume': 'interactive',
+    'analyze_match': 'interactive',
+    'generate_interview_questions': 'interactive',
+    'evaluate_answer': 'interactive',
+    'evaluate_answers_batch': 'interactive',
+    'get_next_ai_question': 'interactive',
+    'generate_quiz_questions': 'batch',
+    'generate_detailed_feedback': 'batch',
+    'summarize_transcript': 'batch',
+}
+
+# Seconds a caller may wait for capacity.
+DEFAULT_DEADLINES = {
+    'interactive': 20,
+    'batch': 300,
+}
+
+# Seconds between capacity checks while waiting.
+POLL_INTERVALS = {
+    'interactive': 0.2,
+    'batch': 1.0,
+}
+
+
+class RateLimitExceeded(Exception):
+    """No capacity became available before the caller's deadline."""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def get_priority(function):
+    priorities = {**DEFAULT_PRIORITIES, **_setting('AI_RATE_PRIORITIES', {})}
+    return priorities.get(function, 'batch')
+
+
+def get_deadline(priority):
+    return {**DEFAULT_DEADLINES, **_setting('AI_RATE_DEADLINES', {})}.get(priority, DEFAULT_DEADLINES['batch'])
+
+
+def get_limits(model):
+    limits = {**DEFAULT_LIMITS, **_setting('AI_RATE_LIMITS', {})}
+    return limits.get(model) or limits['default']
+
+
+def estimate_request_tokens(contents):
+    """Prompt tokens plus the expected response size."""
+    text = contents if isinstance(contents, str) else json.dumps(contents, default=str)
+    return estimate_tokens(text) + _setting('AI_RATE_OUTPUT_TOKENS', 500)
+
+
+class Reservation:
+    """Capacity taken for one call; ``settle`` corrects the token estimate."""
+
+    def __init__(self, limiter, model, window, tokens):
+        self.limiter = limiter
+        self.model = model
+        self.window = window
+        self.tokens = tokens
+
+    def settle(self, total_tokens):
+        if total_tokens is None or self.limiter is None:
+            return
+        self.limiter._adjust(self._key(), total_tokens - self.tokens)
+
+    async def asettle(self, total_tokens):
+        if total_tokens is None or self.limiter is None:
+            return
+        await self.limiter._aadjust(self._key(), total_tokens - self.tokens)
+
+    def _key(self):
+        return self.limiter._key(self.model, self.window, 't')
+
+
+class RateLimiter:
+    def __init__(self, cache_alias='default'):
+        self.cache = caches[cache_alias]
+
+    def _key(self, model, window, kind):
+        return f"{KEY_PREFIX}{model}:{window}:{kind}"
+
+    def _caps(self, model, priority, tokens):
+        limits = get_limits(model)
+        share = 1.0 if priority == 'interactive' else 1.0 - _setting('AI_RATE_INTERACTIVE_RESERVE', 0.25)
+        rpm_cap = max(1, int(limits['rpm'] * share))
+        tpm_cap = max(1, int(limits['tpm'] * share))
+        # A single oversized prompt must still fit into an empty window.
+        return rpm_cap, tpm_cap, min(tokens, tpm_cap)
+
+    def _over(self, now, window, requests, tokens, previous, rpm_cap, tpm_cap):
+        weight = 1.0 - (now - window * WINDOW) / WINDOW
+        prev_requests, prev_tokens = previous
+        return (
+            requests + prev_requests * weight > rpm_cap
+            or tokens + prev_tokens * weight > tpm_cap
+        )
+
+    def try_acquire(self, model, priority, tokens):
+        """Returns a Reservation, or None when the budget is used up."""
+        now = time.time()
+        window = int(now // WINDOW)
+        rpm_cap, tpm_cap, tokens = self._caps(model, priority, tokens)
+        rk, tk = self._key(model, window, 'r'), self._key(model, window, 't')
+        self.cache.add(rk, 0, WINDOW * 2)
+        self.cache.add(tk, 0, WINDOW * 2)
+        requests = self.cache.incr(rk)
+        used = self.cache.incr(tk, tokens)
+        previous = self.cache.get_many([self._key(model, window - 1, 'r'), self._key(model, window - 1, 't')])
+        previous = (previous.get(self._key(model, window - 1, 'r'), 0), previous.get(self._key(model, window - 1, 't'), 0))
+        if self._over(now, window, requests, used, previous, rpm_cap, tpm_cap):
+            self._adjust(rk, -1)
+            self._adjust(tk, -tokens)
+            return None
+        return Reservation(self, model, window, tokens)
+
+    async def atry_acquire(self, model, priority, tokens):
+        now = time.time()
+        window = int(now // WINDOW)
+        rpm_cap, tpm_cap, tokens = self._caps(model, priority, tokens)
+        rk, tk = self._key(model, window, 'r'), self._key(model, window, 't')
+        await self.cache.aadd(rk, 0, WINDOW * 2)
+        await self.cache.aadd(tk, 0, WINDOW * 2)
+        requests = await self.cache.aincr(rk)
+        used = await self.cache.aincr(tk, tokens)
+        previous = await self.cache.aget_many([self._key(model, window - 1, 'r'), self._key(model, window - 1, 't')])
+        previous = (previous.get(self._key(model, window - 1, 'r'), 0), previous.get(self._key(model, window - 1, 't'), 0))
+        if self._over(now, window, requests, used, previous, rpm_cap, tpm_cap):
+            await self._aadjust(rk, -1)
+            await self._aadjust(tk, -tokens)
+            return None
+        return Reservation(self, model, window, tokens)
+
+    def acquire(self, function, model, contents):
+        """Blocks until capacity is available or the deadline passes."""
+        priority = get_priority(function)
+        tokens = estimate_request_tokens(contents)
+        deadline = time.monotonic() + get_deadline(priority)
+        while True:
+            reservation = self.try_acquire(model, priority, tokens)
+            if reservation:
+                return reservation
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RateLimitExceeded(f"Rate limit for {model} still exhausted after {get_deadline(priority)}s ({function})")
+            time.sleep(min(remaining, POLL_INTERVALS[priority] * random.uniform(0.5, 1.5)))
+
+    async def aacquire(self, function, model, contents):
+        priority = get_priority(function)
+        tokens = estimate_request_tokens(contents)
+        deadline = time.monotonic() + get_deadline(priority)
+        while True:
+            reservation = await self.atry_acquire(model, priority, tokens)
+            if reservation:
+                return reservation
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RateLimitExceeded(f"Rate limit for {model} still exhausted after {get_deadline(priority)}s ({function})")
+            await asyncio.sleep(min(remaining, POLL_INTERVALS[priority] * random.uniform(0.5, 1.5)))
+
+    def saturate(self, model):
+        """
+        Marks the current window as used up after the API returned 429, so
+        every worker waits instead of repeating the failed round-trip.
+        """
+        limits = get_limits(model)
+        window = int(time.time() // WINDOW)
+        self.cache.set(self._key(model, window, 'r'), limits['rpm'], WINDOW * 2)
+
+    async def asaturate(self, model):
+        limits = get_limits(model)
+        window = int(time.time() // WINDOW)
+        await self.cache.aset(self._key(model, window, 'r'), limits['rpm'], WINDOW * 2)
+
+    def _adjust(self, key, delta):
+        if not delta:
+            return
+        try:
+            self.cache.incr(key, delta)
+        except ValueError:
+            # The window expired in the meantime
+            pass
+
+    async def _aadjust(self, key, delta):
+        if not delta:
+            return
+        try:
+            await self.cache.aincr(key, delta)
+        except ValueError:
+            pass
+
+
+class _DisabledLimiter:
+    def acquire(self, function, model, contents):
+        return Reservation(None, model, 0, 0)
+
+    async def aacquire(self, function, model, contents):
+        return Reservation(None, model, 0, 0)
+
+    def saturate(self, model):
+        pass
+
+    async def asaturate(self, model):
+        pass
+
+
+def get_limiter():
+    if not _setting('AI_RATE_LIMIT_ENABLED', True):
+        return _DisabledLimiter()
+    return RateLimiter(_setting('AI_RATE_LIMIT_BACKEND', 'default'))
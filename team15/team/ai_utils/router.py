@@ -0,0 +1,316 @@
+"""
+Latency-aware routing across LLM models with per-model circuit breakers.
+
+``AI_MODELS`` lists the models ai_utils may use, in order of preference.
+Each call is routed to the healthy model with the best recent latency
+(blend of p50 and p95, penalized by error rate); on failure the next model
+is tried. ``AI_MODEL_ROUTES`` can restrict a function to specific models.
+
+A model's circuit breaker opens after ``AI_BREAKER_FAILURES`` consecutive
+failures or when its error rate over the recent window reaches
+``AI_BREAKER_ERROR_RATE``. While open the model is skipped; after
+``AI_BREAKER_COOLDOWN`` seconds a single probe call is let through and its
+outcome closes or re-opens the breaker.
+
+Stats and breakers are kept per worker process.
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .providers import get_provider
+from .ratelimit import RateLimitExceeded, get_limiter
+
+DEFAULT_MODELS = [
+    {'name': 'gemini-2.0-flash', 'provider': 'gemini'},
+    {'name': 'gemini-1.5-flash', 'provider': 'gemini'},
+]
+
+
+class NoModelAvailable(Exception):
+    """Every model for the call is unconfigured, open or failed."""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def is_quota_error(e):
+    return "429" in str(e) or "quota" in str(e).lower()
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class CircuitBreaker:
+    def __init__(self):
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def allow(self, now):
+        if self.state == 'closed':
+            return True
+        if self.state == 'open' and now - self.opened_at >= _setting('AI_BREAKER_COOLDOWN', 30):
+            self.state = 'half_open'
+            self.probing = False
+        if self.state == 'half_open' and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record(self, success, error_rate, samples, now):
+        if success:
+            self.consecutive_failures = 0
+            if self.state == 'half_open':
+                self.state = 'closed'
+                self.probing = False
+            return
+
+        self.consecutive_failures += 1
+        tripped = (
+            self.state == 'half_open'
+            or self.consecutive_failures >= _setting('AI_BREAKER_FAILURES', 5)
+            or (samples >= _setting('AI_ROUTER_MIN_SAMPLES', 10) and error_rate >= _setting('AI_BREAKER_ERROR_RATE', 0.5))
+        )
+        if tripped:
+            self.state = 'open'
+            self.opened_at = now
+            self.probing = False
+
+
+class ModelRoute:
+    def __init__(self, name, provider, position):
+        self.name = name
+        self.provider = get_provider(provider)
+        self.position = position
+        self.breaker = CircuitBreaker()
+        self._lock = threading.Lock()
+        window = _setting('AI_ROUTER_WINDOW', 100)
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+
+    @property
+    def key(self):
+        return f"{self.provider.name}:{self.name}"
+
+    def is_configured(self):
+        return self.provider.is_configured()
+
+    def allow(self):
+        with self._lock:
+            return self.breaker.allow(time.monotonic())
+
+    def release(self):
+        """Gives back a probe slot that was claimed but not used."""
+        with self._lock:
+            self.breaker.probing = False
+
+    def record(self, success, latency=None):
+        with self._lock:
+            self._outcomes.append(success)
+            if success and latency is not None:
+                self._latencies.append(latency)
+            self.breaker.record(success, self._error_rate(), len(self._outcomes), time.monotonic())
+
+    def _error_rate(self):
+        if not self._outcomes:
+            return 0.0
+        return 1 - sum(self._outcomes) / len(self._outcomes)
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return {
+                'model': self.name,
+                'provider': self.provider.name,
+                'state': self.breaker.state,
+                'samples': len(self._outcomes),
+                'error_rate': round(self._error_rate(), 3),
+                'p50': _percentile(latencies, 0.5),
+                'p95': _percentile(latencies, 0.95),
+            }
+
+    def score(self):
+        """Lower is better. Models without enough samples keep their configured order."""
+        stats = self.stats()
+        if stats['p50'] is None or len(self._latencies) < _setting('AI_ROUTER_MIN_SAMPLES', 10):
+            latency = _setting('AI_ROUTER_DEFAULT_LATENCY', 2.0)
+        else:
+            latency = (stats['p50'] + stats['p95']) / 2
+        # Configured order breaks near-ties in favour of the preferred model.
+        return latency * (1 + 4 * stats['error_rate']) * (1 + 0.1 * self.position)
+
+
+class Router:
+    def __init__(self, models=None):
+        models = models or _setting('AI_MODELS', None) or DEFAULT_MODELS
+        self.routes = [ModelRoute(m['name'], m['provider'], i) for i, m in enumerate(models)]
+
+    def _routes_for(self, function, models=None):
+        names = models or _setting('AI_MODEL_ROUTES', {}).get(function)
+        routes = [r for r in self.routes if r.is_configured()]
+        if names:
+            routes = [r for r in routes if r.name in names]
+        return routes
+
+    def route_names(self, function):
+        return [r.key for r in self._routes_for(function)]
+
+    def is_available(self, function=None):
+        return bool(self._routes_for(function))
+
+    def candidates(self, function, models=None):
+        """Healthy routes for ``function`` (or just ``models``), best first."""
+        routes = sorted(self._routes_for(function, models), key=lambda r: r.score())
+        explore = _setting('AI_ROUTER_EXPLORE', 0.05)
+        if len(routes) > 1 and random.random() < explore:
+            # Occasionally try another model so its latency stats stay current.
+            routes.insert(0, routes.pop(random.randrange(1, len(routes))))
+        # Lazy: allow() claims a half-open breaker's probe slot, so it is
+        # only asked once the caller actually gets to that route.
+        return (r for r in routes if r.allow())
+
+    def _no_model(self, function, last_error):
+        if last_error is not None:
+            return last_error
+        return NoModelAvailable(f"No healthy model available for {function}")
+
+    def generate(self, function, contents, config=None):
+        """Returns a Completion from the first route that succeeds."""
+        limiter = get_limiter()
+        last_error = None
+        for attempt, route in enumerate(self.candidates(function), 1):
+            try:
+                reservation = limiter.acquire(function, route.name, contents)
+            except RateLimitExceeded as e:
+                route.release()
+                last_error = e
+                continue
+            started = time.monotonic()
+            try:
+                completion = route.provider.generate(route.name, contents, config)
+            except Exception as e:
+                route.record(False)
+                if is_quota_error(e):
+                    limiter.saturate(route.name)
+                print(f"AI Router: {route.key} failed for {function}: {e}")
+                last_error = e
+                continue
+            route.record(True, time.monotonic() - started)
+            reservation.settle(completion.total_tokens)
+            completion.model, completion.attempts = route.key, attempt
+            return completion
+        raise self._no_model(function, last_error)
+
+    async def agenerate(self, function, contents, config=None, models=None):
+        limiter = get_limiter()
+        last_error = None
+        for attempt, route in enumerate(self.candidates(function, models), 1):
+            try:
+                reservation = await limiter.aacquire(function, route.name, contents)
+            except RateLimitExceeded as e:
+                route.release()
+                last_error = e
+                continue
+            started = time.monotonic()
+            try:
+                completion = await route.provider.agenerate(route.name, contents, config)
+            except asyncio.CancelledError:
+                # A hedged call lost the race (see ai_utils.hedging).
+                route.release()
+                raise
+            except Exception as e:
+                route.record(False)
+                if is_quota_error(e):
+                    await limiter.asaturate(route.name)
+                print(f"AI Router: {route.key} failed for {function}: {e}")
+                last_error = e
+                continue
+            route.record(True, time.monotonic() - started)
+            await reservation.asettle(completion.total_tokens)
+            completion.model, completion.attempts = route.key, attempt
+            return completion
+        raise self._no_model(function, last_error)
+
+    async def astream(self, function, contents, config=None, models=None):
+        """
+        Yields Completion chunks; token counts arrive on the last ones.
+        Falls over to the next route only if a model fails before its first
+        chunk; later errors propagate.
+        """
+        limiter = get_limiter()
+        last_error = None
+        for attempt, route in enumerate(self.candidates(function, models), 1):
+            try:
+                reservation = await limiter.aacquire(function, route.name, contents)
+            except RateLimitExceeded as e:
+                route.release()
+                last_error = e
+                continue
+            started = time.monotonic()
+            sent = False
+            total_tokens = None
+            try:
+                async for chunk in route.provider.astream(route.name, contents, config):
+                    total_tokens = chunk.total_tokens or total_tokens
+                    chunk.model, chunk.attempts = route.key, attempt
+                    if chunk.text:
+                        sent = True
+                    if chunk.text or chunk.total_tokens:
+                        yield chunk
+            except (asyncio.CancelledError, GeneratorExit):
+                route.release()
+                raise
+            except Exception as e:
+                route.record(False)
+                if is_quota_error(e):
+                    await limiter.asaturate(route.name)
+                print(f"AI Router: {route.key} failed for {function}: {e}")
+                if sent:
+                    raise
+                last_error = e
+                continue
+            route.record(True, time.monotonic() - started)
+            await reservation.asettle(total_tokens)
+            return
+        raise self._no_model(function, last_error)
+
+    def stats(self):
+        return [route.stats() for route in self.routes]
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router():
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = Router()
+    return _router
+
+
+def reset_router():
+    global _router
+    with _router_lock:
+        _router = None
+
+
+@receiver(setting_changed)
+def _reset_on_setting_changed(setting, **kwargs):
+    if setting in ('AI_MODELS', 'AI_ROUTER_WINDOW'):
+        reset_router()
@@ -0,0 +1,317 @@
+"""
+Typed response schemas for structured LLM output.
+
+Each ai_utils function that expects JSON declares a pydantic model here. The
+model is sent as the request's ``response_schema`` (see ``json_config``), so
+the API constrains its output, and the response is validated in one pass by
+``validate_response``.
+
+List payloads (interview questions, quiz questions, batch evaluations) are
+wrapped in an object and validated item by item: a malformed item is repaired
+where the intent is clear (a letter instead of the correct option, a score
+given as "8/10") or dropped on its own instead of discarding the whole
+payload. Outcomes are counted per function in ``validation_stats()``.
+"""
+import json
+import re
+import threading
+from collections import Counter
+
+from google.genai import types
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+
+_counters = Counter()
+_counters_lock = threading.Lock()
+
+
+def _record(function, outcome, count=1):
+    with _counters_lock:
+        _counters[(function, outcome)] += count
+
+
+def validation_stats():
+    """{function: {outcome: count}} for this process."""
+    with _counters_lock:
+        stats = {}
+        for (function, outcome), count in _counters.items():
+            stats.setdefault(function, {})[outcome] = count
+        return stats
+
+
+def reset_validation_stats():
+    with _counters_lock:
+        _counters.clear()
+
+
+class RepairError(ValueError):
+    pass
+
+
+def _note_repair(info):
+    if info.context is not None:
+        info.context['repaired'] = True
+
+
+def _to_score(value, upper):
+    """Accepts 8, "8", "8/10" or "80%" and clamps to [0, upper]."""
+    if isinstance(value, str):
+        match = re.search(r'-?\d+(?:\.\d+)?', value)
+        if not match:
+            raise RepairError(f"No number in score {value!r}")
+        value = float(match.group())
+    return min(max(float(value), 0.0), upper)
+
+
+def _to_text(value):
+    if isinstance(value, list):
+        return "\n".join(str(v) for v in value)
+    return "" if value is None else str(value)
+
+
+class Schema(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+
+# --- Resume parsing ---
+
+class ResumeData(Schema):
+    Name: str = ""
+    Email: str = ""
+    Phone: str = ""
+    Skills: list[str] = Field(default_factory=list)
+    Experience: str = ""
+    Education: str = ""
+
+    @field_validator('Skills', mode='before')
+    @classmethod
+    def _split_skills(cls, value, info):
+        if isinstance(value, str):
+            _note_repair(info)
+            return [s.strip() for s in value.split(',') if s.strip()]
+        return value
+
+    @field_validator('Name', 'Email', 'Phone', 'Experience', 'Education', mode='before')
+    @classmethod
+    def _flatten(cls, value, info):
+        if not isinstance(value, str) and value is not None:
+            _note_repair(info)
+        return _to_text(value)
+
+
+# --- Resume / job matching ---
+
+class MatchAnalysis(Schema):
+    match_score: float = 0.0
+    skills_matched: list[str] = Field(default_factory=list)
+    missing_skills: list[str] = Field(default_factory=list)
+    ai_feedback: str = ""
+    improvement_suggestions: str = ""
+
+    @field_validator('match_score', mode='before')
+    @classmethod
+    def _score(cls, value, info):
+        if not isinstance(value, (int, float)):
+            _note_repair(info)
+        return _to_score(value, 100)
+
+    @field_validator('ai_feedback', 'improvement_suggestions', mode='before')
+    @classmethod
+    def _flatten(cls, value, info):
+        if not isinstance(value, str):
+            _note_repair(info)
+        return _to_text(value)
+
+
+# --- Mock interview questions ---
+
+class InterviewQuestions(Schema):
+    questions: list[str]
+
+
+# --- Answer evaluation ---
+
+class AnswerEvaluation(Schema):
+    score: float
+    feedback: str = ""
+    strengths: str = ""
+    improvements: str = ""
+
+    @field_validator('score', mode='before')
+    @classmethod
+    def _score(cls, value, info):
+        if not isinstance(value, (int, float)):
+            _note_repair(info)
+        return _to_score(value, 10)
+
+    @field_validator('feedback', 'strengths', 'improvements', mode='before')
+    @classmethod
+    def _flatten(cls, value, info):
+        if not isinstance(value, str):
+            _note_repair(info)
+        return _to_text(value)
+
+
+class IndexedEvaluation(AnswerEvaluation):
+    index: int
+
+
+class BatchEvaluation(Schema):
+    evaluations: list[IndexedEvaluation]
+
+
+# --- Topic quizzes ---
+
+class QuizQuestion(Schema):
+    question: str
+    options: list[str] = Field(min_length=2)
+    correct_answer: str
+
+    @field_validator('correct_answer')
+    @classmethod
+    def _in_options(cls, value, info):
+        options = info.data.get('options') or []
+        if value in options:
+            return value
+        stripped = value.strip()
+        for option in options:
+            if option.strip().lower() == stripped.lower():
+                _note_repair(info)
+                return option
+        # "B", "b)", "Option B" or "2" instead of the option text
+        match = re.fullmatch(r'(?:option\s*)?([a-dA-D]|[1-4])[).:]?', stripped, re.IGNORECASE)
+        if match:
+            key = match.group(1).upper()
+            index = int(key) - 1 if key.isdigit() else ord(key) - ord('A')
+            if index < len(options):
+                _note_repair(info)
+                return options[index]
+        raise RepairError(f"Correct answer {value!r} is not one of the options")
+
+
+class QuizQuestions(Schema):
+    questions: list[QuizQuestion]
+
+
+# --- AI interview feedback ---
+
+class FeedbackSections(Schema):
+    communication: str = Field("", alias="Communication")
+    technical_knowledge: str = Field("", alias="Technical Knowledge")
+    problem_solving: str = Field("", alias="Problem Solving")
+    cultural_fit: str = Field("", alias="Cultural Fit")
+    confidence: str = Field("", alias="Confidence")
+    clarity: str = Field("", alias="Clarity")
+    code_quality: str = Field("", alias="Code Quality")
+
+
+class DetailedFeedback(Schema):
+    communication_score: float = 0.0
+    technical_score: float = 0.0
+    problem_solving_score: float = 0.0
+    cultural_fit_score: float = 0.0
+    confidence_score: float = 0.0
+    clarity_score: float = 0.0
+    overall_score: float = 0.0
+    feedback_summary: str = ""
+    detailed_feedback: FeedbackSections = Field(default_factory=FeedbackSections)
+
+    @field_validator(
+        'communication_score', 'technical_score', 'problem_solving_score', 'cultural_fit_score',
+        'confidence_score', 'clarity_score', 'overall_score', mode='before'
+    )
+    @classmethod
+    def _score(cls, value, info):
+        if not isinstance(value, (int, float)):
+            _note_repair(info)
+        return _to_score(value, 100)
+
+
+# Which field of a wrapper schema holds items validated one at a time.
+ITEM_FIELDS = {
+    InterviewQuestions: ('questions', str),
+    BatchEvaluation: ('evaluations', IndexedEvaluation),
+    QuizQuestions: ('questions', QuizQuestion),
+}
+
+
+def json_config(schema):
+    """Request config asking the model for JSON matching ``schema``."""
+    return types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=schema,
+    )
+
+
+def _load_json(function, text):
+    try:
+        return json.loads(text)
+    except (TypeError, ValueError):
+        pass
+    # One repair pass: strip a markdown fence or chatter around the payload.
+    stripped = re.sub(r'^```(?:json)?\s*|\s*```$', '', (text or "").strip())
+    starts = [i for i in (stripped.find('{'), stripped.find('[')) if i != -1]
+    if starts:
+        start = min(starts)
+        end = max(stripped.rfind('}'), stripped.rfind(']'))
+        try:
+            data = json.loads(stripped[start:end + 1])
+            _record(function, 'json_repaired')
+            return data
+        except ValueError:
+            pass
+    _record(function, 'invalid_json')
+    raise ValueError(f"{function}: response is not valid JSON")
+
+
+def _validate_item(item_type, item, context):
+    if item_type is str:
+        if isinstance(item, str) and item.strip():
+            return item.strip()
+        if isinstance(item, dict):
+            # {"question": "..."} instead of a bare string
+            text = item.get('question') or item.get('text')
+            if isinstance(text, str) and text.strip():
+                context['repaired'] = True
+                return text.strip()
+        raise RepairError(f"Not a question: {item!r}")
+    return item_type.model_validate(item, context=context)
+
+
+def validate_response(function, schema, text):
+    """
+    Parses ``text`` into ``schema``. List items are validated individually;
+    invalid items are dropped and counted. Raises ValueError when the payload
+    as a whole is unusable or no item survives.
+    """
+    data = _load_json(function, text)
+    item_field = ITEM_FIELDS.get(schema)
+
+    if item_field:
+        field, item_type = item_field
+        # Accept a bare list as well as the wrapper object.
+        items = data if isinstance(data, list) else (data.get(field) if isinstance(data, dict) else None)
+        if not isinstance(items, list):
+            _record(function, 'invalid')
+            raise ValueError(f"{function}: expected a list of {field}")
+        valid = []
+        for item in items:
+            context = {}
+            try:
+                valid.append(_validate_item(item_type, item, context))
+            except (ValidationError, ValueError):
+                _record(function, 'item_dropped')
+                continue
+            _record(function, 'item_repaired' if context.get('repaired') else 'item_ok')
+        if not valid:
+            _record(function, 'invalid')
+            raise ValueError(f"{function}: no valid {field} in response")
+        data = {field: valid}
+
+    context = {}
+    try:
+        result = schema.model_validate(data, context=context)
+    except ValidationError as e:
+        _record(function, 'invalid')
+        raise ValueError(f"{function}: {e.error_count()} validation error(s)") from e
+    _record(function, 'repaired' if context.get('repaired') else 'ok')
+    return result
@@ -0,0 +1,189 @@
+"""
+Single-flight deduplication of identical LLM calls.
+
+A double click, a second tab or two workers handling the same request can
+start the same expensive call twice. ``do``/``ado`` run ``call`` once per
+key (the LLM cache key) and hand its result to every concurrent caller:
+
+* Within a process, callers find the in-flight call in a registry and wait
+  on its future, whether they are threads or coroutines.
+* Across processes, the caller that runs the call holds a lock in the
+  ``AI_SINGLEFLIGHT_BACKEND`` cache and leaves the result there for a short
+  while. Callers in other processes poll for it. If the lock disappears
+  without a result (the call failed or its process died), they make the call
+  themselves. This needs a cache shared by all workers (Redis, Memcached
+  or database cache, see ``REDIS_URL``); with the default local-memory
+  cache only the in-process part applies, and ``manage.py check`` warns.
+
+Only the response text is shared, which is all callers of
+``_generate_content`` use. A caller that is itself cancelled (e.g. the
+client went away) does not fail the callers waiting on it; one of them
+takes over.
+"""
+import asyncio
+import concurrent.futures
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+KEY_PREFIX = 'ai_utils:inflight:'
+POLL_INITIAL = 0.05
+POLL_MAX = 0.5
+
+
+class _Abandoned(Exception):
+    """The caller running the call was cancelled before it finished."""
+
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def is_enabled():
+    return _setting('AI_SINGLEFLIGHT_ENABLED', True)
+
+
+def _backend():
+    return caches[_setting('AI_SINGLEFLIGHT_BACKEND', 'default')]
+
+
+def _timeout():
+    # Longest a call may hold the cross-process lock.
+    return _setting('AI_SINGLEFLIGHT_TIMEOUT', 120)
+
+
+def _lock_key(key):
+    return f"{KEY_PREFIX}{key}:lock"
+
+
+def _result_key(key):
+    return f"{KEY_PREFIX}{key}:result"
+
+
+def _join(key):
+    """(future, is_leader): the in-flight future for ``key``, created if there is none."""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future, False
+        future = concurrent.futures.Future()
+        _inflight[key] = future
+        return future, True
+
+
+def _finish(key, future, result=None, error=None):
+    with _inflight_lock:
+        _inflight.pop(key, None)
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+def _run_leader(key, call):
+    """Runs ``call`` under the cross-process lock, or returns another process's result."""
+    backend = _backend()
+    token = uuid.uuid4().hex
+    delay = POLL_INITIAL
+    deadline = time.monotonic() + _timeout()
+    # Lock holders seen while waiting; only their results are taken, not an
+    # older one still stored for the key.
+    holders = set()
+    while not backend.add(_lock_key(key), token, _timeout()):
+        # Another process holds the call; wait for its result.
+        holders.add(backend.get(_lock_key(key)))
+        stored = backend.get(_result_key(key))
+        if stored is not None and stored[0] in holders:
+            return stored[1], True
+        if time.monotonic() >= deadline:
+            break
+        time.sleep(delay)
+        delay = min(delay * 2, POLL_MAX)
+    try:
+        result = call()
+        backend.set(_result_key(key), (token, result), _setting('AI_SINGLEFLIGHT_RESULT_TTL', 30))
+        return result, False
+    finally:
+        if backend.get(_lock_key(key)) == token:
+            backend.delete(_lock_key(key))
+
+
+async def _arun_leader(key, call):
+    backend = _backend()
+    token = uuid.uuid4().hex
+    delay = POLL_INITIAL
+    deadline = time.monotonic() + _timeout()
+    holders = set()
+    while not await backend.aadd(_lock_key(key), token, _timeout()):
+        holders.add(await backend.aget(_lock_key(key)))
+        stored = await backend.aget(_result_key(key))
+        if stored is not None and stored[0] in holders:
+            return stored[1], True
+        if time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, POLL_MAX)
+    try:
+        result = await call()
+        await backend.aset(_result_key(key), (token, result), _setting('AI_SINGLEFLIGHT_RESULT_TTL', 30))
+        return result, False
+    finally:
+        if await backend.aget(_lock_key(key)) == token:
+            await backend.adelete(_lock_key(key))
+
+
+def do(key, call):
+    """
+    (result, shared): ``call()``'s result, and whether it came from another
+    caller's call.
+    """
+    if not is_enabled():
+        return call(), False
+    while True:
+        future, leader = _join(key)
+        if not leader:
+            try:
+                return future.result(), True
+            except _Abandoned:
+                continue
+        try:
+            result, shared = _run_leader(key, call)
+        except Exception as e:
+            _finish(key, future, error=e)
+            raise
+        except BaseException:
+            _finish(key, future, error=_Abandoned())
+            raise
+        _finish(key, future, result)
+        return result, shared
+
+
+async def ado(key, call):
+    """Async counterpart of ``do``; ``call`` returns an awaitable."""
+    if not is_enabled():
+        return await call(), False
+    while True:
+        future, leader = _join(key)
+        if not leader:
+            try:
+                # shield: a cancelled waiter must not cancel the shared future.
+                return await asyncio.shield(asyncio.wrap_future(future)), True
+            except _Abandoned:
+                continue
+        try:
+            result, shared = await _arun_leader(key, call)
+        except Exception as e:
+            _finish(key, future, error=e)
+            raise
+        except BaseException:
+            _finish(key, future, error=_Abandoned())
+            raise
+        _finish(key, future, result)
+        return result, shared
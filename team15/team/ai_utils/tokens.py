@@ -0,0 +1,11 @@
+"""
+Token estimates for budgeting prompts (context windows, rate limits, context
+caches) without a tokenizer round-trip.
+"""
+
+# Rough characters-per-token ratio for English text and code.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
@@ -1,17 +1,217 @@
 import os
 import json
-from google import genai
-from google.genai import types
+import hashlib
+import asyncio
+import random
+import time
 from django.conf import settings
+from .cache import get_cache, get_ttl, make_key
+from .client import get_async_client, get_client
+from .context import build_context, summary_token_budget
+from .prompt_cache import PrefixedPrompt
+from .ratelimit import RateLimitExceeded
+from .router import NoModelAvailable, get_router, is_quota_error
+from . import cassettes, hedging, metrics, schemas, singleflight
+
+# Every function below has an ``a``-prefixed async counterpart; both share
+# the prompt and mock builders. Model choice and failover are left to
+# ai_utils.router, so no function names a model. Functions that expect JSON
+# pass a response schema from ai_utils.schemas and validate the reply with it.
 
 def get_gemini_client():
-    api_key = getattr(settings, 'GEMINI_API_KEY', None)
-    if not api_key or api_key == 'your_gemini_api_key_here':
-        return None
-    return genai.Client(api_key=api_key)
+    """
+    Returns the pooled, process-wide Gemini client (see ai_utils.client).
+    """
+    return get_client()
 
-def parse_resume(file_text):
-    mock_data = {
+def get_async_gemini_client():
+    """
+    Returns the async Gemini client for the running event loop.
+    """
+    return get_async_client()
+
+def llm_available(function=None):
+    """
+    False when no model is configured (no API keys), in which case callers
+    return their mock data. Replay mode always answers (see ai_utils.cassettes).
+    """
+    return cassettes.is_replaying() or get_router().is_available(function)
+
+def _route_key(function):
+    # Any model on the function's route may serve a cached response.
+    return ",".join(get_router().route_names(function))
+
+def _complete(function, contents, config=None):
+    """
+    One model call through the router, or through the cassette store in
+    record/replay mode (see ai_utils.cassettes).
+    """
+    if cassettes.is_replaying():
+        return cassettes.replay(function, contents, config)
+    started = time.monotonic()
+    completion = get_router().generate(function, contents, config)
+    if cassettes.is_recording():
+        cassettes.record(function, contents, config, completion, time.monotonic() - started)
+    return completion
+
+async def _acomplete(function, contents, config=None):
+    if cassettes.is_replaying():
+        return await cassettes.areplay(function, contents, config)
+    started = time.monotonic()
+    if hedging.get_policy(function):
+        completion = await hedging.agenerate(get_router(), function, contents, config)
+    else:
+        completion = await get_router().agenerate(function, contents, config)
+    if cassettes.is_recording():
+        await cassettes.arecord(function, contents, config, completion, time.monotonic() - started)
+    return completion
+
+async def _astream_completion(function, contents, config=None):
+    if cassettes.is_replaying():
+        async for chunk in cassettes.areplay_stream(function, contents, config):
+            yield chunk
+        return
+    started = time.monotonic()
+    chunks = []
+    final = None
+    if hedging.get_policy(function):
+        stream = hedging.astream(get_router(), function, contents, config)
+    else:
+        stream = get_router().astream(function, contents, config)
+    async for chunk in stream:
+        final = chunk
+        if chunk.text:
+            chunks.append([time.monotonic() - started, chunk.text])
+        yield chunk
+    if cassettes.is_recording() and final is not None:
+        text = "".join(text for _, text in chunks)
+        await cassettes.arecord(function, contents, config, final, time.monotonic() - started, chunks, text)
+
+def _generate_content(function, contents, config=None):
+    """
+    Returns the LLM response text for ``function``. The router picks the
+    model (see ai_utils.router) and waits for rate limit capacity (see
+    ai_utils.ratelimit). Responses are stored in the LLM cache (see
+    ai_utils.cache) and repeats are served from there; concurrent identical
+    calls share one model call (see ai_utils.singleflight). Every call is
+    recorded by ai_utils.metrics.
+    """
+    started = time.monotonic()
+    llm_cache = get_cache()
+    key = make_key(function, _route_key(function), contents, config)
+    cached = llm_cache.get(key, function)
+    if cached is not None:
+        metrics.record(function, 'cache_hit', duration=time.monotonic() - started)
+        return cached
+
+    def call():
+        try:
+            completion = _complete(function, contents, config)
+        except Exception:
+            metrics.record(function, 'error', duration=time.monotonic() - started)
+            raise
+        metrics.record_completion(function, completion, time.monotonic() - started)
+        if _is_cacheable(completion.text, config):
+            llm_cache.set(key, completion.text, get_ttl(function))
+        return completion.text
+
+    text, shared = singleflight.do(key, call)
+    if shared:
+        metrics.record(function, 'shared', duration=time.monotonic() - started)
+    return text
+
+async def _agenerate_content(function, contents, config=None):
+    """
+    Async counterpart of _generate_content.
+    """
+    started = time.monotonic()
+    llm_cache = get_cache()
+    key = make_key(function, _route_key(function), contents, config)
+    cached = await llm_cache.aget(key, function)
+    if cached is not None:
+        metrics.record(function, 'cache_hit', duration=time.monotonic() - started)
+        return cached
+
+    async def call():
+        try:
+            completion = await _acomplete(function, contents, config)
+        except Exception:
+            metrics.record(function, 'error', duration=time.monotonic() - started)
+            raise
+        metrics.record_completion(function, completion, time.monotonic() - started)
+        if _is_cacheable(completion.text, config):
+            await llm_cache.aset(key, completion.text, get_ttl(function))
+        return completion.text
+
+    text, shared = await singleflight.ado(key, call)
+    if shared:
+        metrics.record(function, 'shared', duration=time.monotonic() - started)
+    return text
+
+async def _astream_content(function, contents, config=None):
+    """
+    Streaming counterpart of _agenerate_content: yields text chunks as the
+    model produces them. A cached response is yielded as a single chunk and
+    the complete text is cached once the stream ends.
+    """
+    started = time.monotonic()
+    llm_cache = get_cache()
+    key = make_key(function, _route_key(function), contents, config)
+    cached = await llm_cache.aget(key, function)
+    if cached is not None:
+        metrics.record(function, 'cache_hit', duration=time.monotonic() - started)
+        yield cached
+        return
+
+    parts = []
+    first_token = None
+    final = None
+    try:
+        async for chunk in _astream_completion(function, contents, config):
+            final = chunk
+            if chunk.text:
+                if first_token is None:
+                    first_token = time.monotonic() - started
+                parts.append(chunk.text)
+                yield chunk.text
+    except Exception:
+        metrics.record(function, 'error', duration=time.monotonic() - started, time_to_first_token=first_token)
+        raise
+    if final is not None:
+        metrics.record_completion(function, final, time.monotonic() - started, first_token)
+    text = "".join(parts)
+    if _is_cacheable(text, config):
+        await llm_cache.aset(key, text, get_ttl(function))
+
+def _mock_random(*inputs):
+    """
+    Random source seeded from the call's inputs, so mock data is the same
+    on every run with the same inputs.
+    """
+    seed = hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    return random.Random(seed)
+
+def _structured(function, schema, response_text):
+    """
+    Validates a JSON response against ``schema`` and returns plain data.
+    Raises ValueError if nothing usable is left.
+    """
+    return schemas.validate_response(function, schema, response_text).model_dump(by_alias=True)
+
+def _is_cacheable(text, config):
+    if not text:
+        return False
+    if config is not None and config.response_mime_type == "application/json":
+        try:
+            json.loads(text)
+        except ValueError:
+            return False
+    return True
+
+# --- Resume parsing ---
+
+def _parse_resume_mock():
+    return {
         "Name": "Sample Candidate",
         "Email": "candidate@example.com",
         "Phone": "123-456-7890",
@@ -19,16 +219,9 @@ def parse_resume(file_text):
         "Experience": "3 years of web development",
         "Education": "B.S. Computer Science"
     }
-    
-    if getattr(settings, 'GEMINI_MOCK_MODE', False):
-        return mock_data
-        
-    client = get_gemini_client()
-    if not client:
-        return mock_data
-        
-    try:
-        prompt = f"""
+
+def _parse_resume_prompt(file_text):
+    return f"""
         Extract the following information from the resume text provided below in JSON format:
         - Name
         - Email
@@ -40,40 +233,76 @@ def parse_resume(file_text):
         Resume Text:
         {file_text}
         """
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json"
-            )
+
+def parse_resume(file_text):
+    mock_data = _parse_resume_mock()
+
+    if not llm_available():
+        return mock_data
+
+    try:
+        response_text = _generate_content(
+            "parse_resume",
+            contents=_parse_resume_prompt(file_text),
+            config=schemas.json_config(schemas.ResumeData)
         )
-        return json.loads(response.text)
+        return _structured("parse_resume", schemas.ResumeData, response_text)
     except Exception as e:
         print(f"AI API Error (parse_resume): {e}")
+        metrics.record_fallback("parse_resume")
+        return mock_data
+
+async def aparse_resume(file_text):
+    mock_data = _parse_resume_mock()
+
+    if not llm_available():
         return mock_data
 
-def analyze_match(resume_data, job_description, missing_skills=None):
-    import random
-    mock_data = {
-        "match_score": random.randint(70, 95),
+    try:
+        response_text = await _agenerate_content(
+            "parse_resume",
+            contents=_parse_resume_prompt(file_text),
+            config=schemas.json_config(schemas.ResumeData)
+        )
+        return _structured("parse_resume", schemas.ResumeData, response_text)
+    except Exception as e:
+        print(f"AI API Error (aparse_resume): {e}")
+        metrics.record_fallback("parse_resume")
+        return mock_data
+
+# --- Candidate prompts ---
+
+def _candidate_prompt(resume_data, task, resume_id=None):
+    """
+    A prompt about one candidate: the shared instructions and the resume
+    come first and stay identical across tasks, so Gemini can serve them
+    from a context cache (see ai_utils.prompt_cache); ``task`` follows.
+    """
+    resume_json = json.dumps(resume_data)
+    prefix = f"""
+        You are an AI assistant for a recruitment platform, helping evaluate and prepare the candidate whose parsed resume follows.
+        Use the resume as context for the task after it.
+        Resume: {resume_json}
+        """
+    if resume_id is None:
+        resume_id = hashlib.sha256(resume_json.encode('utf-8')).hexdigest()[:16]
+    return PrefixedPrompt(prefix, task, f"resume:{resume_id}")
+
+# --- Resume / job matching ---
+
+def _analyze_match_mock(resume_data):
+    return {
+        "match_score": _mock_random(resume_data).randint(70, 95),
         "skills_matched": (resume_data.get('Skills', []) if resume_data else [])[:3],
         "missing_skills": ["Docker", "Kubernetes", "Cloud Deployment"],
         "ai_feedback": "The candidate shows a strong foundation in the core technologies required for this role, specifically Python and Django. However, their experience with cloud deployment and containerization tools like Docker seems limited compared to the job requirements. To become a top-tier candidate, they should focus on demonstrating practical experience with these missing skills in a production environment.",
         "improvement_suggestions": "Dimensions to improve: 1. Master Docker and Kubernetes for containerization. 2. Obtain an AWS Certified Developer associate certification. 3. Contribute to open-source projects involving microservices architecture."
     }
 
-    if getattr(settings, 'GEMINI_MOCK_MODE', False):
-        return mock_data
-        
-    client = get_gemini_client()
-    if not client:
-        return mock_data
-        
-    try:
-        missing_skills_str = ", ".join(missing_skills) if missing_skills else "None specified"
-        prompt = f"""
-        Compare the following resume data with the job description.
-        Resume: {json.dumps(resume_data)}
+def _analyze_match_prompt(resume_data, job_description, missing_skills, resume_id=None):
+    missing_skills_str = ", ".join(missing_skills) if missing_skills else "None specified"
+    return _candidate_prompt(resume_data, f"""
+        Compare the resume above with the job description.
         Job Description: {job_description}
         Missing Skills Identified: {missing_skills_str}
 
@@ -83,20 +312,47 @@ def analyze_match(resume_data, job_description, missing_skills=None):
         - missing_skills (list)
         - ai_feedback (string): A detailed analysis of the candidate's fit for the role. MUST be at least 3-4 sentences long, explaining why they are a good or bad match.
         - improvement_suggestions (string): A detailed, actionable paragraph (at least 3-4 sentences) suggesting specific certifications, projects, or technologies to learn. Focus SPECIFICALLY on the 'Missing Skills Identified' listed above.
-        """
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json"
-            )
+        """, resume_id)
+
+def analyze_match(resume_data, job_description, missing_skills=None, resume_id=None):
+    mock_data = _analyze_match_mock(resume_data)
+
+    if not llm_available():
+        return mock_data
+
+    try:
+        response_text = _generate_content(
+            "analyze_match",
+            contents=_analyze_match_prompt(resume_data, job_description, missing_skills, resume_id),
+            config=schemas.json_config(schemas.MatchAnalysis)
         )
-        return json.loads(response.text)
+        return _structured("analyze_match", schemas.MatchAnalysis, response_text)
     except Exception as e:
         print(f"AI API Error (analyze_match): {e}")
+        metrics.record_fallback("analyze_match")
+        return mock_data
+
+async def aanalyze_match(resume_data, job_description, missing_skills=None, resume_id=None):
+    mock_data = _analyze_match_mock(resume_data)
+
+    if not llm_available():
+        return mock_data
+
+    try:
+        response_text = await _agenerate_content(
+            "analyze_match",
+            contents=_analyze_match_prompt(resume_data, job_description, missing_skills, resume_id),
+            config=schemas.json_config(schemas.MatchAnalysis)
+        )
+        return _structured("analyze_match", schemas.MatchAnalysis, response_text)
+    except Exception as e:
+        print(f"AI API Error (aanalyze_match): {e}")
+        metrics.record_fallback("analyze_match")
         return mock_data
 
-def generate_interview_questions(resume_data, job_title):
+# --- Mock interview questions ---
+
+def mock_interview_questions(job_title):
     # Mock Questions (30 total)
     mock_questions = []
     for i in range(10):
@@ -105,69 +361,115 @@ def generate_interview_questions(resume_data, job_title):
         mock_questions.append(f"Technical Q{i+1}: What is your experience with specific technology related to {job_title}?")
     for i in range(10):
         mock_questions.append(f"Behavioral Q{i+1}: Describe a situation where you had to solve a team conflict.")
-    
-    if getattr(settings, 'GEMINI_MOCK_MODE', False):
-        return mock_questions
-        
-    client = get_gemini_client()
-    if not client:
-        return mock_questions
-        
-    retries = 3
-    for attempt in range(retries):
-        try:
-            prompt = f"""
+    return mock_questions
+
+def _interview_questions_prompt(resume_data, job_title, resume_id=None):
+    return _candidate_prompt(resume_data, f"""
             Generate exactly 30 interview questions for a {job_title} role based on the candidate's resume.
             The questions MUST be split as follows:
             1. 10 Logical Reasoning questions compatible with a professional workplace (NO riddles like 'bat and ball', focus on data interpretation, pattern recognition, or work-place logic).
             2. 10 Technical questions tailored to the job and resume skills.
             3. 10 Non-technical/Behavioral questions.
-            
-            Resume: {json.dumps(resume_data)}
-            
-            Provide the response as a JSON list of strings [q1, q2, ..., q30].
-            """
-            response = client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    response_mime_type="application/json"
-                )
-            )
-            questions = json.loads(response.text)
-            # Ensure we have 30
-            if len(questions) < 30:
-                questions.extend(mock_questions[len(questions):])
-            return questions[:30]
+
+            Provide the response as a JSON object: {{"questions": [q1, q2, ..., q30]}}.
+            """, resume_id)
+
+def _parse_interview_questions(response_text):
+    return _structured("generate_interview_questions", schemas.InterviewQuestions, response_text)['questions']
+
+def _pad_questions(questions, mock_questions):
+    # Ensure we have 30
+    if len(questions) < 30:
+        questions.extend(mock_questions[len(questions):])
+    return questions[:30]
+
+def generate_interview_questions_once(resume_data, job_title, resume_id=None):
+    """
+    Makes a single generation attempt and raises on API errors, leaving
+    retry/backoff to the caller (see interviews.tasks). Falls back to mock
+    questions only when no client is configured.
+    """
+    mock_questions = mock_interview_questions(job_title)
+
+    if not llm_available():
+        return mock_questions
+
+    response_text = _generate_content(
+        "generate_interview_questions",
+        contents=_interview_questions_prompt(resume_data, job_title, resume_id),
+        config=schemas.json_config(schemas.InterviewQuestions)
+    )
+    return _pad_questions(_parse_interview_questions(response_text), mock_questions)
+
+def generate_interview_questions(resume_data, job_title, resume_id=None):
+    """
+    Blocking variant with inline retries. Views should not call this; the
+    backoff sleeps hold the calling thread for up to 90 seconds.
+    """
+    mock_questions = mock_interview_questions(job_title)
+
+    retries = 3
+    for attempt in range(retries):
+        try:
+            return generate_interview_questions_once(resume_data, job_title, resume_id)
         except Exception as e:
             print(f"AI API Error (generate_interview_questions) Attempt {attempt+1}: {e}")
+            if isinstance(e, (RateLimitExceeded, NoModelAvailable)):
+                metrics.record_fallback("generate_interview_questions")
+                return mock_questions
             if attempt < retries - 1:
-                import time
-                # Aggressive backoff for 429 quota limits (30s, 60s, 120s)
-                sleep_time = 30 * (2 ** attempt) 
+                if is_quota_error(e):
+                    # The rate limiter holds the retry until quota frees up
+                    continue
+                # Backoff for other transient errors (30s, 60s)
+                sleep_time = 30 * (2 ** attempt)
                 print(f"Waiting {sleep_time}s before retry (Attempt {attempt+1})...")
                 time.sleep(sleep_time)
             else:
+                metrics.record_fallback("generate_interview_questions")
                 return mock_questions
 
-def evaluate_answer(question, answer):
-    import random
-    mock_eval = {
-        "score": random.randint(7, 9),
+async def agenerate_interview_questions(resume_data, job_title, resume_id=None):
+    mock_questions = mock_interview_questions(job_title)
+
+    if not llm_available():
+        return mock_questions
+
+    retries = 3
+    for attempt in range(retries):
+        try:
+            response_text = await _agenerate_content(
+                "generate_interview_questions",
+                contents=_interview_questions_prompt(resume_data, job_title, resume_id),
+                config=schemas.json_config(schemas.InterviewQuestions)
+            )
+            return _pad_questions(_parse_interview_questions(response_text), mock_questions)
+        except Exception as e:
+            print(f"AI API Error (agenerate_interview_questions) Attempt {attempt+1}: {e}")
+            if isinstance(e, (RateLimitExceeded, NoModelAvailable)):
+                metrics.record_fallback("generate_interview_questions")
+                return mock_questions
+            if attempt < retries - 1:
+                if is_quota_error(e):
+                    continue
+                # Same backoff as the sync path, but without holding a thread.
+                await asyncio.sleep(30 * (2 ** attempt))
+            else:
+                metrics.record_fallback("generate_interview_questions")
+                return mock_questions
+
+# --- Answer evaluation ---
+
+def _evaluate_answer_mock(question="", answer=""):
+    return {
+        "score": _mock_random(question, answer).randint(7, 9),
         "feedback": "Excellent response. You showed deep technical knowledge.",
         "strengths": "Clear explanation, good use of terminology.",
         "improvements": "Could be more concise in the middle section."
     }
-    
-    if getattr(settings, 'GEMINI_MOCK_MODE', False):
-        return mock_eval
-        
-    client = get_gemini_client()
-    if not client:
-        return mock_eval
-        
-    try:
-        prompt = f"""
+
+def _evaluate_answer_prompt(question, answer):
+    return f"""
         Evaluate the following interview answer for the given question.
         Question: {question}
         Answer: {answer}
@@ -178,21 +480,115 @@ def evaluate_answer(question, answer):
         - strengths (string)
         - improvements (string)
         """
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json"
-            )
+
+def evaluate_answer(question, answer):
+    mock_eval = _evaluate_answer_mock(question, answer)
+
+    if not llm_available():
+        return mock_eval
+
+    try:
+        response_text = _generate_content(
+            "evaluate_answer",
+            contents=_evaluate_answer_prompt(question, answer),
+            config=schemas.json_config(schemas.AnswerEvaluation)
         )
-        return json.loads(response.text)
+        return _structured("evaluate_answer", schemas.AnswerEvaluation, response_text)
     except Exception as e:
         print(f"AI API Error (evaluate_answer): {e}")
+        metrics.record_fallback("evaluate_answer")
         return mock_eval
 
-def generate_quiz_questions(topic, resume_data=None):
-    import random
-    
+async def aevaluate_answer(question, answer):
+    mock_eval = _evaluate_answer_mock(question, answer)
+
+    if not llm_available():
+        return mock_eval
+
+    try:
+        response_text = await _agenerate_content(
+            "evaluate_answer",
+            contents=_evaluate_answer_prompt(question, answer),
+            config=schemas.json_config(schemas.AnswerEvaluation)
+        )
+        return _structured("evaluate_answer", schemas.AnswerEvaluation, response_text)
+    except Exception as e:
+        print(f"AI API Error (aevaluate_answer): {e}")
+        metrics.record_fallback("evaluate_answer")
+        return mock_eval
+
+def _evaluate_answers_batch_prompt(pairs):
+    items = "\n".join(
+        f"""
+        [{i}]
+        Question: {question}
+        Answer: {answer}
+        """
+        for i, (question, answer) in enumerate(pairs)
+    )
+    return f"""
+        Evaluate each of the following interview answers for its question.
+        {items}
+
+        Return a JSON object with one evaluation per answer, in the same order:
+        {{
+            "evaluations": [
+                {{
+                    "index": (the number in brackets),
+                    "score": (0-10),
+                    "feedback": "string",
+                    "strengths": "string",
+                    "improvements": "string"
+                }}
+            ]
+        }}
+        """
+
+def evaluate_answers_batch(pairs):
+    """
+    Grades a list of (question, answer) pairs with a single Gemini call and
+    returns one evaluation dict per pair, in order. Items the response
+    leaves out or that fail validation are graded individually with
+    evaluate_answer.
+    Callers should keep batches small enough for one response
+    (see AI_EVAL_BATCH_SIZE).
+    """
+    if not pairs:
+        return []
+
+    if not llm_available():
+        return [_evaluate_answer_mock(question, answer) for question, answer in pairs]
+
+    try:
+        response_text = _generate_content(
+            "evaluate_answers_batch",
+            contents=_evaluate_answers_batch_prompt(pairs),
+            config=schemas.json_config(schemas.BatchEvaluation)
+        )
+    except Exception as e:
+        print(f"AI API Error (evaluate_answers_batch): {e}")
+        metrics.record_fallback("evaluate_answers_batch")
+        # Same fallback as evaluate_answer when the API is unavailable
+        return [_evaluate_answer_mock(question, answer) for question, answer in pairs]
+
+    results = [None] * len(pairs)
+    try:
+        items = _structured("evaluate_answers_batch", schemas.BatchEvaluation, response_text)['evaluations']
+        for item in items:
+            index = item.pop('index')
+            if 0 <= index < len(pairs) and results[index] is None:
+                results[index] = item
+    except ValueError as e:
+        print(f"AI API Error (evaluate_answers_batch): {e}")
+
+    for i, (question, answer) in enumerate(pairs):
+        if results[i] is None:
+            results[i] = evaluate_answer(question, answer)
+    return results
+
+# --- Topic quizzes ---
+
+def _quiz_questions_mock(topic):
     # Mock data for fallback testing - more specific than before
     mock_questions = []
     for i in range(30):
@@ -201,151 +597,283 @@ def generate_quiz_questions(topic, resume_data=None):
             "options": [f"Concept A for {topic}", f"Concept B for {topic}", f"Concept C for {topic}", f"Concept D for {topic}"],
             "correct_answer": f"Concept A for {topic}"
         })
+    return mock_questions
 
-    if getattr(settings, 'GEMINI_MOCK_MODE', False) and not getattr(settings, 'GEMINI_API_KEY', None):
-        return mock_questions
-        
-    client = get_gemini_client()
-    if not client:
-        return mock_questions
-        
-    try:
-        context_str = ""
-        if resume_data:
-            context_str = f"Candidate Resume Context: {json.dumps(resume_data)}"
-
-        prompt = f'''
+def _quiz_questions_prompt(topic, resume_data, resume_id=None):
+    prompt = f'''
         Generate 30 multiple-choice questions (MCQs) on the topic: "{topic}".
-        {context_str}
-        
+
         Requirements:
         1. Each question should have 4 options and 1 correct answer.
         2. The level should be intermediate/advanced, tailored to a candidate with the provided resume context if available.
         3. If resume context is provided, ensure questions touch upon technical skills or experience levels mentioned.
-        
-        Provide the output strictly as a JSON list of objects:
-        [
-            {{
-                "question": "Question text here",
-                "options": ["Option A", "Option B", "Option C", "Option D"],
-                "correct_answer": "Option A"
-            }},
-            ...
-        ]
+
+        Provide the output strictly as a JSON object:
+        {{
+            "questions": [
+                {{
+                    "question": "Question text here",
+                    "options": ["Option A", "Option B", "Option C", "Option D"],
+                    "correct_answer": "Option A"
+                }},
+                ...
+            ]
+        }}
+        The correct_answer must repeat the text of one of the options.
         '''
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json"
-            )
+    if resume_data:
+        return _candidate_prompt(resume_data, prompt, resume_id)
+    return prompt
+
+def _parse_quiz_questions(response_text):
+    return _structured("generate_quiz_questions", schemas.QuizQuestions, response_text)['questions']
+
+def generate_quiz_questions(topic, resume_data=None, resume_id=None):
+    mock_questions = _quiz_questions_mock(topic)
+
+    if not llm_available():
+        return mock_questions
+
+    try:
+        response_text = _generate_content(
+            "generate_quiz_questions",
+            contents=_quiz_questions_prompt(topic, resume_data, resume_id),
+            config=schemas.json_config(schemas.QuizQuestions)
         )
-        
-        # Robust parsing to handle potential markdown wrappers or conversational text
-        text = response.text.strip()
-        
-        # Try to find the JSON array start
-        start_idx = text.find('[')
-        end_idx = text.rfind(']')
-        
-        if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-            json_text = text[start_idx:end_idx+1]
-            try:
-                return json.loads(json_text)
-            except json.JSONDecodeError:
-                # If that fails, try the original backtick stripping
-                if text.startswith('```'):
-                    text = text.split('```')[1]
-                    if text.startswith('json'):
-                        text = text[4:]
-                return json.loads(text)
-        
-        return json.loads(text)
+        return _parse_quiz_questions(response_text)
     except Exception as e:
         print(f"AI API Error (generate_quiz_questions): {e}")
-        print(f"Raw Response Content: {response.text if 'response' in locals() else 'No response'}")
+        print(f"Raw Response Content: {response_text if 'response_text' in locals() else 'No response'}")
+        metrics.record_fallback("generate_quiz_questions")
         return mock_questions
 
-def get_next_ai_question(session, candidate_response, current_code=None):
-    """
-    Uses Gemini to generate the next interviewer question or follow-up.
-    """
-    mock_response = "I see. Based on your background, can you describe a challenging technical problem you solved recently?"
-    
-    if getattr(settings, 'GEMINI_MOCK_MODE', False) and not getattr(settings, 'GEMINI_API_KEY', None):
-        return mock_response
-        
-    client = get_gemini_client()
-    if not client:
-        return mock_response
-        
-    import time
-    retries = 3
-    for attempt in range(retries):
-        try:
-            # Construct a more forceful context to prevent repetition
-            prompt = f"""
+async def agenerate_quiz_questions(topic, resume_data=None, resume_id=None):
+    mock_questions = _quiz_questions_mock(topic)
+
+    if not llm_available():
+        return mock_questions
+
+    try:
+        response_text = await _agenerate_content(
+            "generate_quiz_questions",
+            contents=_quiz_questions_prompt(topic, resume_data, resume_id),
+            config=schemas.json_config(schemas.QuizQuestions)
+        )
+        return _parse_quiz_questions(response_text)
+    except Exception as e:
+        print(f"AI API Error (agenerate_quiz_questions): {e}")
+        print(f"Raw Response Content: {response_text if 'response_text' in locals() else 'No response'}")
+        metrics.record_fallback("generate_quiz_questions")
+        return mock_questions
+
+# --- AI voice interviewer ---
+
+AI_QUESTION_MOCK = "I see. Based on your background, can you describe a challenging technical problem you solved recently?"
+
+def _next_question_prompt(session, candidate_response, current_code):
+    # Bounded context: rolling summary + recent turns (see ai_utils.context)
+    context = build_context(session, current_code)
+    summary = f"""
+            Summary of Earlier Conversation:
+            {context.summary}
+""" if context.summary else ""
+    # Construct a more forceful context to prevent repetition
+    return f"""
             You are an expert AI Interviewer for a {session.role} position ({session.experience_level} level).
             Interview Type: {session.interview_type}
             Tech Stack: {session.tech_stack}.
-            
-            Session Progress: {session.transcript.count('AI:')} / {session.num_questions} questions asked.
-            
+
+            Session Progress: {context.questions_asked} / {session.num_questions} questions asked.
+{summary}
             Recent Transcript:
-            {session.transcript}
-            
+            {context.recent}
+
             Candidate's Response: "{candidate_response}"
             Current Code in Editor:
             ```
-            {current_code if current_code else "No code written yet"}
+            {context.code if context.code else "No code written yet"}
             ```
-            
+
             Task Instructions:
             1. Acknowledge the candidate's response and any code they've written.
             2. If the interview type is "Technical", you MUST prioritize asking for code implementation or analyzing the code in the editor.
             3. If no code has been written yet and this is a Technical interview, provide a specific coding challenge or function for the candidate to implement in the editor.
             4. Ask a NEW, distinct question. Do not move on to behavioral questions until technical proficiency is established (if Technical).
-            5. DO NOT repeat questions already in the transcript.
+            5. DO NOT repeat questions already in the transcript or the summary.
             6. If {session.num_questions} questions have been asked, say: "Thank you for your time. The interview is now complete."
             7. Provide only the text for the interviewer to speak.
             """
-            
-            response = client.models.generate_content(
-                model="gemini-2.0-flash",
+
+# Base pause in seconds before retrying the interviewer after a non-quota
+# error; the candidate is waiting, so it stays short (about 0.5s, then 1s).
+NEXT_QUESTION_BACKOFF = 0.5
+
+def _next_question_backoff(attempt):
+    # Jittered so interviews that failed together do not retry together
+    return NEXT_QUESTION_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+def _next_question_fallback(session):
+    metrics.record_fallback("get_next_ai_question")
+    if "Can you tell me more" in session.transcript:
+        return "Moving on, how do you handle tight deadlines and technical debt?"
+    return AI_QUESTION_MOCK
+
+def get_next_ai_question(session, candidate_response, current_code=None):
+    """
+    Uses Gemini to generate the next interviewer question or follow-up.
+    """
+    mock_response = AI_QUESTION_MOCK
+
+    if not llm_available():
+        return mock_response
+
+    prompt = _next_question_prompt(session, candidate_response, current_code)
+    retries = 3
+    for attempt in range(retries):
+        try:
+            response_text = _generate_content(
+                "get_next_ai_question",
                 contents=prompt
             )
-            return response.text.strip()
+            return response_text.strip()
         except Exception as e:
             print(f"AI API Error (get_next_ai_question) Attempt {attempt+1}: {e}")
-            if "429" in str(e) or "quota" in str(e).lower():
+            if isinstance(e, (RateLimitExceeded, NoModelAvailable)):
+                # Already waited for capacity until the deadline
+                return _next_question_fallback(session)
+            if is_quota_error(e):
                 if attempt < retries - 1:
-                    sleep_time = 2 * (2 ** attempt)
-                    print(f"Quota hit. Waiting {sleep_time}s...")
-                    time.sleep(sleep_time)
+                    # The rate limiter holds the retry until quota frees up
                     continue
-            
+
             if attempt == retries - 1:
-                # Last resort: try a different model if it's a model-based quota
-                try:
-                    prompt += "\nNote: This is a retry due to technical issues. Please be brief."
-                    response = client.models.generate_content(
-                        model="gemini-1.5-flash",
-                        contents=prompt
-                    )
-                    return response.text.strip()
-                except:
-                    pass
-                
-                if "Can you tell me more" in session.transcript:
-                    return "Moving on, how do you handle tight deadlines and technical debt?"
-                return mock_response
+                # The router has already tried every configured model
+                return _next_question_fallback(session)
+            time.sleep(_next_question_backoff(attempt))
     return mock_response
 
-def generate_detailed_feedback(transcript, role):
+async def aget_next_ai_question(session, candidate_response, current_code=None):
     """
-    Analyzes an interview transcript using Gemini to provide structured feedback.
+    Async counterpart of get_next_ai_question. Only reads ``session``
+    attributes, so it is safe to call with an instance loaded in async code.
+    """
+    mock_response = AI_QUESTION_MOCK
+
+    if not llm_available():
+        return mock_response
+
+    prompt = _next_question_prompt(session, candidate_response, current_code)
+    retries = 3
+    for attempt in range(retries):
+        try:
+            response_text = await _agenerate_content(
+                "get_next_ai_question",
+                contents=prompt
+            )
+            return response_text.strip()
+        except Exception as e:
+            print(f"AI API Error (aget_next_ai_question) Attempt {attempt+1}: {e}")
+            if isinstance(e, (RateLimitExceeded, NoModelAvailable)):
+                return _next_question_fallback(session)
+            if is_quota_error(e):
+                if attempt < retries - 1:
+                    continue
+
+            if attempt == retries - 1:
+                return _next_question_fallback(session)
+            await asyncio.sleep(_next_question_backoff(attempt))
+    return mock_response
+
+async def astream_next_ai_question(session, candidate_response, current_code=None):
+    """
+    Streaming variant of aget_next_ai_question. Yields the interviewer's reply
+    in chunks so the room can start speaking before generation finishes.
+    Retries only happen before the first chunk; a stream that breaks midway
+    ends early with what was already sent.
+    """
+    mock_response = AI_QUESTION_MOCK
+
+    if not llm_available():
+        yield mock_response
+        return
+
+    prompt = _next_question_prompt(session, candidate_response, current_code)
+    retries = 3
+    for attempt in range(retries):
+        sent = False
+        try:
+            async for text in _astream_content(
+                "get_next_ai_question",
+                contents=prompt
+            ):
+                sent = True
+                yield text
+            return
+        except Exception as e:
+            print(f"AI API Error (astream_next_ai_question) Attempt {attempt+1}: {e}")
+            if sent:
+                return
+            if isinstance(e, (RateLimitExceeded, NoModelAvailable)):
+                yield _next_question_fallback(session)
+                return
+            if is_quota_error(e):
+                if attempt < retries - 1:
+                    continue
+
+            if attempt == retries - 1:
+                yield _next_question_fallback(session)
+                return
+            await asyncio.sleep(_next_question_backoff(attempt))
+
+def _transcript_summary_mock(previous_summary, turns):
+    # Keep the questions asked plus a clipped line per answer
+    lines = [previous_summary] if previous_summary else []
+    for turn in turns:
+        lines.append(turn if len(turn) <= 160 else turn[:157] + "...")
+    return "\n".join(lines)
+
+def _transcript_summary_prompt(previous_summary, turns, role, max_words):
+    joined = "\n".join(turns)
+    return f"""
+        You are keeping notes on a {role} interview.
+
+        Existing Notes:
+        {previous_summary or "None yet"}
+
+        New Transcript Turns:
+        {joined}
+
+        Task:
+        Rewrite the notes to cover the existing notes and the new turns in at most {max_words} words.
+        List every question the interviewer has asked (briefly), and for each answer note the key
+        points, strengths and weaknesses. Return plain text only.
+        """
+
+def summarize_transcript(previous_summary, turns, role):
     """
-    mock_feedback = {
+    Folds ``turns`` into the rolling interview summary used by
+    ai_utils.context to keep interviewer prompts bounded.
+    """
+    if not llm_available():
+        return _transcript_summary_mock(previous_summary, turns)
+
+    # Tokens are roughly 3/4 of a word
+    max_words = summary_token_budget() * 3 // 4
+    try:
+        response_text = _generate_content(
+            "summarize_transcript",
+            contents=_transcript_summary_prompt(previous_summary, turns, role, max_words)
+        )
+        return response_text.strip()
+    except Exception as e:
+        print(f"AI API Error (summarize_transcript): {e}")
+        metrics.record_fallback("summarize_transcript")
+        return _transcript_summary_mock(previous_summary, turns)
+
+# --- AI interview feedback ---
+
+def _detailed_feedback_mock():
+    return {
         "communication_score": 85,
         "technical_score": 80,
         "problem_solving_score": 75,
@@ -364,20 +892,13 @@ def generate_detailed_feedback(transcript, role):
         }
     }
 
-    if getattr(settings, 'GEMINI_MOCK_MODE', False):
-        return mock_feedback
-        
-    client = get_gemini_client()
-    if not client:
-        return mock_feedback
-        
-    try:
-        prompt = f"""
+def _detailed_feedback_prompt(transcript, role):
+    return f"""
         Analyze the following interview transcript and code for a {role} position.
-        
+
         Transcript:
         {transcript}
-        
+
         Task:
         Evaluate the candidate's communication, technical depth, and coding ability if code was provided in the transcript or context.
         Provide a detailed evaluation in JSON format with the following structure:
@@ -401,15 +922,45 @@ def generate_detailed_feedback(transcript, role):
             }}
         }}
         """
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json"
-            )
+
+def generate_detailed_feedback(transcript, role):
+    """
+    Analyzes an interview transcript using Gemini to provide structured feedback.
+    """
+    mock_feedback = _detailed_feedback_mock()
+
+    if not llm_available():
+        return mock_feedback
+
+    try:
+        response_text = _generate_content(
+            "generate_detailed_feedback",
+            contents=_detailed_feedback_prompt(transcript, role),
+            config=schemas.json_config(schemas.DetailedFeedback)
         )
-        return json.loads(response.text)
+        return _structured("generate_detailed_feedback", schemas.DetailedFeedback, response_text)
     except Exception as e:
         print(f"AI API Error (generate_detailed_feedback): {e}")
+        metrics.record_fallback("generate_detailed_feedback")
         return mock_feedback
 
+async def agenerate_detailed_feedback(transcript, role):
+    """
+    Async counterpart of generate_detailed_feedback.
+    """
+    mock_feedback = _detailed_feedback_mock()
+
+    if not llm_available():
+        return mock_feedback
+
+    try:
+        response_text = await _agenerate_content(
+            "generate_detailed_feedback",
+            contents=_detailed_feedback_prompt(transcript, role),
+            config=schemas.json_config(schemas.DetailedFeedback)
+        )
+        return _structured("generate_detailed_feedback", schemas.DetailedFeedback, response_text)
+    except Exception as e:
+        print(f"AI API Error (agenerate_detailed_feedback): {e}")
+        metrics.record_fallback("generate_detailed_feedback")
+        return mock_feedback
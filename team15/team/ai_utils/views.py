@@ -1,3 +1,31 @@
-from django.shortcuts import render
+import hmac
 
-# Create your views here.
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+
+from .background import job_status as summarize_job
+from .metrics import render_prometheus
+from .models import BackgroundJob
+
+
+@login_required
+def job_status(request, job_id):
+    job = get_object_or_404(BackgroundJob, id=job_id)
+    if job.owner_id != request.user.id and not request.user.is_staff:
+        raise Http404
+    return JsonResponse(summarize_job(job))
+
+
+def metrics(request):
+    """
+    Prometheus scrape endpoint. Open to staff users, or to scrapers sending
+    ``Authorization: Bearer <AI_METRICS_TOKEN>``.
+    """
+    token = getattr(settings, 'AI_METRICS_TOKEN', '')
+    bearer = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    authorized = (token and hmac.compare_digest(bearer, token)) or request.user.is_staff
+    if not authorized:
+        raise Http404
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
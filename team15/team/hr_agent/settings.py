@@ -91,6 +91,24 @@ DATABASES = {
 
 #DATABASES['default'] = dj_database_url.parse(config('DATABASE_URL'))
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/ref/settings/#caches
+# 'default' lives in each process. Set REDIS_URL to add 'shared', a Redis
+# cache every web and worker process sees; the rate limiter and single-flight
+# use it when set.
+
+REDIS_URL = os.environ.get('REDIS_URL', '')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+if REDIS_URL:
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -132,6 +150,29 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Resume uploads (see jobs/extraction.py): larger files are rejected and
+# only the first RESUME_MAX_PAGES pages are read. PDFs of at least
+# RESUME_EXTRACTION_PARALLEL_PAGES pages are split across a process pool.
+RESUME_MAX_BYTES = int(os.environ.get('RESUME_MAX_BYTES', 10 * 1024 * 1024))
+RESUME_MAX_PAGES = int(os.environ.get('RESUME_MAX_PAGES', 50))
+RESUME_EXTRACTION_PARALLEL_PAGES = int(os.environ.get('RESUME_EXTRACTION_PARALLEL_PAGES', 8))
+RESUME_EXTRACTION_WORKERS = int(os.environ.get('RESUME_EXTRACTION_WORKERS', 0)) or None
+
+# Batch skill matching (see jobs/matching.py): resumes scored per matrix
+# product, bounding memory.
+MATCHING_CHUNK_ROWS = int(os.environ.get('MATCHING_CHUNK_ROWS', 2048))
+
+# Local TF-IDF and skill pre-screen (see jobs/prescreen.py): analyze_match
+# only runs for resumes scoring at least PRESCREEN_THRESHOLD (0-100) or in
+# the job's best PRESCREEN_TOP_K.
+PRESCREEN_ENABLED = os.environ.get('PRESCREEN_ENABLED', 'True') == 'True'
+PRESCREEN_THRESHOLD = float(os.environ.get('PRESCREEN_THRESHOLD', 40))
+PRESCREEN_TOP_K = int(os.environ.get('PRESCREEN_TOP_K', 25))
+PRESCREEN_SKILL_WEIGHT = float(os.environ.get('PRESCREEN_SKILL_WEIGHT', 0.6))
+
+# Jobs per page of the job list (see jobs/search.py)
+JOB_SEARCH_PAGE_SIZE = int(os.environ.get('JOB_SEARCH_PAGE_SIZE', 24))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -146,6 +187,119 @@ GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', '')
 # Enable Mock Mode if key is empty or is the placeholder
 GEMINI_MOCK_MODE = not GEMINI_API_KEY or GEMINI_API_KEY == 'your_gemini_api_key_here'
 
+# Send Gemini requests elsewhere, e.g. to `manage.py fake_gemini` for load tests.
+GEMINI_BASE_URL = os.environ.get('GEMINI_BASE_URL', '')
+
+# Pooled Gemini HTTP client (one per worker process, see ai_utils/client.py)
+GEMINI_HTTP_TIMEOUT = float(os.environ.get('GEMINI_HTTP_TIMEOUT', 60))
+GEMINI_POOL_MAX_CONNECTIONS = int(os.environ.get('GEMINI_POOL_MAX_CONNECTIONS', 20))
+GEMINI_POOL_MAX_KEEPALIVE = int(os.environ.get('GEMINI_POOL_MAX_KEEPALIVE', 10))
+GEMINI_POOL_KEEPALIVE_EXPIRY = float(os.environ.get('GEMINI_POOL_KEEPALIVE_EXPIRY', 30))
+
+# Other LLM providers (see ai_utils/providers.py); each is skipped when unset.
+OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
+OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL', '')
+# Any OpenAI-compatible local server, e.g. Ollama at http://localhost:11434/v1
+LOCAL_LLM_BASE_URL = os.environ.get('LOCAL_LLM_BASE_URL', '')
+LOCAL_LLM_API_KEY = os.environ.get('LOCAL_LLM_API_KEY', '')
+
+# Models in order of preference (see ai_utils/router.py). Calls go to the
+# healthy model with the best recent latency and fail over down the list.
+AI_MODELS = [
+    {'name': 'gemini-2.0-flash', 'provider': 'gemini'},
+    {'name': 'gemini-1.5-flash', 'provider': 'gemini'},
+    {'name': os.environ.get('OPENAI_MODEL', 'gpt-4o-mini'), 'provider': 'openai'},
+    {'name': os.environ.get('LOCAL_LLM_MODEL', 'llama3.1'), 'provider': 'local'},
+]
+# Restrict a function to some models, e.g. {'parse_resume': ['gemini-2.0-flash']}
+AI_MODEL_ROUTES = {}
+# Circuit breaker: open after N consecutive failures or this error rate,
+# then probe again after the cooldown (seconds).
+AI_BREAKER_FAILURES = 5
+AI_BREAKER_ERROR_RATE = 0.5
+AI_BREAKER_COOLDOWN = 30
+# Hedged requests (see ai_utils/hedging.py): a function listed here sends a
+# backup request when its call is slower than its recent p90, and uses
+# whichever answers first. Off unless AI_HEDGING_ENABLED=True.
+AI_HEDGING = {
+    'get_next_ai_question': {'percentile': 0.9, 'backup_models': ['gemini-1.5-flash']},
+} if os.environ.get('AI_HEDGING_ENABLED', 'False') == 'True' else {}
+
+# LLM response cache (see ai_utils/cache.py). AI_CACHE_BACKEND names an entry
+# in CACHES to share responses between workers; None keeps them in-process.
+AI_CACHE_BACKEND = os.environ.get('AI_CACHE_BACKEND') or None
+AI_CACHE_MAX_ENTRIES = int(os.environ.get('AI_CACHE_MAX_ENTRIES', 1000))
+AI_CACHE_MAX_BYTES = int(os.environ.get('AI_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+# Per-function TTL overrides in seconds, e.g. {'analyze_match': 3600}; 0 disables.
+AI_CACHE_TTLS = {}
+# Gemini context caching of the instructions + resume prefix shared by
+# candidate prompts (see ai_utils/prompt_cache.py). Smaller prefixes are
+# sent inline; uploads live for AI_PROMPT_CACHE_TTL seconds.
+AI_PROMPT_CACHE_ENABLED = os.environ.get('AI_PROMPT_CACHE_ENABLED', 'True') == 'True'
+AI_PROMPT_CACHE_TTL = int(os.environ.get('AI_PROMPT_CACHE_TTL', 600))
+AI_PROMPT_CACHE_MIN_TOKENS = int(os.environ.get('AI_PROMPT_CACHE_MIN_TOKENS', 1024))
+
+# Concurrent identical LLM calls share one model call (see
+# ai_utils/singleflight.py). AI_SINGLEFLIGHT_BACKEND must be a cache shared by
+# all workers to deduplicate across processes; `manage.py check` warns
+# (ai_utils.W002) while it is the per-process 'default' cache.
+AI_SINGLEFLIGHT_ENABLED = os.environ.get('AI_SINGLEFLIGHT_ENABLED', 'True') == 'True'
+AI_SINGLEFLIGHT_BACKEND = os.environ.get('AI_SINGLEFLIGHT_BACKEND', 'shared' if REDIS_URL else 'default')
+
+# Client-side Gemini rate limiting (see ai_utils/ratelimit.py). Budgets are
+# per model per minute; AI_RATE_LIMIT_BACKEND must be a Redis or Memcached
+# cache shared by all workers for a cluster-wide limit (the database cache's
+# incr is not atomic). With the per-process 'default' cache each worker gets
+# the whole budget, and `manage.py check` warns (ai_utils.W001).
+AI_RATE_LIMIT_ENABLED = os.environ.get('AI_RATE_LIMIT_ENABLED', 'True') == 'True'
+AI_RATE_LIMIT_BACKEND = os.environ.get('AI_RATE_LIMIT_BACKEND', 'shared' if REDIS_URL else 'default')
+AI_RATE_LIMITS = {
+    'default': {
+        'rpm': int(os.environ.get('GEMINI_RPM', 15)),
+        'tpm': int(os.environ.get('GEMINI_TPM', 1000000)),
+    },
+}
+# Share of each budget held back for interactive calls.
+AI_RATE_INTERACTIVE_RESERVE = 0.25
+# Seconds a call may wait for capacity, per priority class.
+AI_RATE_DEADLINES = {'interactive': 20, 'batch': 300}
+
+# Record/replay of LLM responses for reproducible benchmarks (see
+# ai_utils/cassettes.py): 'record' saves every prompt/response pair, 'replay'
+# serves them without network I/O, optionally sleeping the recorded latency.
+AI_RECORD_MODE = os.environ.get('AI_RECORD_MODE', '')
+AI_CASSETTE_PATH = os.environ.get('AI_CASSETTE_PATH') or BASE_DIR / 'ai_cassettes.sqlite3'
+AI_REPLAY_LATENCY = os.environ.get('AI_REPLAY_LATENCY', 'False') == 'True'
+
+# LLM call telemetry (see ai_utils/metrics.py), served at /metrics to staff
+# users or to scrapers sending "Authorization: Bearer <AI_METRICS_TOKEN>".
+AI_METRICS_ENABLED = os.environ.get('AI_METRICS_ENABLED', 'True') == 'True'
+AI_METRICS_TOKEN = os.environ.get('AI_METRICS_TOKEN', '')
+# Days of LLMCall rows kept for `manage.py ai_metrics`; /metrics counters are
+# cumulative regardless. 0 keeps every row.
+AI_METRICS_RETENTION_DAYS = int(os.environ.get('AI_METRICS_RETENTION_DAYS', 30))
+
+# AI interviewer prompt context (see ai_utils/context.py): the last
+# AI_CONTEXT_RECENT_TURNS turns are sent verbatim, older turns as a rolling
+# summary refreshed every AI_CONTEXT_SUMMARY_EVERY turns. Budgets are in tokens.
+AI_CONTEXT_RECENT_TURNS = int(os.environ.get('AI_CONTEXT_RECENT_TURNS', 6))
+AI_CONTEXT_SUMMARY_EVERY = int(os.environ.get('AI_CONTEXT_SUMMARY_EVERY', 4))
+AI_CONTEXT_TOKEN_BUDGET = int(os.environ.get('AI_CONTEXT_TOKEN_BUDGET', 1500))
+AI_CONTEXT_CODE_TOKENS = int(os.environ.get('AI_CONTEXT_CODE_TOKENS', 500))
+
+# Mock interview answers graded per LLM call (see interviews/tasks.py).
+AI_EVAL_BATCH_SIZE = int(os.environ.get('AI_EVAL_BATCH_SIZE', 10))
+
+# Background jobs for LLM work (see ai_utils/background.py).
+# 'thread' runs jobs inside the web process, 'worker' leaves them to
+# `manage.py run_workers`, 'sync' runs them inline.
+AI_JOBS_MODE = os.environ.get('AI_JOBS_MODE', 'thread')
+# Max jobs running at once per queue across all workers.
+AI_JOB_QUEUES = {'interactive': 8, 'default': 4, 'batch': 2}
+# Seconds a claimed job stays locked without a heartbeat (its worker renews the
+# lock every third of this while the job runs) before another worker may pick it up.
+AI_JOB_VISIBILITY_TIMEOUT = int(os.environ.get('AI_JOB_VISIBILITY_TIMEOUT', 300))
+
 # Force server reload for template updates
 STATIC_URL = "/static/"
 
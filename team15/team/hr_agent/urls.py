@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from ai_utils.views import metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -9,6 +10,8 @@ urlpatterns = [
     path('jobs/', include('jobs.urls')),
     path('interviews/', include('interviews.urls')),
     path('lms/', include('lms.urls')),
+    path('ai/', include('ai_utils.urls')),
+    path('metrics', metrics, name='metrics'),
     path('', include('quiz.urls')),  # Includes quiz urls at root level for simplicity (e.g. /quiz/)
 ]
 
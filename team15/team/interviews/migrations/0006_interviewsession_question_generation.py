@@ -0,0 +1,33 @@
+# Generated by Django 4.2.28 on 2026-10-17 00:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interviews', '0005_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interviewsession',
+            name='generation_attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='interviewsession',
+            name='generation_error',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='interviewsession',
+            name='next_generation_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='interviewsession',
+            name='questions_status',
+            field=models.CharField(choices=[('pending', 'Preparing'), ('ready', 'Ready')], default='ready', max_length=20),
+        ),
+    ]
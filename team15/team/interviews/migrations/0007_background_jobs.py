@@ -0,0 +1,37 @@
+# Generated by Django 4.2.28 on 2026-10-17 00:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_utils', '0001_initial'),
+        ('interviews', '0006_interviewsession_question_generation'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='interviewsession',
+            name='generation_attempts',
+        ),
+        migrations.RemoveField(
+            model_name='interviewsession',
+            name='generation_error',
+        ),
+        migrations.RemoveField(
+            model_name='interviewsession',
+            name='next_generation_at',
+        ),
+        migrations.AddField(
+            model_name='interviewanswer',
+            name='is_evaluated',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='interviewsession',
+            name='questions_job',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='ai_utils.backgroundjob'),
+        ),
+    ]
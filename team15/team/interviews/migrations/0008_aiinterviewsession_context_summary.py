@@ -0,0 +1,23 @@
+# Generated by Django 4.2.28 on 2026-10-17 00:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interviews', '0007_background_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aiinterviewsession',
+            name='context_summary',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='aiinterviewsession',
+            name='summarized_turns',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.28 on 2026-10-17 01:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interviews', '0008_aiinterviewsession_context_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interviewanswer',
+            name='grading_token',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name='interviewanswer',
+            name='grading_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
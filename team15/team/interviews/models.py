@@ -3,6 +3,10 @@ from django.conf import settings
 from jobs.models import Job, Application
 
 class InterviewSession(models.Model):
+    QUESTIONS_STATUS_CHOICES = (
+        ('pending', 'Preparing'),
+        ('ready', 'Ready'),
+    )
     candidate = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     job = models.ForeignKey(Job, on_delete=models.CASCADE)
     overall_score = models.FloatField(default=0.0)
@@ -12,6 +16,10 @@ class InterviewSession(models.Model):
     is_completed = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Background question generation (see interviews/tasks.py)
+    questions_status = models.CharField(max_length=20, choices=QUESTIONS_STATUS_CHOICES, default='ready')
+    questions_job = models.ForeignKey('ai_utils.BackgroundJob', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
     def __str__(self):
         return f"Interview of {self.candidate.username} for {self.job.title}"
 
@@ -30,6 +38,11 @@ class InterviewAnswer(models.Model):
     feedback = models.TextField(blank=True, null=True)
     strengths = models.TextField(blank=True, null=True)
     improvements = models.TextField(blank=True, null=True)
+    # False until the grading job has scored this answer
+    is_evaluated = models.BooleanField(default=True)
+    # The grading run holding this answer, and until when (see interviews/tasks.py)
+    grading_token = models.CharField(max_length=32, blank=True, null=True)
+    grading_until = models.DateTimeField(blank=True, null=True)
 
     def __str__(self):
         return f"Answer to {self.question}"
@@ -61,6 +74,9 @@ class AIInterviewSession(models.Model):
     
     vapi_call_id = models.CharField(max_length=255, blank=True, null=True)
     transcript = models.TextField(blank=True, null=True)
+    # Rolling summary of the first `summarized_turns` turns (see ai_utils/context.py)
+    context_summary = models.TextField(blank=True, default='')
+    summarized_turns = models.IntegerField(default=0)
     
     # Feedback Scores (0-100)
     communication_score = models.FloatField(default=0.0)
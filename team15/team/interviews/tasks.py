@@ -0,0 +1,269 @@
+"""
+Background jobs for mock and AI interviews (see ai_utils/background.py).
+
+Question generation, answer grading and transcript feedback used to run
+inside the request; the views now queue these jobs and return immediately.
+
+Grading runs claim the answers they score with a conditional UPDATE
+(``grading_token``/``grading_until``), so a grading job and the
+finalization job never grade the same answer twice. A claim left by a
+crashed run expires after ``GRADING_CLAIM_SECONDS``.
+"""
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ai_utils.background import aenqueue, background_task, enqueue, is_last_attempt
+from ai_utils.context import needs_summary, pending_summary_turns
+from ai_utils.utils import (
+    generate_interview_questions_once,
+    mock_interview_questions,
+    evaluate_answers_batch,
+    generate_detailed_feedback,
+    summarize_transcript,
+)
+from jobs.models import Application
+from .models import InterviewSession, InterviewQuestion, InterviewAnswer, AIInterviewSession
+
+
+def _save_questions(session, questions_list):
+    with transaction.atomic():
+        session.questions.all().delete()
+        InterviewQuestion.objects.bulk_create([
+            InterviewQuestion(session=session, text=q_text, order=i + 1)
+            for i, q_text in enumerate(questions_list)
+        ])
+        session.questions_status = 'ready'
+        session.save(update_fields=['questions_status'])
+
+
+# Backoff of 30s, 60s between attempts matches the old inline retry schedule.
+@background_task(queue='interactive', max_attempts=3, backoff=30)
+def generate_session_questions(session_id):
+    session = InterviewSession.objects.select_related('job').get(id=session_id)
+    if session.questions_status == 'ready':
+        return {'questions': session.questions.count()}
+
+    application = Application.objects.filter(job=session.job, candidate=session.candidate).select_related('resume').first()
+    resume = application.resume if application else None
+    resume_data = resume.parsed_data if resume else None
+
+    try:
+        questions_list = generate_interview_questions_once(resume_data, session.job.title, resume.id if resume else None)
+    except Exception:
+        if not is_last_attempt():
+            raise
+        # Out of retries: fall back to the standard question set, as before.
+        questions_list = mock_interview_questions(session.job.title)
+
+    _save_questions(session, questions_list)
+    return {'questions': len(questions_list)}
+
+
+def start_question_generation(session):
+    """Marks ``session`` as preparing and queues question generation."""
+    session.questions_status = 'pending'
+    session.save(update_fields=['questions_status'])
+    session.questions_job = enqueue(
+        generate_session_questions.name,
+        owner=session.candidate,
+        dedupe_key=f"interview-questions:{session.id}",
+        session_id=session.id,
+    )
+    session.save(update_fields=['questions_job'])
+
+
+GRADING_CLAIM_SECONDS = 300
+# Seconds between checks while another run grades the last answers.
+GRADING_POLL_INTERVAL = 1.0
+
+
+def _unclaimed(now):
+    return Q(grading_until__isnull=True) | Q(grading_until__lte=now)
+
+
+def _claim_answers(session_id, token, limit):
+    """Claims up to ``limit`` unevaluated answers no other run holds; returns them."""
+    now = timezone.now()
+    pending = InterviewAnswer.objects.filter(question__session_id=session_id, is_evaluated=False)
+    ids = list(pending.filter(_unclaimed(now)).order_by('question__order').values_list('id', flat=True)[:limit])
+    if not ids:
+        return []
+    InterviewAnswer.objects.filter(id__in=ids, is_evaluated=False).filter(_unclaimed(now)).update(
+        grading_token=token,
+        grading_until=now + timedelta(seconds=GRADING_CLAIM_SECONDS),
+    )
+    return list(
+        InterviewAnswer.objects.filter(id__in=ids, grading_token=token, is_evaluated=False)
+        .select_related('question').order_by('question__order')
+    )
+
+
+def grade_pending_answers(session_id, wait=False):
+    """
+    Grades the session's unevaluated answers no other run has claimed, one
+    batched LLM call per AI_EVAL_BATCH_SIZE answers, including answers
+    submitted while it runs. With ``wait`` it also waits until answers
+    claimed by another run are graded, or grades them once that claim
+    expires. Returns how many answers this call graded.
+    """
+    batch_size = eval_batch_size()
+    token = uuid.uuid4().hex
+    graded = 0
+    while True:
+        chunk = _claim_answers(session_id, token, batch_size)
+        if not chunk:
+            if wait and InterviewAnswer.objects.filter(question__session_id=session_id, is_evaluated=False).exists():
+                time.sleep(GRADING_POLL_INTERVAL)
+                continue
+            return graded
+
+        try:
+            evaluations = evaluate_answers_batch([(a.question.text, a.answer_text) for a in chunk])
+        except Exception:
+            InterviewAnswer.objects.filter(id__in=[a.id for a in chunk], grading_token=token).update(
+                grading_token=None, grading_until=None,
+            )
+            raise
+        with transaction.atomic():
+            for answer, evaluation in zip(chunk, evaluations):
+                # Skipped if the claim expired and another run took the answer over.
+                graded += InterviewAnswer.objects.filter(id=answer.id, grading_token=token, is_evaluated=False).update(
+                    score=evaluation.get('score', 0),
+                    feedback=evaluation.get('feedback', ''),
+                    strengths=evaluation.get('strengths', ''),
+                    improvements=evaluation.get('improvements', ''),
+                    is_evaluated=True,
+                    grading_token=None,
+                    grading_until=None,
+                )
+
+
+def eval_batch_size():
+    return max(1, getattr(settings, 'AI_EVAL_BATCH_SIZE', 10))
+
+
+@background_task(queue='interactive', max_attempts=3)
+def grade_answers(session_id):
+    return {'graded': grade_pending_answers(session_id)}
+
+
+async def aqueue_answer_grading(session_id, owner):
+    """
+    Queues a grading batch once a full chunk of unclaimed answers is
+    waiting. A running job may have finished claiming, so only a queued one
+    is reused.
+    """
+    pending = await (
+        InterviewAnswer.objects.filter(question__session_id=session_id, is_evaluated=False)
+        .filter(_unclaimed(timezone.now())).acount()
+    )
+    if pending >= eval_batch_size():
+        await aenqueue(
+            grade_answers.name,
+            owner=owner,
+            dedupe_key=f"interview-grade:{session_id}",
+            dedupe_running=False,
+            session_id=session_id,
+        )
+
+
+def evaluate_session(session):
+    answers = InterviewAnswer.objects.filter(question__session=session)
+    if not answers:
+        return
+
+    total_score = sum(a.score for a in answers)
+    total_questions = session.questions.count()
+    if total_questions == 0:
+        avg_score = 0
+    else:
+        avg_score = (total_score / (total_questions * 10)) * 100
+
+    session.overall_score = avg_score
+    session.is_completed = True
+    session.save()
+
+    # Update application status
+    app = Application.objects.filter(job=session.job, candidate=session.candidate).first()
+    if app:
+        app.status = 'interview' # Keep as interview but completed
+        app.save()
+
+
+@background_task(queue='interactive', max_attempts=3)
+def finalize_session(session_id):
+    session = InterviewSession.objects.get(id=session_id)
+    if session.is_completed:
+        return {'overall_score': session.overall_score}
+
+    # Grade whatever the chunked grading jobs have not reached yet, and wait
+    # for the answers they are still grading.
+    grade_pending_answers(session.id, wait=True)
+    evaluate_session(session)
+    return {'overall_score': session.overall_score}
+
+
+def queue_session_finalization(session):
+    """Queues scoring of ``session``; repeated calls share one active job."""
+    return enqueue(
+        finalize_session.name,
+        owner=session.candidate,
+        dedupe_key=f"interview-finalize:{session.id}",
+        session_id=session.id,
+    )
+
+
+@background_task(queue='interactive', max_attempts=3)
+def generate_ai_feedback(session_id):
+    session = AIInterviewSession.objects.get(id=session_id)
+
+    # Generate detailed feedback using Gemini
+    feedback = generate_detailed_feedback(session.transcript, session.role)
+
+    session.communication_score = feedback.get('communication_score', 0)
+    session.technical_score = feedback.get('technical_score', 0)
+    session.problem_solving_score = feedback.get('problem_solving_score', 0)
+    session.cultural_fit_score = feedback.get('cultural_fit_score', 0)
+    session.confidence_score = feedback.get('confidence_score', 0)
+    session.clarity_score = feedback.get('clarity_score', 0)
+    session.overall_score = feedback.get('overall_score', 0)
+    session.feedback_summary = feedback.get('feedback_summary', '')
+    session.detailed_feedback = feedback.get('detailed_feedback', {})
+
+    session.is_completed = True
+    session.save()
+    return {'redirect_url': f'/interviews/ai-report/{session.id}/'}
+
+
+@background_task(queue='default', max_attempts=2)
+def summarize_ai_transcript(session_id):
+    session = AIInterviewSession.objects.get(id=session_id)
+    turns = pending_summary_turns(session)
+    if not turns:
+        return {'summarized_turns': session.summarized_turns}
+
+    summary = summarize_transcript(session.context_summary, turns, session.role)
+    covered = session.summarized_turns + len(turns)
+    # Skip the write if another run already moved the summary on
+    AIInterviewSession.objects.filter(id=session.id, summarized_turns=session.summarized_turns).update(
+        context_summary=summary,
+        summarized_turns=covered,
+    )
+    return {'summarized_turns': covered}
+
+
+async def aqueue_transcript_summary(session, owner):
+    """Queues a summary refresh once enough turns have left the recent window."""
+    if needs_summary(session):
+        await aenqueue(
+            summarize_ai_transcript.name,
+            owner=owner,
+            dedupe_key=f"ai-summary:{session.id}",
+            session_id=session.id,
+        )
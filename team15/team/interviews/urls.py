@@ -4,6 +4,7 @@ from . import views
 urlpatterns = [
     path('start/<int:application_id>/', views.start_interview, name='mock_interview'),
     path('question/<int:session_id>/', views.get_question, name='get_question'),
+    path('status/<int:session_id>/', views.question_status, name='question_status'),
     path('submit-answer/', views.submit_answer, name='submit_answer'),
     path('report/<int:session_id>/', views.interview_report, name='interview_report'),
     path('finish/<int:session_id>/', views.finish_interview, name='finish_interview'),
@@ -15,6 +16,7 @@ urlpatterns = [
     path('ai-start/', views.start_ai_interview, name='start_ai_interview'),
     path('ai-room/<int:session_id>/', views.ai_interview_room, name='ai_interview_room'),
     path('ai-chat/<int:session_id>/', views.chat_with_interviewer, name='chat_with_interviewer'),
+    path('ai-chat-stream/<int:session_id>/', views.stream_interviewer_reply, name='stream_interviewer_reply'),
     path('ai-process/<int:session_id>/', views.process_ai_feedback, name='process_ai_feedback'),
     path('ai-report/<int:session_id>/', views.ai_interview_report, name='ai_interview_report'),
     path('delete-session/<int:session_id>/', views.delete_interview_session, name='delete_interview_session'),
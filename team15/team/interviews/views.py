@@ -2,17 +2,26 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from .models import InterviewSession, InterviewQuestion, InterviewAnswer, LiveInterview, AIInterviewSession, Notification
 from jobs.models import Application, Job
-from ai_utils.utils import (
-    generate_interview_questions, 
-    evaluate_answer, 
-    get_next_ai_question, 
-    generate_detailed_feedback
+from accounts.decorators import async_login_required
+from .tasks import (
+    start_question_generation, queue_session_finalization, aqueue_answer_grading,
+    generate_ai_feedback, aqueue_transcript_summary
 )
-from django.http import JsonResponse
+from ai_utils.background import aenqueue, job_status
+from ai_utils.utils import aget_next_ai_question, astream_next_ai_question
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 import json
 import uuid
 from django.contrib import messages
 
+async def _aget_object_or_404(queryset, **kwargs):
+    """Async get_object_or_404 for the LLM-bound views below."""
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+
 @login_required
 def start_interview(request, application_id):
     application = get_object_or_404(Application, id=application_id, candidate=request.user)
@@ -24,26 +33,40 @@ def start_interview(request, application_id):
         is_completed=False
     )
     
-    if created or session.questions.count() == 0:
-        # Generate questions using AI only for brand-new sessions
-        if not created:
-             session.questions.all().delete()
-             
-        resume_data = application.resume.parsed_data
-        questions_list = generate_interview_questions(resume_data, application.job.title)
-        
-        for i, q_text in enumerate(questions_list):
-            InterviewQuestion.objects.create(
-                session=session,
-                text=q_text,
-                order=i+1
-            )
+    generation_failed = session.questions_status == 'pending' and (
+        session.questions_job is None or session.questions_job.status == 'failed'
+    )
+    if generation_failed or (session.questions_status == 'ready' and session.questions.count() == 0):
+        # Questions are generated by a background job; the page polls
+        # question_status until they are ready.
+        start_question_generation(session)
             
     return render(request, 'interviews/interview.html', {'session': session})
 
+@login_required
+def question_status(request, session_id):
+    session = get_object_or_404(InterviewSession, id=session_id, candidate=request.user)
+    status = {'status': None, 'attempts': 0, 'retry_in': None, 'error': None}
+    if session.questions_job:
+        status = job_status(session.questions_job)
+    ready = session.questions_status == 'ready'
+
+    return JsonResponse({
+        'status': session.questions_status,
+        'ready': ready,
+        # Reloading the interview page starts a new generation job
+        'failed': not ready and status['status'] == 'failed',
+        'error': status['error'],
+        'attempts': status['attempts'],
+        'retry_in': status['retry_in'],
+    })
+
 @login_required
 def get_question(request, session_id):
     session = get_object_or_404(InterviewSession, id=session_id, candidate=request.user)
+    if session.questions_status != 'ready':
+        return JsonResponse({'preparing': True, 'finished': False})
+
     # Find next unanswered question
     unanswered = session.questions.filter(answer__isnull=True).order_by('order').first()
     
@@ -56,53 +79,27 @@ def get_question(request, session_id):
             'finished': False
         })
     else:
-        # Evaluate session if all questions answered
+        # Score the session in the background once all questions are answered
         if not session.is_completed:
-            evaluate_session(session)
+            queue_session_finalization(session)
         return JsonResponse({'finished': True})
 
-def evaluate_session(session):
-    answers = InterviewAnswer.objects.filter(question__session=session)
-    if not answers:
-        return
-    
-    total_score = sum(a.score for a in answers)
-    total_questions = session.questions.count()
-    if total_questions == 0:
-        avg_score = 0
-    else:
-        avg_score = (total_score / (total_questions * 10)) * 100
-    
-    session.overall_score = avg_score
-    session.is_completed = True
-    session.save()
-    
-    # Update application status
-    app = Application.objects.filter(job=session.job, candidate=session.candidate).first()
-    if app:
-        app.status = 'interview' # Keep as interview but completed
-        app.save()
-
-@login_required
-def submit_answer(request):
+@async_login_required
+async def submit_answer(request):
     if request.method == 'POST':
         data = json.loads(request.body)
         question_id = data.get('question_id')
         answer_text = data.get('answer')
         
-        question = get_object_or_404(InterviewQuestion, id=question_id, session__candidate=request.user)
+        question = await _aget_object_or_404(InterviewQuestion.objects.all(), id=question_id, session__candidate=request.user)
         
-        # AI evaluate answer
-        evaluation = evaluate_answer(question.text, answer_text)
-        
-        InterviewAnswer.objects.create(
+        # Plain insert; answers are graded in batches by a background job
+        await InterviewAnswer.objects.acreate(
             question=question,
             answer_text=answer_text,
-            score=evaluation.get('score', 0),
-            feedback=evaluation.get('feedback', ''),
-            strengths=evaluation.get('strengths', ''),
-            improvements=evaluation.get('improvements', '')
+            is_evaluated=False
         )
+        await aqueue_answer_grading(question.session_id, request.user)
         
         return JsonResponse({'status': 'success'})
     return JsonResponse({'status': 'error'}, status=400)
@@ -111,6 +108,14 @@ def submit_answer(request):
 def interview_report(request, session_id):
     session = get_object_or_404(InterviewSession, id=session_id, candidate=request.user)
     if not session.is_completed:
+        if session.questions_status == 'ready' and not session.questions.filter(answer__isnull=True).exists():
+            # All answered: wait for the scoring job instead of going back to the interview
+            job = queue_session_finalization(session)
+            return render(request, 'ai_utils/job_pending.html', {
+                'job': job,
+                'title': 'Interview Report',
+                'message': 'AI is evaluating your answers...',
+            })
         return redirect('mock_interview', application_id=Application.objects.get(job=session.job, candidate=session.candidate).id)
     
     questions = session.questions.all().order_by('order')
@@ -119,7 +124,14 @@ def interview_report(request, session_id):
 @login_required
 def finish_interview(request, session_id):
     session = get_object_or_404(InterviewSession, id=session_id, candidate=request.user)
-    evaluate_session(session)
+    if not session.is_completed:
+        job = queue_session_finalization(session)
+        return render(request, 'ai_utils/job_pending.html', {
+            'job': job,
+            'title': 'Interview Report',
+            'message': 'AI is evaluating your answers...',
+            'redirect_url': reverse('interview_report', args=[session.id]),
+        })
     return redirect('interview_report', session_id=session.id)
 
 @login_required
@@ -191,8 +203,8 @@ def ai_interview_setup(request):
     """
     return render(request, 'interviews/ai_interview_setup.html')
 
-@login_required
-def start_ai_interview(request):
+@async_login_required
+async def start_ai_interview(request):
     """
     Endpoint to initialize the AI interview session.
     """
@@ -216,7 +228,7 @@ def start_ai_interview(request):
                 num_q = word_map.get(num_q_raw.lower().strip('. '), 5)
             
             # Create Session
-            session = AIInterviewSession.objects.create(
+            session = await AIInterviewSession.objects.acreate(
                 candidate=request.user,
                 role=role,
                 experience_level=exp,
@@ -227,9 +239,9 @@ def start_ai_interview(request):
             )
             
             # Generate the first question
-            first_question = get_next_ai_question(session, "Hello, I am ready to start.")
+            first_question = await aget_next_ai_question(session, "Hello, I am ready to start.")
             session.transcript += f"AI: {first_question}\n"
-            session.save()
+            await session.asave()
             
             return JsonResponse({
                 'status': 'success',
@@ -240,12 +252,12 @@ def start_ai_interview(request):
             return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
     return JsonResponse({'status': 'error', 'message': 'Only POST allowed'}, status=405)
 
-@login_required
-def chat_with_interviewer(request, session_id):
+@async_login_required
+async def chat_with_interviewer(request, session_id):
     """
     Endpoint for dynamic voice-based conversation.
     """
-    session = get_object_or_404(AIInterviewSession, id=session_id, candidate=request.user)
+    session = await _aget_object_or_404(AIInterviewSession.objects.all(), id=session_id, candidate=request.user)
     if request.method == 'POST':
         data = json.loads(request.body)
         candidate_response = data.get('response', '')
@@ -258,19 +270,65 @@ def chat_with_interviewer(request, session_id):
              pass
         
         # Get next question from Gemini, now with code awareness
-        next_question = get_next_ai_question(session, candidate_response, current_code)
+        next_question = await aget_next_ai_question(session, candidate_response, current_code)
         
         # Append AI question to transcript
         session.transcript += f"AI: {next_question}\n"
-        session.save()
+        # Only the transcript: the summary job may be writing the other fields
+        await session.asave(update_fields=['transcript'])
+        await aqueue_transcript_summary(session, request.user)
         
         return JsonResponse({
             'status': 'success',
             'next_question': next_question,
-            'is_finished': "interview is complete" in next_question.lower() or "thank you" in next_question.lower()
+            'is_finished': _is_interview_finished(next_question)
         })
     return JsonResponse({'status': 'error'}, status=400)
 
+def _is_interview_finished(reply):
+    return "interview is complete" in reply.lower() or "thank you" in reply.lower()
+
+def _sse(data, event=None):
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+@async_login_required
+async def stream_interviewer_reply(request, session_id):
+    """
+    Streaming variant of chat_with_interviewer. Sends the interviewer's reply
+    as Server-Sent Events ({"delta": ...} chunks, then a "done" event) and
+    saves the transcript once the reply is complete.
+    """
+    session = await _aget_object_or_404(AIInterviewSession.objects.all(), id=session_id, candidate=request.user)
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error'}, status=400)
+
+    data = json.loads(request.body)
+    candidate_response = data.get('response', '')
+    current_code = data.get('code', '')
+
+    async def events():
+        session.transcript += f"Candidate: {candidate_response}\n"
+        parts = []
+        async for text in astream_next_ai_question(session, candidate_response, current_code):
+            parts.append(text)
+            yield _sse({'delta': text})
+
+        next_question = "".join(parts).strip()
+        session.transcript += f"AI: {next_question}\n"
+        await session.asave(update_fields=['transcript'])
+        await aqueue_transcript_summary(session, request.user)
+        yield _sse({
+            'next_question': next_question,
+            'is_finished': _is_interview_finished(next_question)
+        }, event='done')
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 @login_required
 def ai_interview_room(request, session_id):
     """
@@ -279,32 +337,29 @@ def ai_interview_room(request, session_id):
     session = get_object_or_404(AIInterviewSession, id=session_id, candidate=request.user)
     return render(request, 'interviews/ai_interview_room.html', {'session': session})
 
-@login_required
-def process_ai_feedback(request, session_id):
+@async_login_required
+async def process_ai_feedback(request, session_id):
     """
-    Endpoint to trigger Gemini feedback once the interview is finished.
+    Endpoint to queue Gemini feedback once the interview is finished.
+    Returns the job id; the client polls the job status before redirecting.
     """
-    session = get_object_or_404(AIInterviewSession, id=session_id, candidate=request.user)
+    session = await _aget_object_or_404(AIInterviewSession.objects.all(), id=session_id, candidate=request.user)
     if not session.transcript:
         return JsonResponse({'status': 'error', 'message': 'No transcript found'}, status=400)
         
-    # Generate detailed feedback using Gemini
-    feedback = generate_detailed_feedback(session.transcript, session.role)
-    
-    session.communication_score = feedback.get('communication_score', 0)
-    session.technical_score = feedback.get('technical_score', 0)
-    session.problem_solving_score = feedback.get('problem_solving_score', 0)
-    session.cultural_fit_score = feedback.get('cultural_fit_score', 0)
-    session.confidence_score = feedback.get('confidence_score', 0)
-    session.clarity_score = feedback.get('clarity_score', 0)
-    session.overall_score = feedback.get('overall_score', 0)
-    session.feedback_summary = feedback.get('feedback_summary', '')
-    session.detailed_feedback = feedback.get('detailed_feedback', {})
-    
-    session.is_completed = True
-    session.save()
+    job = await aenqueue(
+        generate_ai_feedback.name,
+        owner=request.user,
+        dedupe_key=f"ai-feedback:{session.id}",
+        session_id=session.id
+    )
     
-    return JsonResponse({'status': 'success', 'redirect_url': f'/interviews/ai-report/{session.id}/'})
+    return JsonResponse({
+        'status': 'queued',
+        'job_id': job.id,
+        'status_url': reverse('job_status', args=[job.id]),
+        'redirect_url': f'/interviews/ai-report/{session.id}/'
+    })
 
 @login_required
 def ai_interview_report(request, session_id):
@@ -0,0 +1,276 @@
+"""
+Resume text extraction, run by the screening job (see jobs/tasks.py).
+
+PDFs are read with the fastest installed engine: pypdfium2, then
+pdfplumber, then PyPDF2. An engine that cannot open a file hands it to
+the next one. Files are read from disk; storages without a local path are
+copied to a temporary file in chunks rather than into memory. Documents of
+at least ``RESUME_EXTRACTION_PARALLEL_PAGES`` pages are split into page
+ranges and extracted in a process pool.
+
+pdfium is not thread-safe, and uploads are screened on several threads at
+once, so pypdfium2 is only ever called in the pool's single-threaded
+processes: opening the file, counting its pages and reading short documents
+included.
+
+``RESUME_MAX_BYTES`` rejects oversized uploads, and only the first
+``RESUME_MAX_PAGES`` pages are read. ``extract`` returns an ``Extraction``
+with the engine, page counts and time taken, which the screening job stores
+on the Resume.
+"""
+import atexit
+import concurrent.futures
+import hashlib
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import docx
+from django.conf import settings
+
+try:
+    import pypdfium2
+except ImportError:  # pragma: no cover - optional dependency
+    pypdfium2 = None
+
+try:
+    import pdfplumber
+except ImportError:  # pragma: no cover - optional dependency
+    pdfplumber = None
+
+try:
+    import PyPDF2
+except ImportError:  # pragma: no cover - optional dependency
+    PyPDF2 = None
+
+
+class ExtractionError(Exception):
+    """The file is too large or no engine could read it."""
+
+
+@dataclass
+class Extraction:
+    text: str
+    engine: str
+    # Pages read, and pages in the document.
+    pages: int = 0
+    total_pages: int = 0
+    seconds: float = 0.0
+
+    @property
+    def truncated(self):
+        return self.pages < self.total_pages
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# --- PDF engines ---
+# Each opens the file at ``path`` and returns (page count, reader, close).
+# The reader extracts pages [start, stop) and is only used in the process
+# that opened the document.
+
+def _open_pdfium(path):
+    pdf = pypdfium2.PdfDocument(path)
+
+    def read(start, stop):
+        texts = []
+        for index in range(start, stop):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            texts.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+        return texts
+
+    return len(pdf), read, pdf.close
+
+
+def _open_pdfplumber(path):
+    pdf = pdfplumber.open(path)
+
+    def read(start, stop):
+        return [pdf.pages[index].extract_text() or "" for index in range(start, stop)]
+
+    return len(pdf.pages), read, pdf.close
+
+
+def _open_pypdf2(path):
+    reader = PyPDF2.PdfReader(path)
+
+    def read(start, stop):
+        return [reader.pages[index].extract_text() or "" for index in range(start, stop)]
+
+    return len(reader.pages), read, lambda: None
+
+
+# (name, installed, opener, safe to call from several threads of one process)
+ENGINES = (
+    ('pypdfium2', lambda: pypdfium2 is not None, _open_pdfium, False),
+    ('pdfplumber', lambda: pdfplumber is not None, _open_pdfplumber, True),
+    ('PyPDF2', lambda: PyPDF2 is not None, _open_pypdf2, True),
+)
+
+
+def available_engines():
+    return [name for name, installed, _, _ in ENGINES if installed()]
+
+
+def _opener(engine):
+    return next(opener for name, _, opener, _ in ENGINES if name == engine)
+
+
+def _is_thread_safe(engine):
+    return next(thread_safe for name, _, _, thread_safe in ENGINES if name == engine)
+
+
+def _read_pages(engine, path, start, stop):
+    """Pool worker: text of pages [start, stop)."""
+    _, read, close = _opener(engine)(path)
+    try:
+        return read(start, stop)
+    finally:
+        close()
+
+
+def _read_document(engine, path, max_pages, parallel_pages):
+    """
+    (page count, texts) of the document; texts is None when it has at least
+    ``parallel_pages`` pages to read, which are left to the pool.
+    """
+    total, read, close = _opener(engine)(path)
+    try:
+        pages = min(total, max_pages)
+        # Pool round-trips cost more than they save on short documents.
+        return total, (read(0, pages) if pages < parallel_pages else None)
+    finally:
+        close()
+
+
+# --- Process pool ---
+
+_pool = {'executor': None, 'pid': None, 'workers': 0}
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    # A forked worker process needs its own pool.
+    if _pool['executor'] is None or _pool['pid'] != os.getpid():
+        with _pool_lock:
+            if _pool['executor'] is None or _pool['pid'] != os.getpid():
+                workers = _setting('RESUME_EXTRACTION_WORKERS', None) or min(4, os.cpu_count() or 1)
+                # spawn: the pool's processes must not inherit the web
+                # process's threads and connections.
+                _pool['executor'] = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                )
+                _pool['pid'] = os.getpid()
+                _pool['workers'] = workers
+                atexit.register(_pool['executor'].shutdown, wait=False, cancel_futures=True)
+    return _pool['executor'], _pool['workers']
+
+
+def _page_ranges(pages, parts):
+    size = -(-pages // parts)
+    return [(start, min(start + size, pages)) for start in range(0, pages, size)]
+
+
+def _in_pool(calls):
+    """Results of ``calls``, a list of (function, *args), run in the process pool."""
+    executor, _ = _get_pool()
+    try:
+        futures = [executor.submit(*call) for call in calls]
+        return [future.result() for future in futures]
+    except concurrent.futures.process.BrokenProcessPool:
+        # A worker died (e.g. a crash in the PDF engine); start a new pool next time.
+        with _pool_lock:
+            _pool['executor'] = None
+        raise
+
+
+def _read_parallel(engine, path, pages):
+    _, workers = _get_pool()
+    chunks = _in_pool([(_read_pages, engine, path, start, stop) for start, stop in _page_ranges(pages, workers)])
+    return [text for chunk in chunks for text in chunk]
+
+
+def _extract_pdf(path):
+    max_pages = _setting('RESUME_MAX_PAGES', 50)
+    parallel_pages = _setting('RESUME_EXTRACTION_PARALLEL_PAGES', 8)
+    errors = []
+    for engine in available_engines():
+        try:
+            if _is_thread_safe(engine):
+                total, texts = _read_document(engine, path, max_pages, parallel_pages)
+            else:
+                total, texts = _in_pool([(_read_document, engine, path, max_pages, parallel_pages)])[0]
+            pages = min(total, max_pages)
+            if texts is None:
+                texts = _read_parallel(engine, path, pages)
+        except Exception as e:
+            errors.append(f"{engine}: {e}")
+            continue
+        return "\n".join(texts), engine, pages, total
+    raise ExtractionError("Could not read PDF (" + "; ".join(errors or ["no PDF engine installed"]) + ")")
+
+
+def _extract_docx(path):
+    doc = docx.Document(path)
+    return "".join(para.text + "\n" for para in doc.paragraphs), 'python-docx', 0, 0
+
+
+def _extract_plain(path):
+    with open(path, 'rb') as f:
+        return f.read().decode('utf-8', errors='ignore'), 'text', 0, 0
+
+
+def file_sha256(file):
+    """SHA-256 of an uploaded or stored file, read in chunks."""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+@contextmanager
+def _local_path(field_file):
+    """A filesystem path for ``field_file``, copied to a temporary file if its storage has none."""
+    try:
+        path = field_file.path
+    except NotImplementedError:
+        path = None
+    if path and os.path.exists(path):
+        yield path
+        return
+    suffix = os.path.splitext(field_file.name)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+        with field_file.open('rb') as f:
+            shutil.copyfileobj(f, tmp, 1024 * 1024)
+        tmp.flush()
+        yield tmp.name
+
+
+def extract(field_file):
+    """Extracts the text of an uploaded resume (a FieldFile)."""
+    max_bytes = _setting('RESUME_MAX_BYTES', 10 * 1024 * 1024)
+    if field_file.size > max_bytes:
+        raise ExtractionError(f"Resume is {field_file.size} bytes; the limit is {max_bytes}")
+
+    started = time.monotonic()
+    name = field_file.name.lower()
+    with _local_path(field_file) as path:
+        if name.endswith('.pdf'):
+            text, engine, pages, total = _extract_pdf(path)
+        elif name.endswith('.docx'):
+            text, engine, pages, total = _extract_docx(path)
+        else:
+            # Fallback for other text files
+            text, engine, pages, total = _extract_plain(path)
+    return Extraction(text, engine, pages, total, time.monotonic() - started)
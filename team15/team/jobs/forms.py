@@ -1,4 +1,5 @@
 from django import forms
+from django.conf import settings
 from .models import Job, Resume
 
 class JobPostForm(forms.ModelForm):
@@ -20,3 +21,10 @@ class ResumeUploadForm(forms.ModelForm):
         widgets = {
             'file': forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.pdf,.docx'}),
         }
+
+    def clean_file(self):
+        file = self.cleaned_data['file']
+        max_bytes = getattr(settings, 'RESUME_MAX_BYTES', 10 * 1024 * 1024)
+        if file and file.size > max_bytes:
+            raise forms.ValidationError(f"Resume files must be smaller than {max_bytes / (1024 * 1024):g} MB.")
+        return file
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from jobs import prescreen
+
+
+class Command(BaseCommand):
+    help = "Fits the pre-screen TF-IDF model on every job, unless the jobs are unchanged since the last fit."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Fit even if the jobs are unchanged.")
+
+    def handle(self, *args, **options):
+        fitted = prescreen.fit(force=options['force'])
+        self.stdout.write(f"Pre-screen model covers {fitted.jobs} job(s), fitted {fitted.fitted_at:%Y-%m-%d %H:%M:%S}")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from jobs import skills
+from jobs.models import Job, Resume
+
+
+class Command(BaseCommand):
+    help = "Loads the canonical skill dictionary and resolves every job's and resume's skills into skill ids."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--aliases-only', action='store_true', help="Only load CANONICAL_SKILLS.")
+
+    def handle(self, *args, **options):
+        changed = skills.load_canonical()
+        self.stdout.write(f"Added or moved {changed} skill alias(es)")
+        if options['aliases_only']:
+            return
+
+        jobs = 0
+        for job in Job.objects.iterator():
+            skills.set_job_skills(job)
+            jobs += 1
+        resumes = 0
+        for resume in Resume.objects.exclude(parsed_data=None).iterator():
+            skills.set_resume_skills(resume)
+            resumes += 1
+        self.stdout.write(f"Normalized the skills of {jobs} job(s) and {resumes} resume(s)")
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from jobs import search
+
+
+class Command(BaseCommand):
+    help = "Recreates the full-text job search index and reindexes every job."
+
+    def handle(self, *args, **options):
+        search.install()
+        self.stdout.write(f"Rebuilt the {connection.vendor} job search index")
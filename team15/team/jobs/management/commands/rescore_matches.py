@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from jobs import matching
+from jobs.models import SkillMatch
+
+
+class Command(BaseCommand):
+    help = "Scores every candidate's latest resume against every job by skill overlap and stores the results."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job', type=int, action='append', dest='jobs', help="Only rescore this job (repeatable).")
+        parser.add_argument('--chunk-rows', type=int, help="Resumes per matrix product (default MATCHING_CHUNK_ROWS).")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per database insert.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        matrices = matching.load(job_ids=options['jobs'])
+        self.stdout.write(
+            f"Loaded {matrices.resumes.shape[0]} resume(s) x {matrices.jobs.shape[0]} job(s) "
+            f"over {matrices.resumes.shape[1]} skill(s)"
+        )
+
+        stored = 0
+        with transaction.atomic():
+            previous = SkillMatch.objects.all()
+            if options['jobs']:
+                previous = previous.filter(job_id__in=options['jobs'])
+            previous.delete()
+            for matches in matching.score_all(matrices, options['chunk_rows']):
+                SkillMatch.objects.bulk_create(
+                    (SkillMatch(resume_id=m.resume_id, job_id=m.job_id, overlap=m.overlap, jaccard=m.jaccard, coverage=m.coverage) for m in matches),
+                    batch_size=options['batch_size'],
+                )
+                stored += len(matches)
+        self.stdout.write(f"Stored {stored} match(es) in {time.monotonic() - started:.2f}s")
@@ -0,0 +1,194 @@
+"""
+Batch skill matching of resumes against jobs with sparse matrices.
+
+The normalized skills (see jobs/skills.py) of each candidate's latest parsed
+resume and of each job are loaded into binary CSR matrices R (resumes x
+skills) and J (jobs x skills). For every resume/job pair:
+
+* overlap: required skills the resume has, ``R @ J.T``
+* jaccard: overlap / size of the union of both skill sets
+* coverage: share of the job's skills the resume covers, each skill weighted
+  by its rarity among resumes (``R @ (J * w).T / J @ w``), so matching a
+  rare skill counts for more than matching one everybody lists
+
+``best_jobs`` and ``best_candidates`` score one resume or job against all of
+the other side. ``score_all`` scores every pair, ``MATCHING_CHUNK_ROWS``
+resumes at a time so memory stays bounded, and yields only pairs sharing at
+least one skill. ``manage.py rescore_matches`` stores its results as
+SkillMatch rows.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count
+from scipy import sparse
+
+from . import skills
+from .models import JobSkill, ResumeSkill
+from .ranking import latest_resume_ids
+
+METRICS = ('coverage', 'jaccard', 'overlap')
+
+
+@dataclass
+class Match:
+    resume_id: int
+    job_id: int
+    overlap: int
+    jaccard: float
+    coverage: float
+
+
+@dataclass
+class SkillMatrices:
+    resume_ids: np.ndarray
+    job_ids: np.ndarray
+    resumes: sparse.csr_matrix
+    jobs: sparse.csr_matrix
+    # Rarity weight of each skill column
+    weights: np.ndarray
+
+    @property
+    def weighted_jobs(self):
+        return sparse.csr_matrix(self.jobs.multiply(self.weights[np.newaxis, :]))
+
+
+def _chunk_rows():
+    return max(1, getattr(settings, 'MATCHING_CHUNK_ROWS', 2048))
+
+
+def _binary_matrix(pairs, row_ids, columns):
+    """CSR matrix with a 1 for each (row id, skill id) pair."""
+    positions = {row_id: i for i, row_id in enumerate(row_ids)}
+    rows = np.fromiter((positions[row_id] for row_id, _ in pairs), dtype=np.int64, count=len(pairs))
+    cols = np.fromiter((columns[skill_id] for _, skill_id in pairs), dtype=np.int64, count=len(pairs))
+    data = np.ones(len(pairs), dtype=np.float32)
+    return sparse.csr_matrix((data, (rows, cols)), shape=(len(row_ids), len(columns)))
+
+
+def load(resume_ids=None, job_ids=None):
+    """
+    SkillMatrices for the given resumes and jobs; by default each
+    candidate's latest parsed resume and every job with skills.
+    """
+    latest = ResumeSkill.objects.filter(resume_id__in=latest_resume_ids())
+    resume_pairs = latest if resume_ids is None else ResumeSkill.objects.filter(resume_id__in=resume_ids)
+    resume_pairs = list(resume_pairs.values_list('resume_id', 'skill_id'))
+    job_pairs = JobSkill.objects.all()
+    if job_ids is not None:
+        job_pairs = job_pairs.filter(job_id__in=job_ids)
+    job_pairs = list(job_pairs.values_list('job_id', 'skill_id'))
+
+    columns = {}
+    for _, skill_id in resume_pairs + job_pairs:
+        columns.setdefault(skill_id, len(columns))
+    resume_rows = sorted({resume_id for resume_id, _ in resume_pairs})
+    job_rows = sorted({job_id for job_id, _ in job_pairs})
+    resumes = _binary_matrix(resume_pairs, resume_rows, columns)
+    jobs = _binary_matrix(job_pairs, job_rows, columns)
+
+    # Smoothed inverse document frequency over all latest resumes; always >= 1.
+    if resume_ids is None:
+        total = len(resume_rows)
+        frequency = np.asarray(resumes.sum(axis=0)).ravel()
+    else:
+        total = latest.values('resume_id').distinct().count()
+        frequency = np.zeros(len(columns), dtype=np.float32)
+        counts = latest.filter(skill_id__in=list(columns)).values('skill_id').annotate(n=Count('id'))
+        for row in counts.values_list('skill_id', 'n'):
+            frequency[columns[row[0]]] = row[1]
+    weights = (np.log((1 + total) / (1 + frequency)) + 1).astype(np.float32)
+    return SkillMatrices(np.array(resume_rows, dtype=np.int64), np.array(job_rows, dtype=np.int64), resumes, jobs, weights)
+
+
+def _scores(resumes, jobs, weighted_jobs, job_weight):
+    """(rows, cols, overlap, jaccard, coverage) for the pairs of ``resumes`` x ``jobs`` sharing a skill."""
+    overlap = (resumes @ jobs.T).tocoo()
+    # Same sparsity pattern as overlap, since every weight is positive.
+    weighted = (resumes @ weighted_jobs.T).tocsr()
+    rows, cols, shared = overlap.row, overlap.col, overlap.data
+    covered = np.asarray(weighted[rows, cols]).ravel()
+    resume_sizes = np.asarray(resumes.sum(axis=1)).ravel()
+    job_sizes = np.asarray(jobs.sum(axis=1)).ravel()
+    jaccard = shared / (resume_sizes[rows] + job_sizes[cols] - shared)
+    coverage = covered / job_weight[cols]
+    return rows, cols, shared.astype(np.int64), jaccard, coverage
+
+
+def _job_weights(weighted_jobs):
+    """Total skill weight of each job, the denominator of coverage."""
+    return np.asarray(weighted_jobs.sum(axis=1)).ravel()
+
+
+def _top(overlap, jaccard, coverage, k, metric):
+    """Indexes of the ``k`` best pairs by ``metric``, ties broken by overlap."""
+    values = {'coverage': coverage, 'jaccard': jaccard, 'overlap': overlap}[metric]
+    return np.lexsort((-overlap, -values))[:k]
+
+
+def _check_metric(metric):
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric '{metric}', expected one of {', '.join(METRICS)}")
+
+
+def best_jobs(resume, k=10, metric='coverage', matrices=None):
+    """The ``k`` jobs best matching ``resume``'s skills, as Matches."""
+    _check_metric(metric)
+    if matrices is None:
+        skills.resume_skill_ids(resume)
+        matrices = load(resume_ids=[resume.id])
+    positions = np.flatnonzero(matrices.resume_ids == resume.id)
+    if not len(positions) or not matrices.jobs.shape[0]:
+        return []
+    weighted_jobs = matrices.weighted_jobs
+    rows, cols, overlap, jaccard, coverage = _scores(
+        matrices.resumes[positions], matrices.jobs, weighted_jobs, _job_weights(weighted_jobs),
+    )
+    return [
+        Match(resume.id, int(matrices.job_ids[cols[i]]), int(overlap[i]), float(jaccard[i]), float(coverage[i]))
+        for i in _top(overlap, jaccard, coverage, k, metric)
+    ]
+
+
+def best_candidates(job, k=50, metric='coverage', matrices=None):
+    """The ``k`` resumes (each candidate's latest) best matching ``job``, as Matches."""
+    _check_metric(metric)
+    if matrices is None:
+        skills.job_skill_rows(job)
+        matrices = load(job_ids=[job.id])
+    positions = np.flatnonzero(matrices.job_ids == job.id)
+    if not len(positions) or not matrices.resumes.shape[0]:
+        return []
+    weighted_jobs = matrices.weighted_jobs[positions]
+    job_weight = _job_weights(weighted_jobs)
+    best = []
+    # Chunked so a large resume pool is never multiplied in one piece.
+    for start in range(0, matrices.resumes.shape[0], _chunk_rows()):
+        chunk = matrices.resumes[start:start + _chunk_rows()]
+        rows, _, overlap, jaccard, coverage = _scores(chunk, matrices.jobs[positions], weighted_jobs, job_weight)
+        best.extend(
+            Match(int(matrices.resume_ids[start + rows[i]]), job.id, int(overlap[i]), float(jaccard[i]), float(coverage[i]))
+            for i in _top(overlap, jaccard, coverage, k, metric)
+        )
+    best.sort(key=lambda m: (getattr(m, metric), m.overlap), reverse=True)
+    return best[:k]
+
+
+def score_all(matrices=None, chunk_rows=None):
+    """Yields a list of Matches per chunk of resumes, for every pair sharing at least one skill."""
+    matrices = matrices or load()
+    if not matrices.resumes.shape[0] or not matrices.jobs.shape[0]:
+        return
+    chunk_rows = chunk_rows or _chunk_rows()
+    weighted_jobs = matrices.weighted_jobs
+    job_weight = _job_weights(weighted_jobs)
+    for start in range(0, matrices.resumes.shape[0], chunk_rows):
+        chunk = matrices.resumes[start:start + chunk_rows]
+        rows, cols, overlap, jaccard, coverage = _scores(chunk, matrices.jobs, weighted_jobs, job_weight)
+        resume_ids = matrices.resume_ids[start + rows]
+        job_ids = matrices.job_ids[cols]
+        yield [
+            Match(int(resume_ids[i]), int(job_ids[i]), int(overlap[i]), float(jaccard[i]), float(coverage[i]))
+            for i in range(len(rows))
+        ]
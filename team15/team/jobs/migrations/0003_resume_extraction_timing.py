@@ -0,0 +1,28 @@
+# Generated by Django 4.2.28 on 2026-10-17 01:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_resume_ai_feedback_resume_improvement_suggestions_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='extraction_engine',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='extraction_pages',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='extraction_seconds',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.28 on 2026-10-17 01:04
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def fingerprint_resumes(apps, schema_editor):
+    Resume = apps.get_model('jobs', 'Resume')
+    for resume in Resume.objects.filter(sha256='').exclude(file='').iterator():
+        digest = hashlib.sha256()
+        try:
+            with resume.file.open('rb') as f:
+                for chunk in f.chunks():
+                    digest.update(chunk)
+        except (FileNotFoundError, OSError):
+            continue
+        Resume.objects.filter(id=resume.id).update(sha256=digest.hexdigest())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_resume_extraction_timing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.RunPython(fingerprint_resumes, migrations.RunPython.noop),
+    ]
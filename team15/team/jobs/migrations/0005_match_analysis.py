@@ -0,0 +1,33 @@
+# Generated by Django 4.2.28 on 2026-10-17 01:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_resume_sha256'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resume_fingerprint', models.CharField(max_length=64)),
+                ('job_version', models.CharField(max_length=64)),
+                ('match_score', models.FloatField(default=0.0)),
+                ('ai_feedback', models.TextField(blank=True)),
+                ('improvement_suggestions', models.TextField(blank=True)),
+                ('skills_matched', models.TextField(blank=True)),
+                ('missing_skills', models.TextField(blank=True)),
+                ('analyzed_at', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_analyses', to='jobs.job')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='matchanalysis',
+            constraint=models.UniqueConstraint(fields=('resume_fingerprint', 'job', 'job_version'), name='unique_match_analysis'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 4.2.28 on 2026-10-17 01:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from jobs.skills import CANONICAL_SKILLS, skill_key
+
+
+def load_canonical_skills(apps, schema_editor):
+    Skill = apps.get_model('jobs', 'Skill')
+    SkillAlias = apps.get_model('jobs', 'SkillAlias')
+    for name, synonyms in CANONICAL_SKILLS.items():
+        skill = Skill.objects.create(name=name)
+        for alias in {skill_key(n) for n in [name, *synonyms]}:
+            SkillAlias.objects.create(skill=skill, key=alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_match_analysis'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SkillAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='jobs.skill')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ResumeSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resume_skills', to='jobs.resume')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='jobs.skill')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=100)),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_skills', to='jobs.job')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='jobs.skill')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='skills',
+            field=models.ManyToManyField(related_name='jobs', through='jobs.JobSkill', to='jobs.skill'),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='skills',
+            field=models.ManyToManyField(related_name='resumes', through='jobs.ResumeSkill', to='jobs.skill'),
+        ),
+        migrations.AddConstraint(
+            model_name='resumeskill',
+            constraint=models.UniqueConstraint(fields=('resume', 'skill'), name='unique_resume_skill'),
+        ),
+        migrations.AddConstraint(
+            model_name='jobskill',
+            constraint=models.UniqueConstraint(fields=('job', 'skill'), name='unique_job_skill'),
+        ),
+        migrations.RunPython(load_canonical_skills, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.28 on 2026-10-17 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_skills'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='resumeskill',
+            index=models.Index(fields=['skill', 'resume'], name='resume_skill_postings'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.28 on 2026-10-17 01:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0007_resume_skill_postings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkillMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('overlap', models.PositiveSmallIntegerField()),
+                ('jaccard', models.FloatField()),
+                ('coverage', models.FloatField()),
+                ('scored_at', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_matches', to='jobs.job')),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_matches', to='jobs.resume')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['job', '-coverage'], name='skill_match_by_job')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='skillmatch',
+            constraint=models.UniqueConstraint(fields=('resume', 'job'), name='unique_skill_match'),
+        ),
+    ]
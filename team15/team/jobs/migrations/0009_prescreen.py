@@ -0,0 +1,44 @@
+# Generated by Django 4.2.28 on 2026-10-17 01:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0008_skill_match'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchanalysis',
+            name='source',
+            field=models.CharField(choices=[('llm', 'AI analysis'), ('prescreen', 'Pre-screen only')], default='llm', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='text',
+            field=models.TextField(blank=True),
+        ),
+        migrations.CreateModel(
+            name='Prescreen',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_version', models.CharField(max_length=64)),
+                ('score', models.FloatField()),
+                ('similarity', models.FloatField()),
+                ('skill_ratio', models.FloatField()),
+                ('scored_at', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prescreens', to='jobs.job')),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prescreens', to='jobs.resume')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['job', 'job_version', '-score'], name='prescreen_by_job')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='prescreen',
+            constraint=models.UniqueConstraint(fields=('resume', 'job'), name='unique_prescreen'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def install_search(apps, schema_editor):
+    from jobs.search import install
+    install(schema_editor.connection)
+
+
+def uninstall_search(apps, schema_editor):
+    from jobs.search import uninstall
+    uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0009_prescreen'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.28 on 2026-10-17 01:38
+
+from django.db import migrations, models
+
+
+def reinstall_search(apps, schema_editor):
+    # SQLite rebuilds jobs_job to add the column, dropping the search triggers.
+    from jobs.search import install
+    install(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0010_job_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrescreenModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('corpus_key', models.CharField(max_length=64)),
+                ('vectorizer', models.BinaryField()),
+                ('jobs', models.IntegerField(default=0)),
+                ('fitted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(reinstall_search, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,23 @@
+import hashlib
+
 from django.db import models
 from django.conf import settings
 
+class Skill(models.Model):
+    """A canonical skill; names and synonyms map to it through SkillAlias (see jobs/skills.py)."""
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+class SkillAlias(models.Model):
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='aliases')
+    # skills.skill_key() of a name or synonym
+    key = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return f"{self.key} -> {self.skill}"
+
 class Job(models.Model):
     hr = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='posted_jobs')
     title = models.CharField(max_length=255)
@@ -9,10 +26,40 @@ class Job(models.Model):
     experience_required = models.CharField(max_length=100)
     location = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    skills = models.ManyToManyField(Skill, through='JobSkill', related_name='jobs')
+
+    # Fields the pre-screen model is fitted on (see jobs/prescreen.py)
+    PRESCREEN_FIELDS = {'title', 'description', 'skills_required'}
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.PRESCREEN_FIELDS.intersection(update_fields):
+            # auto_now only writes fields that are being saved.
+            kwargs['update_fields'] = update_fields = {*update_fields, 'updated_at'}
+        super().save(*args, **kwargs)
+        if update_fields is None or 'skills_required' in update_fields:
+            from .skills import set_job_skills
+            set_job_skills(self)
+        if update_fields is None or self.PRESCREEN_FIELDS.intersection(update_fields):
+            from .tasks import queue_prescreen_fit
+            queue_prescreen_fit()
+
+    def delete(self, *args, **kwargs):
+        deleted = super().delete(*args, **kwargs)
+        from .tasks import queue_prescreen_fit
+        queue_prescreen_fit()
+        return deleted
+
+    @property
+    def version(self):
+        """Hash of the fields a match analysis reads; changes when they are edited."""
+        text = f"{self.description}\0{self.skills_required}"
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
 class Resume(models.Model):
     candidate = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='resumes')
     file = models.FileField(upload_to='resumes/')
@@ -23,10 +70,114 @@ class Resume(models.Model):
     missing_skills = models.TextField(blank=True, null=True)
     improvement_suggestions = models.TextField(blank=True, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    # Text extraction by the screening job (see jobs/extraction.py).
+    extraction_engine = models.CharField(max_length=20, blank=True)
+    extraction_pages = models.IntegerField(null=True, blank=True)
+    extraction_seconds = models.FloatField(null=True, blank=True)
+    # Extracted text, for the local pre-screen (see jobs/prescreen.py)
+    text = models.TextField(blank=True)
+    # SHA-256 of the file; a candidate's uploads with the same bytes share
+    # one stored file and one parse.
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    skills = models.ManyToManyField(Skill, through='ResumeSkill', related_name='resumes')
 
     def __str__(self):
         return f"Resume of {self.candidate.username}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'parsed_data' in update_fields:
+            from .skills import set_resume_skills
+            set_resume_skills(self)
+
+    def earlier_copy(self):
+        """The candidate's latest other resume with the same bytes, preferring one already parsed."""
+        if not self.sha256:
+            return None
+        copies = Resume.objects.filter(candidate_id=self.candidate_id, sha256=self.sha256).exclude(id=self.id)
+        return copies.filter(parsed_data__isnull=False).order_by('-uploaded_at').first() or copies.order_by('-uploaded_at').first()
+
+    def reuse_parse(self, other):
+        """Copies the parse of ``other`` (same bytes); returns whether there was one."""
+        if other is None or other.parsed_data is None:
+            return False
+        self.parsed_data = other.parsed_data
+        self.extraction_engine = other.extraction_engine
+        self.extraction_pages = other.extraction_pages
+        self.extraction_seconds = other.extraction_seconds
+        self.text = other.text
+        return True
+
+    @property
+    def fingerprint(self):
+        """Identifies the resume's content for stored analyses: its SHA-256, or its id if unknown."""
+        return self.sha256 or f"resume:{self.id}"
+
+class JobSkill(models.Model):
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='job_skills')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE)
+    # The skill as the job lists it, for display
+    label = models.CharField(max_length=100)
+    position = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'skill'], name='unique_job_skill'),
+        ]
+
+class ResumeSkill(models.Model):
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='resume_skills')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['resume', 'skill'], name='unique_resume_skill'),
+        ]
+        # Postings lists for ranking candidates (see jobs/ranking.py)
+        indexes = [
+            models.Index(fields=['skill', 'resume'], name='resume_skill_postings'),
+        ]
+
+class MatchAnalysis(models.Model):
+    """
+    A stored analyze_match result for a resume's content against one version
+    of a job (see Job.version), reused until either changes or the candidate
+    asks for a new one.
+    """
+    resume_fingerprint = models.CharField(max_length=64)
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='match_analyses')
+    job_version = models.CharField(max_length=64)
+    SOURCE_CHOICES = (
+        ('llm', 'AI analysis'),
+        ('prescreen', 'Pre-screen only'),
+    )
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default='llm')
+    match_score = models.FloatField(default=0.0)
+    ai_feedback = models.TextField(blank=True)
+    improvement_suggestions = models.TextField(blank=True)
+    skills_matched = models.TextField(blank=True)
+    missing_skills = models.TextField(blank=True)
+    analyzed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['resume_fingerprint', 'job', 'job_version'], name='unique_match_analysis'),
+        ]
+
+    def __str__(self):
+        return f"Analysis of {self.resume_fingerprint[:12]} for {self.job}"
+
+    def apply_to(self, resume):
+        """Copies the analysis onto ``resume``; returns the fields that changed."""
+        changed = []
+        for field in ('match_score', 'ai_feedback', 'improvement_suggestions', 'skills_matched', 'missing_skills'):
+            value = getattr(self, field)
+            if getattr(resume, field) != value:
+                setattr(resume, field, value)
+                changed.append(field)
+        return changed
+
 class Application(models.Model):
     STATUS_CHOICES = (
         ('applied', 'Applied'),
@@ -51,3 +202,50 @@ class Application(models.Model):
     @property
     def upcoming_live_interview(self):
         return self.live_interviews.filter(status='scheduled').first()
+
+class SkillMatch(models.Model):
+    """Skill overlap scores of a resume against a job, stored by ``manage.py rescore_matches`` (see jobs/matching.py)."""
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='skill_matches')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='skill_matches')
+    overlap = models.PositiveSmallIntegerField()
+    jaccard = models.FloatField()
+    coverage = models.FloatField()
+    scored_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['resume', 'job'], name='unique_skill_match'),
+        ]
+        indexes = [
+            models.Index(fields=['job', '-coverage'], name='skill_match_by_job'),
+        ]
+
+class PrescreenModel(models.Model):
+    """The TF-IDF vectorizer the pre-screen scores with, fitted on every job (see jobs/prescreen.py)."""
+    # prescreen.corpus_key() of the jobs it was fitted on
+    corpus_key = models.CharField(max_length=64)
+    # Pickled TfidfVectorizer, empty if the jobs had no usable terms
+    vectorizer = models.BinaryField()
+    jobs = models.IntegerField(default=0)
+    fitted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Pre-screen model of {self.jobs} jobs ({self.fitted_at:%Y-%m-%d %H:%M})"
+
+class Prescreen(models.Model):
+    """Local first-pass score of a resume against a job (see jobs/prescreen.py)."""
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='prescreens')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='prescreens')
+    job_version = models.CharField(max_length=64)
+    score = models.FloatField()
+    similarity = models.FloatField()
+    skill_ratio = models.FloatField()
+    scored_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['resume', 'job'], name='unique_prescreen'),
+        ]
+        indexes = [
+            models.Index(fields=['job', 'job_version', '-score'], name='prescreen_by_job'),
+        ]
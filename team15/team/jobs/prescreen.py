@@ -0,0 +1,239 @@
+"""
+Local first-pass scoring of a resume against a job, ahead of analyze_match.
+
+The score (0-100) combines two signals:
+
+* similarity: cosine similarity of TF-IDF vectors of the resume text and the
+  job's description and skills. The vectorizer is fitted on the
+  descriptions of all jobs, so terms that tell jobs apart weigh the most.
+* skill ratio: the share of the job's required skills the resume has (see
+  jobs/skills.py).
+
+``PRESCREEN_SKILL_WEIGHT`` sets the share of the skill ratio. Job vectors are
+kept per job version, so scoring a resume costs tokenizing it and a sparse
+dot product, well under a millisecond for a typical resume. The same resume
+and job always get the same score for a given fitted model.
+
+Fitting is never done while scoring. Saving or deleting a job queues the
+``fit_prescreen_model`` job (see jobs/tasks.py; ``manage.py fit_prescreen``
+runs it by hand), which fits the vectorizer on every job and stores it as a
+PrescreenModel row unless the jobs are unchanged since the last fit.
+``score`` loads the latest row once per process and keeps using it until a
+newer one is stored.
+
+The screening job (see jobs/tasks.py) calls analyze_match only when
+``passes``: the score reaches ``PRESCREEN_THRESHOLD`` or is among the best
+``PRESCREEN_TOP_K`` for the job. Other resumes get ``summary`` instead.
+"""
+import hashlib
+import math
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db.models import Count, Max
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from . import skills
+from .models import Job, Prescreen, PrescreenModel
+
+MAX_CACHED_JOBS = 256
+
+# Id of the PrescreenModel row loaded in this process, and its _Model.
+_state = {'id': None, 'model': None}
+_job_vectors = OrderedDict()
+_lock = threading.Lock()
+_fit_lock = threading.Lock()
+
+
+@dataclass
+class Result:
+    score: float
+    similarity: float
+    skill_ratio: float
+    matched: list
+    missing: list
+    seconds: float = 0.0
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def is_enabled():
+    return _setting('PRESCREEN_ENABLED', True)
+
+
+def job_text(job):
+    return f"{job.title}\n{job.description}\n{job.skills_required}"
+
+
+def resume_text(resume):
+    """The extracted text, or the parsed fields for resumes screened before text was kept."""
+    if resume.text:
+        return resume.text
+    if not resume.parsed_data:
+        return ""
+    parts = []
+    for value in resume.parsed_data.values():
+        if isinstance(value, list):
+            parts.extend(str(item) for item in value)
+        elif value:
+            parts.append(str(value))
+    return "\n".join(parts)
+
+
+class _Model:
+    """
+    A fitted TfidfVectorizer's analyzer, vocabulary and idf. Vectors are
+    computed here as {term index: weight} dicts with the vectorizer's
+    weighting (sublinear tf x idf, L2-normalized), which is much faster than
+    ``transform`` for a single short document.
+    """
+
+    def __init__(self, vectorizer):
+        self.analyze = vectorizer.build_analyzer()
+        self.vocabulary = vectorizer.vocabulary_
+        self.idf = vectorizer.idf_
+
+    def vector(self, text):
+        counts = {}
+        for term in self.analyze(text):
+            index = self.vocabulary.get(term)
+            if index is not None:
+                counts[index] = counts.get(index, 0) + 1
+        weights = {index: (1 + math.log(count)) * self.idf[index] for index, count in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        return {index: w / norm for index, w in weights.items()} if norm else {}
+
+
+def corpus_key():
+    """Changes whenever a job is added, edited or deleted."""
+    stats = Job.objects.aggregate(n=Count('id'), latest=Max('id'), updated=Max('updated_at'))
+    return hashlib.sha256(repr(tuple(stats.values())).encode()).hexdigest()
+
+
+def fit(force=False):
+    """
+    Fits the vectorizer on every job and stores it, unless the stored model
+    already covers the current jobs. Returns the PrescreenModel.
+    """
+    # One fit at a time in this process; a waiting caller then finds it done.
+    with _fit_lock:
+        key = corpus_key()
+        latest = PrescreenModel.objects.order_by('-id').first()
+        if latest is not None and latest.corpus_key == key and not force:
+            return latest
+        texts = [job_text(job) for job in Job.objects.only('title', 'description', 'skills_required').order_by('id')]
+        vectorizer = TfidfVectorizer(stop_words='english', sublinear_tf=True, ngram_range=(1, 2))
+        try:
+            data = pickle.dumps(vectorizer.fit(texts))
+        except ValueError:
+            # No jobs, or only stop words.
+            data = b''
+        fitted = PrescreenModel.objects.create(corpus_key=key, vectorizer=data, jobs=len(texts))
+        PrescreenModel.objects.filter(id__lt=fitted.id).delete()
+        return fitted
+
+
+def _model():
+    """The latest fitted model, or None if none is stored or the jobs had no usable terms."""
+    latest = PrescreenModel.objects.order_by('-id').values_list('id', flat=True).first()
+    if latest is None:
+        from .tasks import queue_prescreen_fit
+        queue_prescreen_fit()
+        return None
+    if _state['id'] != latest:
+        with _lock:
+            if _state['id'] != latest:
+                # A newer fit may have replaced ``latest`` meanwhile.
+                row = PrescreenModel.objects.filter(id__gte=latest).order_by('-id').first()
+                data = bytes(row.vectorizer)
+                _state['model'] = _Model(pickle.loads(data)) if data else None
+                _state['id'] = row.id
+                _job_vectors.clear()
+    return _state['model']
+
+
+def _job_vector(model, job):
+    key = (job.id, job.version)
+    with _lock:
+        vector = _job_vectors.get(key)
+        if vector is not None:
+            _job_vectors.move_to_end(key)
+            return vector
+    vector = model.vector(job_text(job))
+    with _lock:
+        _job_vectors[key] = vector
+        while len(_job_vectors) > MAX_CACHED_JOBS:
+            _job_vectors.popitem(last=False)
+    return vector
+
+
+def score(resume, job):
+    """Scores ``resume`` against ``job``; a Result."""
+    model = _model()
+    matched, missing = skills.match(resume, job)
+
+    started = time.perf_counter()
+    similarity = 0.0
+    if model is not None:
+        job_vector = _job_vector(model, job)
+        resume_vector = model.vector(resume_text(resume))
+        similarity = sum(w * job_vector.get(index, 0.0) for index, w in resume_vector.items())
+    required = len(matched) + len(missing)
+    skill_ratio = len(matched) / required if required else 0.0
+    weight = _setting('PRESCREEN_SKILL_WEIGHT', 0.6) if required else 0.0
+    combined = 100.0 * (weight * skill_ratio + (1 - weight) * similarity)
+    return Result(round(combined, 2), similarity, skill_ratio, matched, missing, time.perf_counter() - started)
+
+
+def record(resume, job, result):
+    """Stores ``result`` for the resume and job; returns the Prescreen."""
+    prescreen, _ = Prescreen.objects.update_or_create(
+        resume=resume, job=job,
+        defaults={
+            'job_version': job.version,
+            'score': result.score,
+            'similarity': result.similarity,
+            'skill_ratio': result.skill_ratio,
+        },
+    )
+    return prescreen
+
+
+def passes(prescreen):
+    """Whether the resume merits an LLM analysis: above the threshold, or in the job's top K."""
+    if not is_enabled() or prescreen.score >= _setting('PRESCREEN_THRESHOLD', 40):
+        return True
+    better = (
+        Prescreen.objects.filter(job_id=prescreen.job_id, job_version=prescreen.job_version, score__gt=prescreen.score)
+        .exclude(resume_id=prescreen.resume_id)
+        .count()
+    )
+    return better < _setting('PRESCREEN_TOP_K', 25)
+
+
+def summary(result):
+    """analyze_match-shaped feedback for a resume that did not pass the pre-screen."""
+    required = len(result.matched) + len(result.missing)
+    feedback = (
+        f"Your resume matches {len(result.matched)} of the {required} required skills"
+        if required else "Your resume was compared with the job description"
+    )
+    feedback += (
+        f" and scored {result.score:.0f}% in our first-pass screening, below the level for a "
+        "detailed AI review."
+    )
+    if result.missing:
+        suggestions = "Consider gaining experience with: " + ", ".join(result.missing) + "."
+    else:
+        suggestions = "Tailor your resume's summary and experience to the wording of the job description."
+    return {
+        'match_score': result.score,
+        'ai_feedback': feedback,
+        'improvement_suggestions': suggestions,
+    }
@@ -0,0 +1,97 @@
+"""
+Ranking every candidate against a job's required skills, without an LLM.
+
+``ResumeSkill`` is the inverted index: indexed on (skill, resume), its rows
+for a skill are that skill's postings list, and ``Resume.save`` rewrites a
+resume's rows whenever its parse changes (see jobs/skills.py). Ranking a job
+reads the postings of its required skills in one query, counts the matches
+per resume and keeps the top K with a heap.
+
+Each candidate is ranked by their latest parsed resume. The score is the
+share of required skills matched; ties go to the candidate whose matched
+skills are rarer (fewer postings), then to the newer resume.
+"""
+import heapq
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.db.models import Max
+
+from . import skills
+from .models import Resume, ResumeSkill
+
+DEFAULT_TOP_K = 50
+MAX_TOP_K = 500
+
+
+@dataclass
+class RankedCandidate:
+    resume_id: int
+    candidate_id: int
+    # Percentage of the job's required skills the resume has
+    score: float
+    matched: list = field(default_factory=list)
+    missing: list = field(default_factory=list)
+    resume: Resume = None
+
+
+def latest_resume_ids():
+    """Ids of each candidate's latest parsed resume."""
+    return (
+        Resume.objects.filter(parsed_data__isnull=False)
+        .values('candidate_id')
+        .annotate(latest=Max('id'))
+        .values('latest')
+    )
+
+
+def rank(job, k=DEFAULT_TOP_K):
+    """The ``k`` best-matching candidates for ``job`` as RankedCandidates, best first."""
+    k = max(1, min(k, MAX_TOP_K))
+    job_rows = skills.job_skill_rows(job)
+    if not job_rows:
+        return []
+
+    postings = (
+        ResumeSkill.objects.filter(skill_id__in=[skill_id for skill_id, _ in job_rows], resume_id__in=latest_resume_ids())
+        .values_list('skill_id', 'resume_id', 'resume__candidate_id')
+    )
+    hits = defaultdict(set)
+    owners = {}
+    frequency = defaultdict(int)
+    for skill_id, resume_id, candidate_id in postings:
+        hits[resume_id].add(skill_id)
+        owners[resume_id] = candidate_id
+        frequency[skill_id] += 1
+    if not hits:
+        return []
+
+    total = len(hits)
+    rarity = {skill_id: math.log((1 + total) / (1 + count)) for skill_id, count in frequency.items()}
+    best = heapq.nlargest(
+        k,
+        hits.items(),
+        key=lambda item: (len(item[1]), sum(rarity[s] for s in item[1]), item[0]),
+    )
+
+    ranked = []
+    for resume_id, matched_ids in best:
+        matched, missing = skills.split(job_rows, matched_ids)
+        ranked.append(RankedCandidate(
+            resume_id=resume_id,
+            candidate_id=owners[resume_id],
+            score=100.0 * len(matched) / len(job_rows),
+            matched=matched,
+            missing=missing,
+        ))
+    return ranked
+
+
+def rank_with_resumes(job, k=DEFAULT_TOP_K):
+    """``rank`` with each result's Resume and candidate loaded."""
+    ranked = rank(job, k)
+    resumes = Resume.objects.select_related('candidate').in_bulk([r.resume_id for r in ranked])
+    for result in ranked:
+        result.resume = resumes.get(result.resume_id)
+    return [result for result in ranked if result.resume is not None]
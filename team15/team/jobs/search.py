@@ -0,0 +1,202 @@
+"""
+Full-text job search for the job list.
+
+Jobs are indexed over title, skills, location and description and ranked
+with those fields weighted in that order:
+
+* SQLite: an FTS5 table (``jobs_job_fts``) with the jobs table as external
+  content, kept in sync by triggers on every insert, update and delete, and
+  ranked with bm25.
+* PostgreSQL: a GIN index on a weighted ``tsvector`` expression, ranked with
+  ts_rank_cd.
+* Other databases fall back to ``icontains`` filters.
+
+``install`` creates the index (the migration runs it); ``manage.py
+rebuild_job_search`` runs it again and reindexes every job, which is needed
+on SQLite if a later migration rebuilds the jobs table and drops the
+triggers.
+
+Results are paged with keyset pagination: a page's cursor holds the rank and
+id of its last job, and the next page starts after it, so later pages cost
+the same as the first.
+"""
+import base64
+import json
+import re
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import Job
+
+FTS_TABLE = 'jobs_job_fts'
+PG_INDEX = 'jobs_job_search'
+
+# Column weights; bm25 and ts_rank_cd use them in this order.
+COLUMNS = ('title', 'skills_required', 'location', 'description')
+BM25_WEIGHTS = (10.0, 8.0, 3.0, 1.0)
+PG_WEIGHTS = ('A', 'A', 'B', 'C')
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+# PostgreSQL: must match the indexed expression exactly for the index to be used.
+PG_VECTOR = " || ".join(
+    f"setweight(to_tsvector('english', coalesce({column}, '')), '{weight}')"
+    for column, weight in zip(COLUMNS, PG_WEIGHTS)
+)
+
+_SQLITE_INSTALL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{', '.join(COLUMNS)}, content='jobs_job', content_rowid='id', tokenize='porter unicode61')",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES('rank', 'bm25({', '.join(map(str, BM25_WEIGHTS))})')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON jobs_job BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, {', '.join(COLUMNS)}) VALUES (new.id, {', '.join('new.' + c for c in COLUMNS)}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON jobs_job BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {', '.join(COLUMNS)}) VALUES ('delete', old.id, {', '.join('old.' + c for c in COLUMNS)}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON jobs_job BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {', '.join(COLUMNS)}) VALUES ('delete', old.id, {', '.join('old.' + c for c in COLUMNS)}); "
+    f"INSERT INTO {FTS_TABLE}(rowid, {', '.join(COLUMNS)}) VALUES (new.id, {', '.join('new.' + c for c in COLUMNS)}); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')",
+]
+
+_SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+_PG_INSTALL = [f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON jobs_job USING GIN (({PG_VECTOR}))"]
+_PG_UNINSTALL = [f"DROP INDEX IF EXISTS {PG_INDEX}"]
+
+
+@dataclass
+class Page:
+    jobs: list
+    # Cursor of the next page, or None on the last page
+    next_cursor: str = None
+
+
+def _page_size():
+    return getattr(settings, 'JOB_SEARCH_PAGE_SIZE', 24)
+
+
+def _engine(conn=None):
+    vendor = (conn or connection).vendor
+    if vendor == 'sqlite':
+        return 'fts5'
+    if vendor == 'postgresql':
+        return 'tsvector'
+    return None
+
+
+def install(conn=None):
+    """Creates (or recreates) the search index for the database and indexes every job."""
+    conn = conn or connection
+    statements = {'fts5': _SQLITE_INSTALL, 'tsvector': _PG_INSTALL}.get(_engine(conn), [])
+    with conn.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def uninstall(conn=None):
+    conn = conn or connection
+    statements = {'fts5': _SQLITE_UNINSTALL, 'tsvector': _PG_UNINSTALL}.get(_engine(conn), [])
+    with conn.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def _encode(rank, job_id):
+    return base64.urlsafe_b64encode(json.dumps([rank, job_id]).encode()).decode().rstrip('=')
+
+
+def _decode(cursor):
+    """(rank, id) from a cursor, or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        rank, job_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return float(rank), int(job_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def _tokens(query):
+    return _TOKEN.findall(query.lower())[:16]
+
+
+def _fts5_ranked(tokens, after, limit):
+    # Each token is a quoted prefix query; FTS5 ANDs them. Lower rank is better.
+    match = " ".join(f'"{token}"*' for token in tokens)
+    sql = f"SELECT rowid, rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+    params = [match]
+    if after:
+        sql += " AND (rank > %s OR (rank = %s AND rowid > %s))"
+        params += [after[0], after[0], after[1]]
+    sql += " ORDER BY rank, rowid LIMIT %s"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [limit])
+        return cursor.fetchall()
+
+
+def _tsvector_ranked(tokens, after, limit):
+    # Higher rank is better; the tsquery ANDs prefix matches of each token.
+    # ts_rank_cd returns float4; as float8 the rank in the cursor compares equal to it.
+    query = " & ".join(f"{token}:*" for token in tokens)
+    sql = (
+        f"SELECT id, rank FROM (SELECT id, ts_rank_cd({PG_VECTOR}, q)::float8 AS rank "
+        f"FROM jobs_job, to_tsquery('english', %s) q WHERE ({PG_VECTOR}) @@ q) ranked"
+    )
+    params = [query]
+    if after:
+        sql += " WHERE rank < %s OR (rank = %s AND id > %s)"
+        params += [after[0], after[0], after[1]]
+    sql += " ORDER BY rank DESC, id LIMIT %s"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [limit])
+        return cursor.fetchall()
+
+
+def _fallback_ranked(tokens, after, limit):
+    jobs = Job.objects.all()
+    for token in tokens:
+        matches = Q()
+        for column in COLUMNS:
+            matches |= Q(**{f'{column}__icontains': token})
+        jobs = jobs.filter(matches)
+    if after:
+        jobs = jobs.filter(id__lt=after[1])
+    return [(job_id, 0.0) for job_id in jobs.order_by('-id').values_list('id', flat=True)[:limit]]
+
+
+def search(query, cursor=None):
+    """
+    A Page of jobs matching ``query``, best first; all jobs, newest first, if
+    the query has no words. ``cursor`` is the previous page's next_cursor.
+    """
+    size = _page_size()
+    after = _decode(cursor)
+    tokens = _tokens(query or "")
+
+    if not tokens:
+        jobs = Job.objects.order_by('-id')
+        if after:
+            jobs = jobs.filter(id__lt=after[1])
+        jobs = list(jobs[:size + 1])
+        next_cursor = _encode(0, jobs[size - 1].id) if len(jobs) > size else None
+        return Page(jobs[:size], next_cursor)
+
+    ranked = {
+        'fts5': _fts5_ranked,
+        'tsvector': _tsvector_ranked,
+    }.get(_engine(), _fallback_ranked)(tokens, after, size + 1)
+    next_cursor = None
+    if len(ranked) > size:
+        last_id, last_rank = ranked[size - 1]
+        next_cursor = _encode(last_rank, last_id)
+    ranked = ranked[:size]
+    by_id = Job.objects.in_bulk([job_id for job_id, _ in ranked])
+    return Page([by_id[job_id] for job_id, _ in ranked if job_id in by_id], next_cursor)
@@ -0,0 +1,267 @@
+"""
+Canonical skills, for matching resumes against jobs.
+
+Skill names are reduced to a key (lowercase, without spaces, dots, hyphens
+or underscores, so "Node.js", "node js" and "NodeJS" agree) and looked up
+in ``SkillAlias``, which maps keys and synonyms ("JS", "JavaScript") to one
+``Skill``. Names never seen before become new skills.
+
+A job's required skills and a resume's parsed skills are resolved when they
+are saved (``Job.save``/``Resume.save``) into the ``JobSkill`` and
+``ResumeSkill`` tables, so matching is a set intersection of skill ids.
+Rows saved before the tables existed are resolved the first time they are
+matched; ``manage.py normalize_skills`` does all of them at once and loads
+new entries of ``CANONICAL_SKILLS``.
+
+Resolved keys are kept in this process. After merging skills in the
+database, restart the workers so they see the change.
+"""
+import re
+import threading
+
+from django.db import IntegrityError, transaction
+
+# Canonical name -> synonyms. Spelling variants that reduce to the same key
+# (e.g. "Node JS") need no entry.
+CANONICAL_SKILLS = {
+    'JavaScript': ['JS', 'ECMAScript', 'ES6'],
+    'TypeScript': ['TS'],
+    'Python': ['Python3', 'Python 3'],
+    'Java': [],
+    'C++': ['CPP'],
+    'C#': ['CSharp', 'C Sharp'],
+    'Go': ['Golang'],
+    'SQL': [],
+    'PostgreSQL': ['Postgres', 'psql'],
+    'MySQL': [],
+    'MongoDB': ['Mongo'],
+    'HTML': ['HTML5'],
+    'CSS': ['CSS3'],
+    'React': ['ReactJS', 'React.js'],
+    'Angular': ['AngularJS', 'Angular.js'],
+    'Vue.js': ['Vue', 'VueJS'],
+    'Node.js': ['Node', 'NodeJS'],
+    'Django': [],
+    'Flask': [],
+    'REST APIs': ['REST', 'REST API', 'RESTful APIs', 'RESTful API'],
+    'Docker': [],
+    'Kubernetes': ['K8s'],
+    'Amazon Web Services': ['AWS'],
+    'Google Cloud Platform': ['GCP', 'Google Cloud'],
+    'Microsoft Azure': ['Azure'],
+    'CI/CD': ['Continuous Integration', 'Continuous Delivery'],
+    'Git': [],
+    'Machine Learning': ['ML'],
+    'Deep Learning': ['DL'],
+    'Artificial Intelligence': ['AI'],
+    'Natural Language Processing': ['NLP'],
+    'Scikit-learn': ['sklearn', 'scikit learn'],
+    'Pandas': [],
+    'Statistics': ['Stats'],
+}
+
+MAX_NAME_LENGTH = 100
+
+_KEY_SEPARATORS = re.compile(r'[\s\-_.]+')
+
+# key -> (skill id, canonical name)
+_interned = {}
+_interned_lock = threading.Lock()
+
+
+def _clean(name):
+    """Strips template artifacts (braces) and surrounding whitespace."""
+    if not isinstance(name, str):
+        name = str(name)
+    return name.replace('{', '').replace('}', '').strip()
+
+
+def extract_skills_list(skills_text):
+    """List of skills from a comma-separated string (e.g. Job.skills_required) or a list."""
+    if not skills_text:
+        return []
+
+    if isinstance(skills_text, list):
+        skills = [_clean(s) for s in skills_text]
+        return [s for s in skills if s.lower() not in ['skills', 'skill', '']]
+
+    # Remove "Skills:" prefix if present
+    if ':' in skills_text:
+        skills_text = skills_text.split(':', 1)[1]
+
+    skills = [_clean(s) for s in skills_text.split(',') if s.strip()]
+    return [s for s in skills if s.lower() not in ['skills', 'skill', '']]
+
+
+def skill_key(name):
+    return _KEY_SEPARATORS.sub('', _clean(name).lower())[:MAX_NAME_LENGTH]
+
+
+def reset():
+    """Forgets the keys resolved in this process."""
+    with _interned_lock:
+        _interned.clear()
+
+
+def _create(key, name):
+    from .models import Skill, SkillAlias
+
+    try:
+        with transaction.atomic():
+            skill = Skill.objects.create(name=name[:MAX_NAME_LENGTH])
+            SkillAlias.objects.create(skill=skill, key=key)
+    except IntegrityError:
+        # Created concurrently, or a skill already has this name under another key.
+        alias = SkillAlias.objects.filter(key=key).select_related('skill').first()
+        if alias is not None:
+            skill = alias.skill
+        else:
+            skill = Skill.objects.get(name=name[:MAX_NAME_LENGTH])
+            SkillAlias.objects.get_or_create(key=key, defaults={'skill': skill})
+    return skill.id, skill.name
+
+
+def _resolve(names):
+    """[(skill id, name)] for the non-blank ``names``, creating skills for names not seen before."""
+    from .models import SkillAlias
+
+    keyed = [(skill_key(name), _clean(name)) for name in names]
+    keyed = [(key, name) for key, name in keyed if key]
+    resolved = {key: _interned[key] for key, _ in keyed if key in _interned}
+    missing = {key for key, _ in keyed if key not in resolved}
+    if missing:
+        found = SkillAlias.objects.filter(key__in=missing).values_list('key', 'skill_id', 'skill__name')
+        for key, skill_id, name in found:
+            resolved[key] = (skill_id, name)
+    for key, name in keyed:
+        if key not in resolved:
+            resolved[key] = _create(key, name)
+    with _interned_lock:
+        _interned.update(resolved)
+    return [(resolved[key][0], name) for key, name in keyed]
+
+
+def intern(names):
+    """Skill ids for ``names`` in order, without duplicates; blank names are skipped."""
+    return list(dict.fromkeys(skill_id for skill_id, _ in _resolve(names)))
+
+
+def _labelled(names):
+    """(skill id, label) for ``names``, keeping the first label of each skill."""
+    labelled = {}
+    for skill_id, name in _resolve(names):
+        labelled.setdefault(skill_id, name)
+    return list(labelled.items())
+
+
+def set_job_skills(job):
+    """Resolves ``job.skills_required`` into its JobSkill rows."""
+    from .models import JobSkill
+
+    rows = _labelled(extract_skills_list(job.skills_required))
+    current = list(job.job_skills.order_by('position').values_list('skill_id', 'label'))
+    if current == rows:
+        return
+    with transaction.atomic():
+        job.job_skills.all().delete()
+        JobSkill.objects.bulk_create(
+            JobSkill(job=job, skill_id=skill_id, label=label[:MAX_NAME_LENGTH], position=position)
+            for position, (skill_id, label) in enumerate(rows)
+        )
+
+
+def resume_skill_names(resume):
+    if not resume.parsed_data:
+        return []
+    return extract_skills_list(resume.parsed_data.get('Skills', []))
+
+
+def set_resume_skills(resume):
+    """Resolves the resume's parsed skills into its ResumeSkill rows."""
+    from .models import ResumeSkill
+
+    ids = set(intern(resume_skill_names(resume)))
+    current = set(resume.resume_skills.values_list('skill_id', flat=True))
+    if current == ids:
+        return
+    with transaction.atomic():
+        resume.resume_skills.exclude(skill_id__in=ids).delete()
+        ResumeSkill.objects.bulk_create(ResumeSkill(resume=resume, skill_id=skill_id) for skill_id in ids - current)
+
+
+def job_skill_rows(job):
+    """[(skill id, label)] of the job's required skills, in the order they were entered."""
+    rows = list(job.job_skills.order_by('position').values_list('skill_id', 'label'))
+    if not rows and extract_skills_list(job.skills_required):
+        # Saved before skills were normalized.
+        set_job_skills(job)
+        rows = list(job.job_skills.order_by('position').values_list('skill_id', 'label'))
+    return rows
+
+
+def resume_skill_ids(resume):
+    if resume is None:
+        return set()
+    ids = set(resume.resume_skills.values_list('skill_id', flat=True))
+    if not ids and resume_skill_names(resume):
+        set_resume_skills(resume)
+        ids = set(resume.resume_skills.values_list('skill_id', flat=True))
+    return ids
+
+
+def split(job_rows, resume_ids):
+    """(matched labels, missing labels) of ``job_rows`` against a set of skill ids."""
+    matched = [label for skill_id, label in job_rows if skill_id in resume_ids]
+    missing = [label for skill_id, label in job_rows if skill_id not in resume_ids]
+    return matched, missing
+
+
+def match(resume, job):
+    """(matched, missing): the job's required skills the resume has and lacks."""
+    return split(job_skill_rows(job), resume_skill_ids(resume))
+
+
+def match_names(resume_skills, job_skills):
+    """``match`` for unsaved skill lists (or comma-separated strings)."""
+    resume_ids = set(intern(extract_skills_list(resume_skills)))
+    return split(_labelled(extract_skills_list(job_skills)), resume_ids)
+
+
+def _merge(source, target):
+    """Moves the job and resume rows of skill ``source`` to ``target`` and deletes ``source``."""
+    from .models import JobSkill, ResumeSkill
+
+    for model, owner in ((JobSkill, 'job_id'), (ResumeSkill, 'resume_id')):
+        owners = model.objects.filter(skill=target).values_list(owner, flat=True)
+        model.objects.filter(skill=source, **{f'{owner}__in': owners}).delete()
+        model.objects.filter(skill=source).update(skill=target)
+    source.delete()
+
+
+def load_canonical():
+    """
+    Creates CANONICAL_SKILLS and their synonyms. Skills created earlier from a
+    name that is now a synonym are merged into the canonical skill. Returns
+    the number of aliases added or moved.
+    """
+    from .models import Skill, SkillAlias
+
+    changed = 0
+    with transaction.atomic():
+        for name, synonyms in CANONICAL_SKILLS.items():
+            skill, _ = Skill.objects.get_or_create(name=name)
+            for alias_name in [name, *synonyms]:
+                alias = SkillAlias.objects.filter(key=skill_key(alias_name)).select_related('skill').first()
+                if alias is None:
+                    SkillAlias.objects.create(key=skill_key(alias_name), skill=skill)
+                elif alias.skill_id != skill.id:
+                    previous = alias.skill
+                    alias.skill = skill
+                    alias.save(update_fields=['skill'])
+                    if not previous.aliases.exists():
+                        _merge(previous, skill)
+                else:
+                    continue
+                changed += 1
+    reset()
+    return changed
@@ -0,0 +1,114 @@
+"""
+Background jobs for resume screening (see ai_utils/background.py).
+"""
+from django.db import IntegrityError
+
+from ai_utils.background import background_task, enqueue
+from ai_utils.cache import bypass_cache
+from ai_utils.utils import parse_resume, analyze_match
+from . import prescreen
+from .extraction import extract
+from .models import Job, MatchAnalysis, Resume
+
+
+def extract_resume_text(resume):
+    """Reads the uploaded resume file and returns its plain text, recording how extraction went."""
+    extraction = extract(resume.file)
+    resume.extraction_engine = extraction.engine
+    resume.extraction_pages = extraction.pages
+    resume.extraction_seconds = extraction.seconds
+    resume.text = extraction.text
+    if extraction.truncated:
+        print(f"Resume {resume.id}: read {extraction.pages} of {extraction.total_pages} pages")
+    return extraction.text
+
+
+def stored_analysis(resume, job):
+    """The stored analysis of ``resume`` against the current version of ``job``, or None."""
+    return MatchAnalysis.objects.filter(
+        resume_fingerprint=resume.fingerprint, job=job, job_version=job.version,
+    ).first()
+
+
+def match_analysis(resume, job, refresh=False):
+    """
+    The stored analysis of ``resume`` (parsed) against the current version of
+    ``job``, made again only when there is none or ``refresh`` is set.
+    analyze_match runs only for resumes that pass the local pre-screen (see
+    jobs/prescreen.py); the others get the pre-screen's summary. Analyses of
+    older versions of the job are dropped.
+    """
+    if not refresh:
+        analysis = stored_analysis(resume, job)
+        if analysis is not None:
+            return analysis
+
+    result = prescreen.score(resume, job)
+    matched_skills, missing_skills = result.matched, result.missing
+    if not prescreen.passes(prescreen.record(resume, job, result)):
+        source, match_data = 'prescreen', prescreen.summary(result)
+    elif refresh:
+        with bypass_cache():
+            source, match_data = 'llm', analyze_match(resume.parsed_data, job.description, missing_skills, resume_id=resume.id)
+    else:
+        source, match_data = 'llm', analyze_match(resume.parsed_data, job.description, missing_skills, resume_id=resume.id)
+
+    values = {
+        'source': source,
+        'match_score': match_data.get('match_score', 0),
+        'ai_feedback': match_data.get('ai_feedback', ''),
+        'improvement_suggestions': match_data.get('improvement_suggestions', ''),
+        # Comma-separated for DB compatibility; views recalculate the lists
+        'skills_matched': ", ".join(matched_skills),
+        'missing_skills': ", ".join(missing_skills),
+    }
+    lookup = {'resume_fingerprint': resume.fingerprint, 'job': job, 'job_version': job.version}
+    try:
+        analysis, _ = MatchAnalysis.objects.update_or_create(**lookup, defaults=values)
+    except IntegrityError:
+        # A concurrent request stored the same analysis first.
+        analysis = MatchAnalysis.objects.get(**lookup)
+    MatchAnalysis.objects.filter(resume_fingerprint=resume.fingerprint, job=job).exclude(id=analysis.id).delete()
+    return analysis
+
+
+@background_task(queue='default', max_attempts=3, backoff=10)
+def screen_resume(resume_id, job_id, refresh=False):
+    resume = Resume.objects.get(id=resume_id)
+    job = Job.objects.get(id=job_id)
+
+    # 1. AI Parse - Extract Skills, unless the same file was parsed meanwhile
+    if resume.parsed_data is None and resume.reuse_parse(resume.earlier_copy()):
+        resume.save(update_fields=['parsed_data', 'extraction_engine', 'extraction_pages', 'extraction_seconds', 'text'])
+    if resume.parsed_data is None:
+        file_text = extract_resume_text(resume)
+        resume.parsed_data = parse_resume(file_text)
+        resume.save(update_fields=['parsed_data', 'extraction_engine', 'extraction_pages', 'extraction_seconds', 'text'])
+
+    # 2. AI Match against the job - Score & Feedback, reused if already stored
+    # unless a refresh was asked for
+    changed = match_analysis(resume, job, refresh=refresh).apply_to(resume)
+    if changed:
+        resume.save(update_fields=changed)
+    return {'match_score': resume.match_score}
+
+
+# Seconds a refit waits, so a burst of job edits is fitted once.
+PRESCREEN_FIT_DELAY = 5
+
+
+@background_task(queue='batch', max_attempts=2)
+def fit_prescreen_model():
+    fitted = prescreen.fit()
+    return {'jobs': fitted.jobs}
+
+
+def queue_prescreen_fit():
+    """Queues a refit of the pre-screen model (see jobs/prescreen.py)."""
+    # A running fit may have read the jobs already, so only a queued one is reused.
+    return enqueue(
+        fit_prescreen_model.name,
+        delay=PRESCREEN_FIT_DELAY,
+        dedupe_key='prescreen-fit',
+        dedupe_running=False,
+    )
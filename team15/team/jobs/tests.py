@@ -1,3 +1,89 @@
-from django.test import TestCase
+import base64
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import User
+
+from . import search
+from .models import Job
+
+
+@override_settings(JOB_SEARCH_PAGE_SIZE=2)
+class JobSearchTests(TestCase):
+    def setUp(self):
+        self.hr = User.objects.create_user(username='hr', password='pw', role='hr')
+
+    def make_job(self, title='Python Developer', description='Build web services', **fields):
+        fields.setdefault('skills_required', 'Python, Django')
+        fields.setdefault('experience_required', '2 years')
+        fields.setdefault('location', 'Remote')
+        return Job.objects.create(hr=self.hr, title=title, description=description, **fields)
+
+    def collect(self, query):
+        """Ids of every page of ``query``, following the cursors."""
+        ids, cursor = [], None
+        while True:
+            page = search.search(query, cursor)
+            ids += [job.id for job in page.jobs]
+            if page.next_cursor is None:
+                return ids
+            cursor = page.next_cursor
+
+    def test_pages_through_tied_ranks_without_gaps_or_repeats(self):
+        tied = [self.make_job().id for _ in range(5)]
+        self.make_job(title='Nurse', description='Ward care', skills_required='Triage')
+
+        self.assertEqual(self.collect('python'), sorted(tied))
+
+    def test_pages_follow_rank_then_id(self):
+        best = self.make_job(title='Python Python Engineer', description='Python everywhere')
+        others = [self.make_job(description='Some python scripting').id for _ in range(3)]
+
+        ids = self.collect('python')
+        self.assertEqual(ids[0], best.id)
+        self.assertEqual(sorted(ids[1:]), sorted(others))
+
+    def test_empty_query_pages_newest_first(self):
+        ids = [self.make_job().id for _ in range(3)]
+
+        self.assertEqual(self.collect(''), ids[::-1])
+
+    def test_prefix_matches(self):
+        job = self.make_job(title='Kubernetes Administrator')
+
+        self.assertEqual(self.collect('kube'), [job.id])
+
+    def test_index_follows_updates(self):
+        job = self.make_job(description='Maintain the zebra pipeline')
+        job.description = 'Maintain the giraffe pipeline'
+        job.save()
+
+        self.assertEqual(self.collect('zebra'), [])
+        self.assertEqual(self.collect('giraffe'), [job.id])
+
+    def test_index_follows_deletes(self):
+        job = self.make_job(description='Maintain the zebra pipeline')
+        kept = self.make_job(description='Feed the zebra')
+        job.delete()
+
+        self.assertEqual(self.collect('zebra'), [kept.id])
+
+    def test_malformed_cursor_returns_first_page(self):
+        for _ in range(3):
+            self.make_job()
+        first = search.search('python')
+        not_a_pair = base64.urlsafe_b64encode(b'{"rank": 1}').decode()
+
+        for cursor in ['garbage', '!!!', not_a_pair, base64.urlsafe_b64encode(b'[1]').decode()]:
+            with self.subTest(cursor=cursor):
+                page = search.search('python', cursor)
+                self.assertEqual(page.jobs, first.jobs)
+                self.assertEqual(page.next_cursor, first.next_cursor)
+
+    def test_job_list_ignores_malformed_cursor(self):
+        self.make_job()
+        self.client.force_login(self.hr)
+
+        response = self.client.get(reverse('job_list'), {'q': 'python', 'after': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 200)
@@ -9,9 +9,11 @@ urlpatterns = [
     path('<int:pk>/edit/', views.edit_job, name='edit_job'),
     path('<int:pk>/apply/', views.apply_job, name='apply_job'),
     path('screening-preview/<int:resume_id>/<int:job_id>/', views.screening_preview, name='screening_preview'),
+    path('screening-preview/<int:resume_id>/<int:job_id>/refresh/', views.refresh_analysis, name='refresh_analysis'),
     path('confirm-apply/<int:resume_id>/<int:job_id>/', views.confirm_apply, name='confirm_apply'),
     path('screening/<int:pk>/', views.screening_result, name='screening_result'),
     path('<int:pk>/applicants/', views.view_applicants, name='view_applicants'),
+    path('<int:pk>/candidates/', views.rank_candidates, name='rank_candidates'),
     path('application/<int:pk>/status/<str:status>/', views.update_status, name='update_status'),
     path('applications/', views.my_applications, name='my_applications'),
     path('application/<int:pk>/', views.application_detail, name='application_detail'),
@@ -1,83 +1,27 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_POST
 from .models import Job, Resume, Application
 from .forms import JobPostForm, ResumeUploadForm
 from django.contrib import messages
-from ai_utils.utils import parse_resume, analyze_match, get_gemini_client
-import PyPDF2
-import docx
-import io
+from . import ranking, search, skills
+from .extraction import file_sha256
+from .skills import extract_skills_list
+from .tasks import screen_resume, stored_analysis
+from ai_utils.background import enqueue
+from ai_utils.models import BackgroundJob
+from django.urls import reverse
 import json
 
-def extract_skills_list(skills_text):
-    """Helper to extract list of skills from comma-separated string."""
-    if not skills_text:
-        return []
-    
-    # Pre-clean strings from common template artifacts
-    def clean_skill(s):
-        if not isinstance(s, str):
-            return str(s)
-        # Remove literal {{ skill }} patterns and variations
-        s = s.replace('{{', '').replace('}}', '').replace('{', '').replace('}', '').strip()
-        return s
-
-    if isinstance(skills_text, list):
-        skills = [clean_skill(s) for s in skills_text]
-        return [s for s in skills if s.lower() not in ['skills', 'skill', '']]
-    
-    # Remove "Skills:" prefix if present
-    if ':' in skills_text:
-        skills_text = skills_text.split(':', 1)[1]
-        
-    skills = [clean_skill(s) for s in skills_text.split(',') if s.strip()]
-    return [s for s in skills if s.lower() not in ['skills', 'skill', '']]
-
 def calculate_skills_match(resume_skills, job_skills_text):
     """
-    Calculates matched and missing skills dynamically.
+    Calculates matched and missing skills of unsaved skill lists; saved jobs
+    and resumes are matched with skills.match.
     resume_skills: list of strings
     job_skills_text: comma-separated string
     """
-    # Normalize job skills (lowercase for comparison)
-    job_skills_list = extract_skills_list(job_skills_text)
-    job_skills_set = set(s.lower() for s in job_skills_list)
-    
-    # Normalize resume skills
-    if isinstance(resume_skills, str):
-        # Handle case where resume_skills might be a string
-        resume_skills = extract_skills_list(resume_skills)
-    
-    resume_skills_set = set(s.lower() for s in resume_skills)
+    return skills.match_names(resume_skills, job_skills_text)
 
-    # Calculate matches (intersection)
-    # We want to return the original formatting from Job/Resume if possible, or just the lowercase keys
-    # For display, let's try to preserve title casing from Job requirements if it matches
-    
-    matched_skills_lower = job_skills_set.intersection(resume_skills_set)
-    missing_skills_lower = job_skills_set.difference(resume_skills_set)
-    
-    # Re-map to original cases for display niceness
-    matched_skills = []
-    missing_skills = []
-    
-    # Map back to original job skill casing
-    for skill in job_skills_list:
-        if skill.lower() in matched_skills_lower:
-            matched_skills.append(skill)
-        elif skill.lower() in missing_skills_lower:
-            missing_skills.append(skill)
-            
-    # Paranoid verification check
-    # Ensure no template placeholders slipped through
-    final_missing = []
-    for skill in missing_skills:
-        clean = skill.replace('{', '').replace('}', '').strip()
-        if clean.lower() not in ['skill', 'skills', '']:
-            final_missing.append(skill)
-            
-    return matched_skills, final_missing
-    
 def get_recommended_courses(missing_skills):
     """Helper to get recommended courses based on missing skills."""
     from lms.models import Course
@@ -144,11 +88,14 @@ def hr_jobs(request):
 
 @login_required
 def job_list(request):
-    jobs = Job.objects.all().order_by('-created_at')
-    query = request.GET.get('q')
-    if query:
-        jobs = jobs.filter(title__icontains=query) | jobs.filter(skills_required__icontains=query)
-    return render(request, 'jobs/job_list.html', {'jobs': jobs})
+    query = request.GET.get('q', '')
+    page = search.search(query, request.GET.get('after'))
+    return render(request, 'jobs/job_list.html', {
+        'jobs': page.jobs,
+        'query': query,
+        'next_cursor': page.next_cursor,
+        'is_first_page': not request.GET.get('after'),
+    })
 
 @login_required
 def job_detail(request, pk):
@@ -166,93 +113,75 @@ def apply_job(request, pk):
     if request.method == 'POST':
         form = ResumeUploadForm(request.POST, request.FILES)
         if form.is_valid():
-            try:
-                resume_obj = form.save(commit=False)
-                resume_obj.candidate = request.user
-                resume_obj.save()
-                
-                # Extract text
-                file_text = ""
-                file = request.FILES['file']
-                try:
-                    file.seek(0)
-                    if file.name.endswith('.pdf'):
-                        reader = PyPDF2.PdfReader(io.BytesIO(file.read()))
-                        for page in reader.pages:
-                            file_text += page.extract_text()
-                    elif file.name.endswith('.docx'):
-                        doc = docx.Document(file)
-                        for para in doc.paragraphs:
-                            file_text += para.text + "\n"
-                    else:
-                        # Fallback for other text files
-                        file_text = file.read().decode('utf-8', errors='ignore')
-
-                except Exception as e:
-                    messages.error(request, f"Extraction Error: {e}")
-                    return redirect('apply_job', pk=pk)
-                
-                # 1. AI Parse - Extract Skills
-                parsed_data = parse_resume(file_text)
-                resume_obj.parsed_data = parsed_data
-                resume_obj.save()
-                
-                # 2. Extract Job Skills
-                job_skills_text = job.skills_required
-                
-                # 3. Dynamic Matching
-                resume_skills = parsed_data.get('Skills', [])
-                matched_skills, missing_skills = calculate_skills_match(resume_skills, job_skills_text)
-                
-                # AI Match - Get Score & Feedback Only
-                # We still use AI for score and feedback, but we override the skills lists
-                # PASS MISSING SKILLS TO AI FOR BETTER SUGGESTIONS
-                match_data = analyze_match(parsed_data, job.description, missing_skills)
-                
-                # Update resume with calculated data
-                resume_obj.match_score = match_data.get('match_score', 0)
-                resume_obj.ai_feedback = match_data.get('ai_feedback', '')
-                
-                # Store as comma-separated string for DB compatibility, but views will recalculate lists
-                resume_obj.skills_matched = ", ".join(matched_skills)
-                resume_obj.missing_skills = ", ".join(missing_skills)
-                resume_obj.improvement_suggestions = match_data.get('improvement_suggestions', '')
-                resume_obj.save()
-                
-                return redirect('screening_preview', resume_id=resume_obj.id, job_id=job.id)
-            except Exception as e:
-                import traceback
-                traceback.print_exc()
-                messages.error(request, f"Screening Error: {e}")
-                return redirect('apply_job', pk=pk)
+            resume_obj = form.save(commit=False)
+            resume_obj.candidate = request.user
+            resume_obj.sha256 = file_sha256(form.cleaned_data['file'])
+            earlier = resume_obj.earlier_copy()
+            if earlier is not None:
+                # Same file as an earlier application: keep one stored copy
+                # and skip extraction and parsing if it was already parsed.
+                resume_obj.file = earlier.file.name
+                resume_obj.reuse_parse(earlier)
+            resume_obj.save()
+
+            # Text extraction, parsing and matching run as a background job;
+            # the preview page waits for it.
+            screening = enqueue(screen_resume.name, owner=request.user, resume_id=resume_obj.id, job_id=job.id)
+            return redirect(f"{reverse('screening_preview', args=[resume_obj.id, job.id])}?job={screening.id}")
     else:
         form = ResumeUploadForm()
     return render(request, 'jobs/apply_job.html', {'form': form, 'job': job})
 
+def _screening_pending(request, screening):
+    return render(request, 'ai_utils/job_pending.html', {
+        'job': screening,
+        'title': 'Resume Screening',
+        'message': 'AI is reading your resume and matching it against the job...',
+    })
+
+def _queue_screening(request, resume, job, refresh=False):
+    """Queues the screening job and sends the user to the preview, which waits for it."""
+    screening = enqueue(
+        screen_resume.name,
+        owner=request.user,
+        dedupe_key=f"screening:{resume.id}:{job.id}:{'refresh' if refresh else 'match'}",
+        resume_id=resume.id,
+        job_id=job.id,
+        refresh=refresh,
+    )
+    return redirect(f"{reverse('screening_preview', args=[resume.id, job.id])}?job={screening.id}")
+
 @login_required
 def screening_preview(request, resume_id, job_id):
     resume = get_object_or_404(Resume, id=resume_id, candidate=request.user)
     job = get_object_or_404(Job, id=job_id)
-    
-    # Dynamic Recalculation (Fresh on every request)
-    # print(f"DEBUG: Job ID {job.id}, Skills: {job.skills_required}")
-    resume_skills = resume.parsed_data.get('Skills', [])
-    # print(f"DEBUG: Resume Skills: {resume_skills}")
-    matched_skills, missing_skills = calculate_skills_match(resume_skills, job.skills_required)
-    # print(f"DEBUG: Calculated Missing Skills: {missing_skills}")
-
-    # FORCE UPDATE AI ANALYSIS (to fix stale data for the user)
-    import datetime
-    now_str = datetime.datetime.now().strftime("%H:%M:%S")
-    
-    # Re-run analysis with fresh prompt requirements
-    match_data = analyze_match(resume.parsed_data, job.description, missing_skills)
-    
-    # Update AND Save the resume with clean feedback
-    resume.match_score = match_data.get('match_score', 0)
-    resume.ai_feedback = match_data.get('ai_feedback', '')
-    resume.improvement_suggestions = match_data.get('improvement_suggestions', '')
-    resume.save()
+    screening = BackgroundJob.objects.filter(id=request.GET.get('job') or 0, owner=request.user).first()
+
+    if resume.parsed_data is None:
+        # Screening job has not finished yet
+        if screening is None or screening.status == 'failed':
+            error = screening.error if screening else "Resume screening did not complete."
+            messages.error(request, f"Screening Error: {error}")
+            return redirect('apply_job', pk=job.id)
+        return _screening_pending(request, screening)
+
+    if screening is not None and not screening.is_finished:
+        return _screening_pending(request, screening)
+
+    # Stored AI analysis for this resume and version of the job; the LLM only
+    # runs in the screening job, when either changed (or on refresh_analysis).
+    analysis = stored_analysis(resume, job)
+    if screening is not None and screening.status == 'failed':
+        messages.error(request, f"Screening Error: {screening.error}")
+        if analysis is None:
+            return redirect('apply_job', pk=job.id)
+    if analysis is None:
+        return _queue_screening(request, resume, job)
+    changed = analysis.apply_to(resume)
+    if changed:
+        resume.save(update_fields=changed)
+
+    matched_skills, missing_skills = skills.match(resume, job)
 
     # Recommender System (Matches ALL missing skills)
     recommended_courses = get_recommended_courses(missing_skills)
@@ -263,10 +192,21 @@ def screening_preview(request, resume_id, job_id):
         'matched_skills': matched_skills,
         'missing_skills': missing_skills,
         'recommended_courses': recommended_courses,
-        'last_updated': now_str
+        'last_updated': analysis.analyzed_at,
+        'analysis': analysis,
     }
     return render(request, 'jobs/screening_preview.html', context)
 
+@login_required
+@require_POST
+def refresh_analysis(request, resume_id, job_id):
+    """Queues the match analysis again, skipping the stored result and the LLM cache."""
+    resume = get_object_or_404(Resume, id=resume_id, candidate=request.user)
+    job = get_object_or_404(Job, id=job_id)
+    if resume.parsed_data is None:
+        return redirect('screening_preview', resume_id=resume.id, job_id=job.id)
+    return _queue_screening(request, resume, job, refresh=True)
+
 from lms.models import Course
 from django.db.models import Q
 
@@ -285,9 +225,7 @@ def confirm_apply(request, resume_id, job_id):
         messages.warning(request, "You have already applied for this job.")
         return redirect('job_detail', pk=job.id)
         
-    # Recalculate one last time
-    resume_skills = resume.parsed_data.get('Skills', [])
-    matched_skills, missing_skills = calculate_skills_match(resume_skills, job.skills_required)
+    matched_skills, missing_skills = skills.match(resume, job)
 
     app = Application.objects.create(
         job=job,
@@ -310,8 +248,7 @@ def confirm_apply(request, resume_id, job_id):
 def screening_result(request, pk):
     application = get_object_or_404(Application, pk=pk, candidate=request.user)
     
-    resume_skills = application.resume.parsed_data.get('Skills', []) if application.resume else []
-    matched_skills, missing_skills = calculate_skills_match(resume_skills, application.job.skills_required)
+    matched_skills, missing_skills = skills.match(application.resume, application.job)
 
     # Recommender System
     recommended_courses = []
@@ -332,6 +269,25 @@ def view_applicants(request, pk):
     applicants = job.applications.all().order_by('-match_score')
     return render(request, 'jobs/view_applicants.html', {'job': job, 'applicants': applicants})
 
+@login_required
+def rank_candidates(request, pk):
+    """Every candidate's latest resume ranked by the job's required skills, applied or not."""
+    job = get_object_or_404(Job, pk=pk, hr=request.user)
+    try:
+        k = int(request.GET.get('k', ranking.DEFAULT_TOP_K))
+    except ValueError:
+        k = ranking.DEFAULT_TOP_K
+    candidates = ranking.rank_with_resumes(job, k)
+    applied = set(job.applications.values_list('candidate_id', flat=True))
+    for candidate in candidates:
+        candidate.applied = candidate.candidate_id in applied
+    return render(request, 'jobs/rank_candidates.html', {
+        'job': job,
+        'candidates': candidates,
+        'required_skills': [label for _, label in skills.job_skill_rows(job)],
+        'k': k,
+    })
+
 @login_required
 def update_status(request, pk, status):
     application = get_object_or_404(Application, pk=pk, job__hr=request.user)
@@ -352,9 +308,7 @@ def application_detail(request, pk):
     if request.user.role != 'hr' and application.candidate != request.user:
         return redirect('dashboard')
         
-    # Dynamic Calculation
-    resume_skills = application.resume.parsed_data.get('Skills', []) if application.resume else []
-    matched_skills, missing_skills = calculate_skills_match(resume_skills, application.job.skills_required)
+    matched_skills, missing_skills = skills.match(application.resume, application.job)
 
     candidate_name = application.candidate.get_full_name()
     candidate_name = application.candidate.get_full_name()
@@ -5,7 +5,8 @@ from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 import json
 from .models import QuizAttempt
-from ai_utils.utils import generate_quiz_questions
+from accounts.decorators import async_login_required
+from ai_utils.utils import agenerate_quiz_questions
 
 @login_required
 def quiz_home(request):
@@ -26,17 +27,19 @@ def quiz_home(request):
     }
     return render(request, 'quiz/home.html', context)
 
-@login_required
-def get_quiz_questions(request):
+@async_login_required
+async def get_quiz_questions(request):
     topic = request.GET.get('topic')
     if not topic:
         return JsonResponse({'error': 'Topic is required'}, status=400)
     
     from jobs.models import Resume
-    latest_resume = Resume.objects.filter(candidate=request.user).order_by('-uploaded_at').first()
+    latest_resume = await Resume.objects.filter(candidate=request.user).order_by('-uploaded_at').afirst()
     resume_data = latest_resume.parsed_data if latest_resume else None
     
-    questions = generate_quiz_questions(topic, resume_data=resume_data)
+    questions = await agenerate_quiz_questions(
+        topic, resume_data=resume_data, resume_id=latest_resume.id if latest_resume else None
+    )
     return JsonResponse({'questions': questions})
 
 @login_required